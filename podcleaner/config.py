@@ -27,6 +27,12 @@ class LLMConfig:
     chunk_size: int = 600
     max_attempts: int = 3
     temperature: float = 0.1
+    max_concurrency: int = 8  # Chunks sent to the LLM at once
+    max_prompt_chars: int = 48000  # Transcript text per chunk, keeping prompts within the context window
+    max_prompt_tokens: Optional[int] = None  # If set, chunks are sized by tokens instead of max_prompt_chars (needs tiktoken)
+    cache_dir: Optional[str] = None  # If set, LLM answers are cached here by prompt
+    semantic_cache_model: Optional[str] = None  # If set, sentence-transformers model for reusing labels of similar chunks
+    semantic_cache_threshold: float = 0.95  # Minimum cosine similarity for reusing labels
 
     def validate(self):
         """Validate the configuration."""
@@ -42,6 +48,17 @@ class AudioConfig:
     min_duration: float = 5.0
     max_gap: float = 20.0
     download_dir: str = "podcasts"
+    download_concurrency: int = 1  # Episodes downloaded at once; 1 downloads in the broker's callback thread
+
+@dataclass
+class TranscriberConfig:
+    """Configuration for the transcription service."""
+    model_name: str = "base"
+    device: Optional[str] = None  # "cuda" or "cpu"; CUDA is used when available if unset
+    backend: Optional[str] = None  # "whisper" or "whisper.cpp"; whisper.cpp on ARM hosts if unset
+    cache_format: str = "json"  # Cached transcript format: "json", "msgpack" or "zstd"
+    num_workers: int = 1  # Worker processes, each with its own model; 1 transcribes in-process
+    shared_cache_dir: Optional[str] = None  # If set, transcripts are also cached here by audio content and model
 
 @dataclass
 class MQTTConfig:
@@ -80,6 +97,8 @@ class WebServerConfig:
     host: str = "localhost"
     port: int = 8080
     use_https: bool = False
+    state_ttl: int = 86400  # Seconds to keep request, file and feed state
+    max_state_entries: int = 10000  # Upper bound on each kind of tracked state
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'WebServerConfig':
@@ -87,7 +106,9 @@ class WebServerConfig:
         return cls(
             host=data.get("host", "localhost"),
             port=data.get("port", 8080),
-            use_https=data.get("use_https", False)
+            use_https=data.get("use_https", False),
+            state_ttl=data.get("state_ttl", 86400),
+            max_state_entries=data.get("max_state_entries", 10000)
         )
 
 @dataclass
@@ -142,6 +163,7 @@ class Config:
     message_broker: MessageBrokerConfig = None
     web_server: WebServerConfig = None
     object_storage: ObjectStorageConfig = None
+    transcriber: TranscriberConfig = None
 
     def __post_init__(self):
         """Initialize default configs if not provided."""
@@ -151,6 +173,8 @@ class Config:
             self.web_server = WebServerConfig()
         if self.object_storage is None:
             self.object_storage = ObjectStorageConfig()
+        if self.transcriber is None:
+            self.transcriber = TranscriberConfig()
 
     def validate(self):
         """Validate the configuration."""
@@ -186,7 +210,13 @@ def load_config(path=None):
         base_url=llm_config_data.get("base_url") or os.environ.get("OPENAI_API_BASE"),
         chunk_size=llm_config_data.get("chunk_size", 600),
         max_attempts=llm_config_data.get("max_attempts", 3),
-        temperature=llm_config_data.get("temperature", 0.1)
+        temperature=llm_config_data.get("temperature", 0.1),
+        max_concurrency=llm_config_data.get("max_concurrency", 8),
+        max_prompt_chars=llm_config_data.get("max_prompt_chars", 48000),
+        max_prompt_tokens=llm_config_data.get("max_prompt_tokens"),
+        cache_dir=os.path.expanduser(llm_config_data["cache_dir"]) if llm_config_data.get("cache_dir") else None,
+        semantic_cache_model=llm_config_data.get("semantic_cache_model"),
+        semantic_cache_threshold=llm_config_data.get("semantic_cache_threshold", 0.95)
     )
     
     # Load audio config
@@ -194,7 +224,19 @@ def load_config(path=None):
     audio_config = AudioConfig(
         min_duration=audio_config_data.get("min_duration", 5.0),
         max_gap=audio_config_data.get("max_gap", 20.0),
-        download_dir=audio_config_data.get("download_dir", "podcasts")
+        download_dir=audio_config_data.get("download_dir", "podcasts"),
+        download_concurrency=audio_config_data.get("download_concurrency", 1)
+    )
+    
+    # Load transcriber config
+    transcriber_config_data = config_data.get("transcriber", {})
+    transcriber_config = TranscriberConfig(
+        model_name=transcriber_config_data.get("model", "base"),
+        device=transcriber_config_data.get("device"),
+        backend=transcriber_config_data.get("backend"),
+        cache_format=transcriber_config_data.get("cache_format", "json"),
+        num_workers=transcriber_config_data.get("num_workers", 1),
+        shared_cache_dir=os.path.expanduser(transcriber_config_data["shared_cache_dir"]) if transcriber_config_data.get("shared_cache_dir") else None
     )
     
     # Load message broker config
@@ -219,7 +261,8 @@ def load_config(path=None):
         log_level=config_data.get("log_level", "INFO"),
         message_broker=message_broker_config,
         web_server=web_server_config,
-        object_storage=object_storage_config
+        object_storage=object_storage_config,
+        transcriber=transcriber_config
     )
     
     return config 
\ No newline at end of file
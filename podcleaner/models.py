@@ -1,10 +1,72 @@
 """Domain models for the PodCleaner package."""
 
+import os
+import struct
+import threading
+from operator import attrgetter
 from dataclasses import dataclass
 from typing import List, Optional
 from datetime import datetime
+from .jsonutil import dumps, loads
 
-@dataclass
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# File extension used for transcripts stored in the packed columnar format
+PACKED_TRANSCRIPT_EXTENSION = ".mp"
+
+# File extension used for zstd-compressed JSON transcripts
+COMPRESSED_TRANSCRIPT_EXTENSION = ".zst"
+
+# zstd level for compressed transcripts; low levels compress fast and still shrink JSON well
+ZSTD_LEVEL = 3
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Write a file so readers see either the old contents or the complete new ones."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def segment_arrays(segments: List["Segment"]):
+    """
+    Build structure-of-arrays views of segment timings and ad flags.
+    
+    Args:
+        segments: Segments to read.
+        
+    Returns:
+        tuple: (starts, ends, is_ad) NumPy arrays with one entry per segment.
+    """
+    if np is None:
+        raise ImportError("numpy is required for segment arrays. Install it with 'pip install numpy'.")
+    count = len(segments)
+    return (
+        np.fromiter((seg.start for seg in segments), np.float64, count),
+        np.fromiter((seg.end for seg in segments), np.float64, count),
+        np.fromiter((seg.is_ad for seg in segments), bool, count)
+    )
+
+@dataclass(slots=True)
 class Segment:
     """A segment of transcribed audio."""
     id: int
@@ -26,12 +88,18 @@ class ProcessingResult:
     segments: List[Segment]
     error: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class Transcript:
     """A complete podcast transcript."""
     segments: List[Segment]
     processed_at: datetime = datetime.now()
     
+    def __post_init__(self):
+        """Keep segments in start-time order so consumers never need to re-sort them."""
+        # A sorted copy, so the caller's list is left as it was; Timsort is linear on
+        # the already-ordered segments transcription produces
+        self.segments = sorted(self.segments, key=attrgetter("start"))
+    
     @property
     def ad_segments(self) -> List[Segment]:
         """Get all segments marked as advertisements."""
@@ -72,4 +140,91 @@ class Transcript:
             for seg in data["segments"]
         ]
         processed_at = datetime.fromisoformat(data["processed_at"])
-        return cls(segments=segments, processed_at=processed_at) 
\ No newline at end of file
+        return cls(segments=segments, processed_at=processed_at)
+    
+    def to_packed(self) -> bytes:
+        """
+        Convert transcript to a compact columnar msgpack blob.
+        
+        Segment fields are stored column by column: ids and texts as lists,
+        start/end times as little-endian int32 milliseconds and the ad flags as a bitmap.
+        Transcription timestamps have at most millisecond precision, so times round-trip exactly.
+        """
+        if msgpack is None:
+            raise ImportError("msgpack is required for packed transcripts. Install it with 'pip install msgpack'.")
+        
+        count = len(self.segments)
+        is_ad = bytearray((count + 7) // 8)
+        for i, seg in enumerate(self.segments):
+            if seg.is_ad:
+                is_ad[i >> 3] |= 1 << (i & 7)
+        
+        return msgpack.packb({
+            "ids": [seg.id for seg in self.segments],
+            "texts": [seg.text for seg in self.segments],
+            "start_ms": struct.pack(f"<{count}i", *(round(seg.start * 1000) for seg in self.segments)),
+            "end_ms": struct.pack(f"<{count}i", *(round(seg.end * 1000) for seg in self.segments)),
+            "is_ad": bytes(is_ad),
+            "processed_at": self.processed_at.isoformat()
+        })
+    
+    @classmethod
+    def from_packed(cls, data: bytes) -> 'Transcript':
+        """Create transcript from the packed columnar format."""
+        if msgpack is None:
+            raise ImportError("msgpack is required for packed transcripts. Install it with 'pip install msgpack'.")
+        
+        columns = msgpack.unpackb(data)
+        count = len(columns["ids"])
+        if "start_ms" in columns:
+            starts = [ms / 1000 for ms in struct.unpack(f"<{count}i", columns["start_ms"])]
+            ends = [ms / 1000 for ms in struct.unpack(f"<{count}i", columns["end_ms"])]
+        else:
+            # Transcripts packed before times were quantized store float64 seconds
+            starts = struct.unpack(f"<{count}d", columns["starts"])
+            ends = struct.unpack(f"<{count}d", columns["ends"])
+        is_ad = columns["is_ad"]
+        segments = [
+            Segment(
+                id=seg_id,
+                text=text,
+                start=starts[i],
+                end=ends[i],
+                is_ad=bool(is_ad[i >> 3] & (1 << (i & 7)))
+            )
+            for i, (seg_id, text) in enumerate(zip(columns["ids"], columns["texts"]))
+        ]
+        processed_at = datetime.fromisoformat(columns["processed_at"])
+        return cls(segments=segments, processed_at=processed_at)
+    
+    def save(self, path: str) -> None:
+        """
+        Write the transcript to disk, picking the format from the file extension.
+        
+        The file is replaced atomically, so an interrupted or concurrent save never
+        leaves a truncated transcript behind for the caches to pick up.
+        """
+        if path.endswith(PACKED_TRANSCRIPT_EXTENSION):
+            data = self.to_packed()
+        elif path.endswith(COMPRESSED_TRANSCRIPT_EXTENSION):
+            if zstandard is None:
+                raise ImportError("zstandard is required for compressed transcripts")
+            data = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(dumps(self.to_dict()))
+        else:
+            data = dumps(self.to_dict(), indent=True)
+        _write_atomic(path, data)
+    
+    @classmethod
+    def load(cls, path: str) -> 'Transcript':
+        """Read a transcript from disk, picking the format from the file extension."""
+        if path.endswith(PACKED_TRANSCRIPT_EXTENSION):
+            with open(path, 'rb') as f:
+                return cls.from_packed(f.read())
+        if path.endswith(COMPRESSED_TRANSCRIPT_EXTENSION):
+            if zstandard is None:
+                raise ImportError("zstandard is required for compressed transcripts")
+            with open(path, 'rb') as f:
+                data = zstandard.ZstdDecompressor().decompress(f.read())
+            return cls.from_dict(loads(data))
+        with open(path, 'rb') as f:
+            return cls.from_dict(loads(f.read()))
@@ -84,6 +84,10 @@ def main():
     if args.mqtt_password:
         config.message_broker.mqtt.password = args.mqtt_password
     
+    # Override the transcription model if provided
+    if args.model_name:
+        config.transcriber.model_name = args.model_name
+    
     # Override web server settings if provided
     if args.web_host:
         config.web_server.host = args.web_host
@@ -127,14 +131,19 @@ def main():
         logger.info("web_server_started", host=config.web_server.host, port=config.web_server.port)
     
     if service_name == "transcriber" or service_name == "all":
-        model_name = args.model_name or "base"
+        transcriber_config = config.transcriber
         transcriber = Transcriber(
-            config=config.llm,
-            message_broker=message_broker
+            message_broker=message_broker,
+            model_name=transcriber_config.model_name,
+            device=transcriber_config.device,
+            cache_format=transcriber_config.cache_format,
+            backend=transcriber_config.backend,
+            num_workers=transcriber_config.num_workers,
+            shared_cache_dir=transcriber_config.shared_cache_dir
         )
         transcriber.start()
         services.append(transcriber)
-        logger.info("transcriber_started", model=model_name)
+        logger.info("transcriber_started", model=transcriber_config.model_name)
     
     if service_name == "ad-detector" or service_name == "all":
         ad_detector = AdDetector(
@@ -1,19 +1,254 @@
 """Service for detecting advertisements in podcast transcripts."""
 
-import json
+import hashlib
 import time
 import os
+import re
 import threading
-from typing import List, Dict, Optional, Set
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
+from typing import Callable, List, Dict, Optional, Set
 import requests
 import openai
 from ..logging import get_logger
+from ..jsonutil import dumps, loads
 from ..config import LLMConfig
-from ..models import Segment, Transcript, TranscriptChunk, ProcessingResult
+from ..state import open_path_set
+from ..models import Segment, Transcript, TranscriptChunk, ProcessingResult, segment_arrays
 from .message_broker import Message, MessageBroker, Topics
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
 logger = get_logger(__name__)
 
+# Phrases announcing an ad break, lowercase
+_TRANSITION_PHRASES = (
+    "nach einer kurzen unterbrechung",
+    "bleiben sie dran",
+    "wir sind gleich wieder da",
+    "gleich geht es weiter",
+)
+
+# Phrases typical of promotional content
+_PROMOTIONAL_RE = re.compile(
+    "tickets|infos|anmeldung|weitere informationen|sparen sie|rabatt|vorteilscode"
+    "|jetzt buchen|besuchen sie|mehr erfahren",
+    re.IGNORECASE
+)
+
+# Instructions sent ahead of every chunk. They must stay byte-identical between
+# requests so the provider can reuse its cached prompt prefix across chunks.
+AD_DETECTION_INSTRUCTIONS = (
+    "You are an AI trained to detect advertisements and sponsored content in podcast transcripts. "
+    "Consider the following patterns for ads:\n"
+    "1. Transition phrases like 'We'll be right back', 'After this break', etc.\n"
+    "2. Promotional content for events, products, or services\n"
+    "3. Call to action phrases like 'Visit our website', 'Use code X for discount'\n"
+    "4. Sponsor mentions and sponsored content\n"
+    "5. Advertisement blocks that start with a transition and end with a return phrase\n\n"
+    "Review the transcript as a continuous text and identify complete advertisement blocks.\n"
+    "Important rules:\n"
+    "1. If you find a transition to ads (like 'We'll be back after this'), mark it AND the following segments as ads\n"
+    "2. If segments are part of the same ad block, they should ALL be marked as ads\n"
+    "3. Look for return phrases (like 'Welcome back') to identify where ad blocks end\n"
+    "4. Consider promotional content (event announcements, product placements) as ads\n\n"
+    "You must respond with ONLY a JSON object containing segment classifications. "
+    "The response must be a valid JSON object with a 'segments' array containing "
+    "'id' (integer) and 'ad' (boolean) fields for each segment. "
+    "Do not include any explanations or additional text in your response.\n"
+    "Return ONLY a JSON object with this structure:\n"
+    "{\n"
+    '    "segments": [\n'
+    '        {"id": <segment_id>, "ad": true/false},\n'
+    "        ...\n"
+    "    ]\n"
+    "}\n"
+)
+
+# Routes requests sharing the instructions prefix to the same OpenAI prompt cache
+PROMPT_CACHE_KEY = "ad-detector-v1"
+
+# Chunks remembered by the semantic cache; the oldest are dropped beyond this
+SEMANTIC_CACHE_MAX_ENTRIES = 10000
+
+class SemanticCache:
+    """
+    Ad labels of previously classified chunks, looked up by text similarity.
+    
+    Sponsor reads repeat nearly verbatim across episodes, so a chunk whose
+    embedding is close enough to a classified one reuses its labels. Search is
+    an exact inner product over L2-normalized embeddings, i.e. cosine similarity.
+    """
+    
+    def __init__(self, encode: Callable[[str], "np.ndarray"], threshold: float):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            encode: Maps a chunk's text to an embedding vector.
+            threshold: Minimum cosine similarity for a chunk to reuse cached labels.
+        """
+        self.encode = encode
+        self.threshold = threshold
+        self._vectors = None
+        self._labels: List[List[bool]] = []
+        self._lock = threading.Lock()
+    
+    def embed(self, text: str) -> "np.ndarray":
+        """Embed a chunk's text as a unit-length vector, for lookup and add."""
+        vector = np.asarray(self.encode(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def lookup(self, vector: "np.ndarray", count: int) -> Optional[List[bool]]:
+        """Get the labels of the most similar cached chunk with the same number of segments, if similar enough."""
+        with self._lock:
+            if self._vectors is None:
+                return None
+            similarities = self._vectors @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold or len(self._labels[best]) != count:
+                return None
+            return self._labels[best]
+    
+    def add(self, vector: "np.ndarray", labels: List[bool]) -> None:
+        """Remember the labels of a classified chunk, given its embedding."""
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = vector[None, :]
+            else:
+                self._vectors = np.vstack((self._vectors[-(SEMANTIC_CACHE_MAX_ENTRIES - 1):], vector))
+            self._labels = self._labels[-(SEMANTIC_CACHE_MAX_ENTRIES - 1):] + [labels]
+
+def _build_semantic_cache(config: LLMConfig) -> Optional[SemanticCache]:
+    """Load the embedding model for the semantic cache, if one is configured."""
+    if not config.semantic_cache_model:
+        return None
+    if SentenceTransformer is None or np is None:
+        logger.warning("semantic_cache_unavailable", model=config.semantic_cache_model,
+                       reason="sentence-transformers and numpy are required")
+        return None
+    model = SentenceTransformer(config.semantic_cache_model)
+    return SemanticCache(model.encode, config.semantic_cache_threshold)
+
+# Prompt tokens per segment beyond its text, for the "ID: <id> Text: " prefix and newline
+SEGMENT_OVERHEAD_TOKENS = 6
+
+def _load_encoding(config: LLMConfig):
+    """
+    Load the tokenizer of the configured model for token-based chunking.
+    
+    Returns:
+        Optional[tiktoken.Encoding]: The encoding, or None to chunk by characters.
+    """
+    if not config.max_prompt_tokens:
+        return None
+    if tiktoken is None:
+        logger.warning("token_chunking_unavailable", reason="tiktoken is not installed")
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(config.model_name)
+        except KeyError:
+            # Models tiktoken doesn't know, e.g. behind other OpenAI-compatible servers
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("token_chunking_unavailable", model=config.model_name, error=str(e))
+        return None
+
+# Longest gap in seconds that an ad block bridges before the next ad
+MERGE_MAX_GAP = 5.0
+
+def _extend_ad_blocks(starts: List[float], ends: List[float], is_ad: List[bool], transitions: List[int],
+                      is_promotional: Callable[[int], bool], max_gap: float = MERGE_MAX_GAP) -> None:
+    """
+    Extend ad blocks from transition phrases, updating is_ad in place.
+    
+    A transition starts a block, which extends over ads, promotional content and
+    gaps of up to max_gap seconds before the next ad.
+    
+    Args:
+        starts: Start time of each segment.
+        ends: End time of each segment.
+        is_ad: Ad verdict of each segment.
+        transitions: Sorted indices of the segments containing a transition phrase.
+        is_promotional: Whether the segment at an index is promotional content;
+            only asked for the segments a block reaches.
+        max_gap: Longest gap in seconds bridged before the next ad.
+    """
+    count = len(is_ad)
+    i = 0
+    for start in transitions:
+        if start < i or is_ad[start]:
+            continue
+        is_ad[start] = True
+        j = start + 1
+        while j < count:
+            if is_ad[j] or is_promotional(j):
+                is_ad[j] = True
+            elif j + 1 < count and is_ad[j + 1] and starts[j + 1] - ends[j] <= max_gap:
+                is_ad[j] = True
+            else:
+                break
+            j += 1
+        # Everything up to j is now an ad, so resume at the next transition from j
+        i = j
+
+def _find_transitions(texts: List[str]) -> List[int]:
+    """
+    Find the texts containing a transition phrase.
+    
+    The lowercased texts are joined and searched with str.find, which is several
+    times faster on long transcripts than a case-insensitive regex per segment.
+    
+    Returns:
+        List[int]: Sorted indices of the matching texts.
+    """
+    lowered = [text.lower() for text in texts]
+    # The separator never occurs in a phrase, so a match cannot span two texts
+    joined = "\0".join(lowered)
+    text_ends = list(accumulate(len(text) + 1 for text in lowered))
+    found = set()
+    for phrase in _TRANSITION_PHRASES:
+        position = joined.find(phrase)
+        while position != -1:
+            found.add(bisect_right(text_ends, position))
+            position = joined.find(phrase, position + 1)
+    return sorted(found)
+
+def _parse_llm_json(content: str) -> dict:
+    """
+    Parse the JSON object in an LLM reply.
+    
+    Models sometimes wrap the object in prose or a ```json fence, so if the reply
+    isn't valid JSON as a whole, parse the span from its first '{' to its last '}'.
+    
+    Raises:
+        ValueError: If no JSON object can be parsed.
+    """
+    try:
+        return loads(content)
+    except ValueError:
+        start = content.find("{")
+        end = content.rfind("}")
+        if start == -1 or end < start:
+            raise
+        return loads(content[start:end + 1])
+
 class AdDetectionError(Exception):
     """Raised when ad detection fails."""
     pass
@@ -28,23 +263,23 @@ class AdDetector:
         self.running = False
         
         # Track files being processed and already processed
-        self.files_in_process = set()
-        self.processed_files = set()
-        self.file_lock = threading.Lock()  # Lock for thread-safe access
-        
-        # File to persist processed files
         self.debug_dir = "debug_output"
         os.makedirs(self.debug_dir, exist_ok=True)
-        self.processed_files_path = os.path.join(self.debug_dir, "processed_files.json")
-        
-        # Load processed files from disk if available
-        self._load_processed_files()
+        self.files_in_process = set()
+        # Processed files persist across restarts, picking up the former JSON list once
+        self.processed_files = open_path_set(
+            self.debug_dir, "ad_detector_processed",
+            legacy_json_path=os.path.join(self.debug_dir, "processed_files.json")
+        )
+        self.file_lock = threading.Lock()  # Lock for thread-safe access
         
         # Set up OpenAI client
         self.client = openai.OpenAI(
             api_key=config.api_key,
             base_url=config.base_url
         )
+        self._semantic_cache = _build_semantic_cache(config)
+        self._encoding = _load_encoding(config)
         
         # Subscribe to ad detection requests if message broker is provided
         if self.message_broker:
@@ -55,44 +290,42 @@ class AdDetector:
         
         os.makedirs(self.debug_dir, exist_ok=True)
     
-    def _load_processed_files(self):
-        """Load the list of processed files from disk."""
-        try:
-            if os.path.exists(self.processed_files_path):
-                with open(self.processed_files_path, 'r') as f:
-                    files_list = json.load(f)
-                    self.processed_files = set(files_list)
-                    logger.info("loaded_processed_files", count=len(self.processed_files))
-        except Exception as e:
-            logger.error("failed_to_load_processed_files", error=str(e))
-            # Initialize with empty set if loading fails
-            self.processed_files = set()
-    
-    def _save_processed_files(self):
-        """Save the list of processed files to disk."""
-        try:
-            with open(self.processed_files_path, 'w') as f:
-                json.dump(list(self.processed_files), f)
-            logger.debug("saved_processed_files", count=len(self.processed_files))
-        except Exception as e:
-            logger.error("failed_to_save_processed_files", error=str(e))
-    
     def _write_debug_info(self, filename: str, data: dict):
         """Write debug information to a file."""
         filepath = os.path.join(self.debug_dir, filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        with open(filepath, 'wb') as f:
+            f.write(dumps(data, indent=True))
         logger.debug("debug_info_written", file=filepath)
 
     def _create_chunks(self, transcript: Transcript) -> List[TranscriptChunk]:
-        """Split the transcript into fixed-size chunks."""
+        """
+        Split the transcript into chunks of up to chunk_size segments.
+        
+        A chunk is closed early once its prompt reaches max_prompt_tokens, counted with
+        the model's tokenizer, or else max_prompt_chars of text, so batching many
+        segments per request never overflows the model's context window.
+        """
+        texts = [segment.text for segment in transcript.segments]
+        if self._encoding is not None:
+            budget = self.config.max_prompt_tokens
+            sizes = [len(tokens) + SEGMENT_OVERHEAD_TOKENS
+                     for tokens in self._encoding.encode_ordinary_batch(texts, num_threads=8)]
+        else:
+            budget = self.config.max_prompt_chars
+            sizes = [len(text) for text in texts]
+        
         chunks = []
-        for i in range(0, len(transcript.segments), self.config.chunk_size):
-            chunk_segments = transcript.segments[i:i + self.config.chunk_size]
-            chunks.append(TranscriptChunk(
-                segments=chunk_segments,
-                chunk_id=i // self.config.chunk_size
-            ))
+        current = []
+        current_size = 0
+        for segment, size in zip(transcript.segments, sizes):
+            if current and (len(current) >= self.config.chunk_size or current_size + size > budget):
+                chunks.append(TranscriptChunk(segments=current, chunk_id=len(chunks)))
+                current = []
+                current_size = 0
+            current.append(segment)
+            current_size += size
+        if current:
+            chunks.append(TranscriptChunk(segments=current, chunk_id=len(chunks)))
         return chunks
     
     def _build_prompt(self, chunk: TranscriptChunk) -> List[Dict]:
@@ -102,43 +335,76 @@ class AdDetector:
             for seg in chunk.segments
         ])
         
+        # Only the segments vary between chunks, so they come last after the shared instructions
         return [{
             "role": "system",
-            "content": (
-                "You are an AI trained to detect advertisements and sponsored content in podcast transcripts. "
-                "Consider the following patterns for ads:\n"
-                "1. Transition phrases like 'We'll be right back', 'After this break', etc.\n"
-                "2. Promotional content for events, products, or services\n"
-                "3. Call to action phrases like 'Visit our website', 'Use code X for discount'\n"
-                "4. Sponsor mentions and sponsored content\n"
-                "5. Advertisement blocks that start with a transition and end with a return phrase\n\n"
-                "You must respond with ONLY a JSON object containing segment classifications. "
-                "The response must be a valid JSON object with a 'segments' array containing "
-                "'id' (integer) and 'ad' (boolean) fields for each segment. "
-                "Do not include any explanations or additional text in your response."
-            )
+            "content": AD_DETECTION_INSTRUCTIONS
         }, {
             "role": "user",
-            "content": (
-                "Review the transcript as a continuous text and identify complete advertisement blocks.\n"
-                "Important rules:\n"
-                "1. If you find a transition to ads (like 'We'll be back after this'), mark it AND the following segments as ads\n"
-                "2. If segments are part of the same ad block, they should ALL be marked as ads\n"
-                "3. Look for return phrases (like 'Welcome back') to identify where ad blocks end\n"
-                "4. Consider promotional content (event announcements, product placements) as ads\n\n"
-                f"Segments to analyze:\n{segments_text}\n\n"
-                "Return ONLY a JSON object with this structure:\n"
-                "{\n"
-                '    "segments": [\n'
-                '        {"id": <segment_id>, "ad": true/false},\n'
-                "        ...\n"
-                "    ]\n"
-                "}\n"
-            )
+            "content": f"Segments to analyze:\n{segments_text}\n"
         }]
     
+    def _llm_cache_path(self, messages: List[Dict]) -> Optional[str]:
+        """Get the LLM response cache file for a prompt, if caching is enabled."""
+        if not self.config.cache_dir:
+            return None
+        digest = hashlib.sha256(f"{self.config.model_name}\0{self.config.temperature}\0".encode())
+        for message in messages:
+            digest.update(f"{message['role']}\0{message['content']}\0".encode())
+        return os.path.join(self.config.cache_dir, f"{digest.hexdigest()}.json")
+    
+    def _classify(self, messages: List[Dict]) -> dict:
+        """Ask the LLM to classify the segments in a prompt, reusing a cached answer if available."""
+        cache_file = self._llm_cache_path(messages)
+        if cache_file:
+            try:
+                with open(cache_file, 'rb') as f:
+                    data = f.read()
+                logger.debug("llm_cache_hit", file=cache_file)
+                return loads(data)
+            except FileNotFoundError:
+                pass
+            except ValueError as e:
+                logger.warning("llm_cache_corrupt", file=cache_file, error=str(e))
+        
+        # Other OpenAI-compatible servers may reject unknown request fields
+        extra_body = {"prompt_cache_key": PROMPT_CACHE_KEY} if not self.config.base_url else None
+        response = self.client.chat.completions.create(
+            model=self.config.model_name,
+            messages=messages,
+            temperature=self.config.temperature,
+            extra_body=extra_body
+        )
+        result = _parse_llm_json(response.choices[0].message.content)
+        
+        if cache_file:
+            try:
+                os.makedirs(self.config.cache_dir, exist_ok=True)
+                tmp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_file, 'wb') as f:
+                    f.write(dumps(result))
+                os.replace(tmp_file, cache_file)
+            except OSError as e:
+                logger.warning("llm_cache_store_failed", file=cache_file, error=str(e))
+        return result
+    
+    def _results_to_dict(self, results: List[Dict]) -> Dict[int, bool]:
+        """Map segment ids to ad verdicts from the LLM response; the first answer for an id wins."""
+        return {r["id"]: r["ad"] for r in reversed(results)}
+    
     def _process_chunk(self, chunk: TranscriptChunk) -> ProcessingResult:
         """Process a single chunk of the transcript."""
+        # Embedded once, for both the lookup and remembering this chunk's labels
+        embedding = None
+        if self._semantic_cache is not None:
+            embedding = self._semantic_cache.embed("\n".join(seg.text for seg in chunk.segments))
+            labels = self._semantic_cache.lookup(embedding, len(chunk.segments))
+            if labels is not None:
+                for segment, is_ad in zip(chunk.segments, labels):
+                    segment.is_ad = is_ad
+                logger.info("semantic_cache_hit", chunk_id=chunk.chunk_id, segment_count=len(chunk.segments))
+                return ProcessingResult(chunk_id=chunk.chunk_id, segments=chunk.segments)
+        
         attempts = 0
         last_error = None
         
@@ -165,13 +431,7 @@ class AdDetector:
                     }
                 )
                 
-                response = self.client.chat.completions.create(
-                    model=self.config.model_name,
-                    messages=messages,
-                    temperature=self.config.temperature
-                )
-                
-                result = json.loads(response.choices[0].message.content)
+                result = self._classify(messages)
                 logger.debug("chunk_response_received", 
                            chunk_id=chunk.chunk_id,
                            response_segments=len(result["segments"]),
@@ -186,13 +446,10 @@ class AdDetector:
                 # Update segment ad status
                 updated_count = 0
                 processed_segments = []
+                verdicts = self._results_to_dict(result["segments"])
                 for segment in chunk.segments:
-                    matching_result = next(
-                        (r for r in result["segments"] if r["id"] == segment.id),
-                        None
-                    )
-                    if matching_result:
-                        segment.is_ad = matching_result["ad"]
+                    if segment.id in verdicts:
+                        segment.is_ad = verdicts[segment.id]
                         updated_count += 1
                         processed_segments.append({
                             "id": segment.id,
@@ -216,6 +473,9 @@ class AdDetector:
                     }
                 )
                 
+                if embedding is not None:
+                    self._semantic_cache.add(embedding, [seg.is_ad for seg in chunk.segments])
+                
                 logger.debug("chunk_processing_complete", 
                            chunk_id=chunk.chunk_id,
                            segments_updated=updated_count,
@@ -248,63 +508,30 @@ class AdDetector:
     
     def _merge_adjacent_ads(self, segments: List[Segment]) -> None:
         """Merge adjacent ad segments into blocks."""
-        # First, find segments that are marked as ads by the LLM
-        ad_segments = set(i for i, seg in enumerate(segments) if seg.is_ad)
-        if not ad_segments:
+        # Without any LLM-marked ad there is nothing to extend, so skip the sweep;
+        # this stops at the first ad and allocates nothing on ad-free episodes
+        if not any(seg.is_ad for seg in segments):
             return
-
-        # Find the start of an ad block (marked by transition phrases)
-        for i, segment in enumerate(segments):
-            if i in ad_segments:
-                continue
-            
-            transition_phrases = [
-                "nach einer kurzen unterbrechung",
-                "bleiben sie dran",
-                "wir sind gleich wieder da",
-                "gleich geht es weiter"
-            ]
-            
-            if any(phrase in segment.text.lower() for phrase in transition_phrases):
-                # Mark this segment as the start of an ad block
-                segments[i].is_ad = True
-                ad_segments.add(i)
-                
-                # Look forward to find the end of the ad block
-                j = i + 1
-                while j < len(segments):
-                    if j in ad_segments or self._is_promotional_content(segments[j].text):
-                        segments[j].is_ad = True
-                        ad_segments.add(j)
-                        j += 1
-                    else:
-                        # Check if the next segment is within 5 seconds
-                        if j + 1 < len(segments) and j + 1 in ad_segments:
-                            time_gap = segments[j + 1].start - segments[j].end
-                            if time_gap <= 5.0:
-                                segments[j].is_ad = True
-                                ad_segments.add(j)
-                                j += 1
-                            else:
-                                break
-                        else:
-                            break
+        texts = [seg.text for seg in segments]
+        transitions = _find_transitions(texts)
+        if not transitions:
+            return
+        
+        is_ad = [seg.is_ad for seg in segments]
+        _extend_ad_blocks(
+            [seg.start for seg in segments],
+            [seg.end for seg in segments],
+            is_ad,
+            transitions,
+            lambda index: self._is_promotional_content(texts[index])
+        )
+        for segment, flag in zip(segments, is_ad):
+            if flag:
+                segment.is_ad = True
 
     def _is_promotional_content(self, text: str) -> bool:
         """Check if the text contains promotional content indicators."""
-        promotional_indicators = [
-            "tickets",
-            "infos",
-            "anmeldung",
-            "weitere informationen",
-            "sparen sie",
-            "rabatt",
-            "vorteilscode",
-            "jetzt buchen",
-            "besuchen sie",
-            "mehr erfahren"
-        ]
-        return any(indicator in text.lower() for indicator in promotional_indicators)
+        return _PROMOTIONAL_RE.search(text) is not None
 
     def detect_ads(self, transcript: Transcript) -> Transcript:
         """
@@ -344,23 +571,27 @@ class AdDetector:
         processed_segments = {}  # Use dict to maintain segment order and avoid duplicates
         errors = []
         
-        for i, chunk in enumerate(chunks, 1):
-            logger.debug("processing_chunk_progress", 
-                        current_chunk=i, 
-                        total_chunks=len(chunks),
-                        chunk_size=len(chunk.segments))
-            
-            result = self._process_chunk(chunk)
-            
-            # Store processed segments in dictionary to maintain uniqueness
-            for segment in result.segments:
-                processed_segments[segment.id] = segment
-            
-            if result.error:
-                errors.append(f"Chunk {result.chunk_id}: {result.error}")
+        # LLM calls are I/O-bound, so chunks are sent concurrently; results come
+        # back in chunk order
+        workers = max(1, min(self.config.max_concurrency, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ad-detector") as executor:
+            # Consume results while later chunks are still in flight
+            for i, result in enumerate(executor.map(self._process_chunk, chunks), 1):
+                logger.debug("processing_chunk_progress", 
+                            current_chunk=i, 
+                            total_chunks=len(chunks),
+                            chunk_size=len(result.segments))
+                
+                # Store processed segments in dictionary to maintain uniqueness
+                for segment in result.segments:
+                    processed_segments[segment.id] = segment
+                
+                if result.error:
+                    errors.append(f"Chunk {result.chunk_id}: {result.error}")
         
-        # Convert processed segments back to list, maintaining order
-        all_results = [processed_segments[i] for i in sorted(processed_segments.keys())]
+        # The transcript orders segments by start time, so the passes below need no sorting
+        processed = Transcript(segments=list(processed_segments.values()))
+        all_results = processed.segments
         
         # Merge adjacent ad segments
         self._merge_adjacent_ads(all_results)
@@ -423,24 +654,25 @@ class AdDetector:
                        ad_segments=len([s for s in all_results if s.is_ad]),
                        ad_blocks=len(ad_blocks))
         
-        return Transcript(segments=all_results)
+        return processed
     
     def _get_ad_blocks(self, segments: List[Segment], max_gap: float = 5.0) -> List[List[Segment]]:
         """Get continuous blocks of advertisements."""
+        if np is not None and segments:
+            return self._get_ad_blocks_vectorized(segments, max_gap)
+        
         blocks = []
         current_block = []
+        block_end = 0.0
         
-        for i, seg in enumerate(segments):
+        for seg in segments:
             if seg.is_ad:
-                if not current_block:
-                    current_block = [seg]
-                else:
-                    # Check if this segment is continuous with the current block
-                    if (seg.start - current_block[-1].end) <= max_gap:
-                        current_block.append(seg)
-                    else:
-                        blocks.append(current_block)
-                        current_block = [seg]
+                # Start a new block unless this segment is continuous with the current one
+                if current_block and seg.start - block_end > max_gap:
+                    blocks.append(current_block)
+                    current_block = []
+                current_block.append(seg)
+                block_end = seg.end
             elif current_block:
                 blocks.append(current_block)
                 current_block = []
@@ -448,7 +680,17 @@ class AdDetector:
         if current_block:
             blocks.append(current_block)
         
-        return blocks 
+        return blocks
+    
+    def _get_ad_blocks_vectorized(self, segments: List[Segment], max_gap: float) -> List[List[Segment]]:
+        """Get continuous blocks of advertisements from segment arrays; same result as the loop."""
+        starts, ends, is_ad = segment_arrays(segments)
+        
+        # A segment continues the previous block if both are ads with no gap longer than max_gap
+        continues = is_ad[1:] & is_ad[:-1] & (starts[1:] - ends[:-1] <= max_gap)
+        block_starts = np.flatnonzero(is_ad & ~np.r_[False, continues])
+        block_ends = np.flatnonzero(is_ad & ~np.r_[continues, False]) + 1
+        return [segments[s:e] for s, e in zip(block_starts.tolist(), block_ends.tolist())]
 
     def _handle_ad_detection_request(self, message: Message) -> None:
         """Handle an ad detection request message."""
@@ -501,23 +743,18 @@ class AdDetector:
         
         try:
             # Load transcript
-            with open(transcript_path, 'r') as f:
-                transcript_data = json.load(f)
-                transcript = Transcript.from_dict(transcript_data)
+            transcript = Transcript.load(transcript_path)
             
             # Detect ads
             processed_transcript = self.detect_ads(transcript)
             
             # Save updated transcript
-            with open(transcript_path, 'w') as f:
-                json.dump(processed_transcript.to_dict(), f, indent=2)
+            processed_transcript.save(transcript_path)
             
             # Mark file as processed and remove from in-process list
             with self.file_lock:
                 self.processed_files.add(file_path)
                 self.files_in_process.remove(file_path)
-                # Save to disk when a new file is processed
-                self._save_processed_files()
             
             self.message_broker.publish(Message(
                 topic=Topics.AD_DETECTION_COMPLETE,
@@ -550,6 +787,4 @@ class AdDetector:
     def stop(self) -> None:
         """Stop the ad detector service."""
         self.running = False
-        # Save processed files when stopping the service
-        self._save_processed_files()
-        logger.info("ad_detector_stopped") 
\ No newline at end of file
+        logger.info("ad_detector_stopped") 
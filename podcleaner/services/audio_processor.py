@@ -1,17 +1,36 @@
 """Service for processing audio files and removing advertisements."""
 
 import os
-import json
+import shutil
+import subprocess
+import tempfile
 import threading
 from typing import List, Optional, Tuple, Set
 from pydub import AudioSegment
 from ..logging import get_logger
 from ..config import AudioConfig
+from ..state import open_path_set
 from ..models import Transcript
 from .message_broker import Message, MessageBroker, Topics
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 logger = get_logger(__name__)
 
+# Files whose level is below this in every sampled window are treated as silent
+SILENCE_THRESHOLD_DBFS = -60.0
+
+# Sample rate used when decoding for the silence check; loudness needs no more
+SILENCE_SAMPLE_RATE = 8000
+
+# The silence check decodes this many windows of this many seconds, spread over the
+# file, instead of the whole episode that Whisper decodes again anyway
+SILENCE_WINDOWS = 5
+SILENCE_WINDOW_SECONDS = 10.0
+
 class AudioProcessingError(Exception):
     """Raised when audio processing fails."""
     pass
@@ -26,17 +45,15 @@ class AudioProcessor:
         self.running = False
         
         # Track files being processed and already processed
-        self.files_in_process = set()
-        self.processed_files = set()
-        self.file_lock = threading.Lock()  # Lock for thread-safe access
-        
-        # File to persist processed files
         self.debug_dir = "debug_output"
         os.makedirs(self.debug_dir, exist_ok=True)
-        self.processed_files_path = os.path.join(self.debug_dir, "audio_processor_processed_files.json")
-        
-        # Load processed files from disk if available
-        self._load_processed_files()
+        self.files_in_process = set()
+        # Processed files persist across restarts, picking up the former JSON list once
+        self.processed_files = open_path_set(
+            self.debug_dir, "audio_processor_processed",
+            legacy_json_path=os.path.join(self.debug_dir, "audio_processor_processed_files.json")
+        )
+        self.file_lock = threading.Lock()  # Lock for thread-safe access
         
         # Subscribe to audio processing requests if message broker is provided
         if self.message_broker:
@@ -45,28 +62,6 @@ class AudioProcessor:
                 self._handle_audio_processing_request
             )
     
-    def _load_processed_files(self):
-        """Load the list of processed files from disk."""
-        try:
-            if os.path.exists(self.processed_files_path):
-                with open(self.processed_files_path, 'r') as f:
-                    files_list = json.load(f)
-                    self.processed_files = set(files_list)
-                    logger.info("loaded_processed_files", count=len(self.processed_files))
-        except Exception as e:
-            logger.error("failed_to_load_processed_files", error=str(e))
-            # Initialize with empty set if loading fails
-            self.processed_files = set()
-    
-    def _save_processed_files(self):
-        """Save the list of processed files to disk."""
-        try:
-            with open(self.processed_files_path, 'w') as f:
-                json.dump(list(self.processed_files), f)
-            logger.debug("saved_processed_files", count=len(self.processed_files))
-        except Exception as e:
-            logger.error("failed_to_save_processed_files", error=str(e))
-    
     def _merge_segments(self, segments: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
         """
         Merge overlapping or close segments.
@@ -79,14 +74,16 @@ class AudioProcessor:
         """
         if not segments:
             return []
-            
-        # Sort segments by start time
-        segments = sorted(segments)
+        
         logger.debug("merging_segments", 
                     initial_segments=len(segments),
                     min_duration=self.config.min_duration,
                     max_gap=self.config.max_gap)
-        
+        if np is not None:
+            return self._merge_segments_vectorized(segments)
+            
+        # Sort segments by start time
+        segments = sorted(segments)
         merged = []
         current_start, current_end = segments[0]
         
@@ -120,6 +117,30 @@ class AudioProcessor:
                    final_count=len(merged))
         return merged
     
+    def _merge_segments_vectorized(self, segments: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+        """Merge segments with a sorted sweep over NumPy arrays; same result as _merge_segments."""
+        bounds = np.asarray(segments, dtype=np.float64)
+        bounds = bounds[np.lexsort((bounds[:, 1], bounds[:, 0]))]
+        starts, ends = bounds[:, 0], bounds[:, 1]
+        
+        # A segment starts a new group when it begins more than max_gap after
+        # the furthest end of everything before it
+        running_end = np.maximum.accumulate(ends)
+        new_group = np.empty(len(starts), dtype=bool)
+        new_group[0] = True
+        new_group[1:] = starts[1:] > running_end[:-1] + self.config.max_gap
+        group_starts = np.flatnonzero(new_group)
+        
+        merged_starts = starts[group_starts]
+        merged_ends = np.maximum.reduceat(ends, group_starts)
+        keep = merged_ends - merged_starts >= self.config.min_duration
+        merged = list(zip(merged_starts[keep].tolist(), merged_ends[keep].tolist()))
+        
+        logger.info("segments_merged", 
+                   initial_count=len(segments),
+                   final_count=len(merged))
+        return merged
+    
     def _get_ad_segments(self, transcript: Transcript) -> List[Tuple[float, float]]:
         """Extract time segments for advertisements."""
         segments = []
@@ -144,6 +165,21 @@ class AudioProcessor:
             AudioProcessingError: If processing fails.
         """
         try:
+            ad_segments = self._get_ad_segments(transcript)
+            if not ad_segments:
+                logger.info("no_ads_found", input_file=input_file)
+                return input_file
+            
+            # Cutting without re-encoding needs ffmpeg and the same container on both ends
+            ffmpeg = shutil.which("ffmpeg")
+            same_format = os.path.splitext(input_file)[1].lower() == os.path.splitext(output_file)[1].lower()
+            if ffmpeg and same_format:
+                try:
+                    return self._remove_ads_stream_copy(ffmpeg, input_file, output_file, ad_segments)
+                except subprocess.CalledProcessError as e:
+                    logger.warning("stream_copy_failed", input_file=input_file,
+                                   error=e.stderr.decode(errors="replace").strip() if e.stderr else str(e))
+            
             logger.info("loading_audio", 
                        input_file=input_file,
                        output_file=output_file)
@@ -154,12 +190,6 @@ class AudioProcessor:
                         sample_width=audio.sample_width,
                         frame_rate=audio.frame_rate)
             
-            # Get ad segments
-            ad_segments = self._get_ad_segments(transcript)
-            if not ad_segments:
-                logger.info("no_ads_found", input_file=input_file)
-                return input_file
-            
             logger.info("removing_ads", 
                        segments_count=len(ad_segments),
                        total_duration_ms=sum((end - start) * 1000 for start, end in ad_segments))
@@ -214,6 +244,101 @@ class AudioProcessor:
             logger.error("audio_processing_failed", error=str(e))
             raise AudioProcessingError(f"Failed to process audio: {str(e)}")
     
+    def _remove_ads_stream_copy(self, ffmpeg: str, input_file: str, output_file: str,
+                                ad_segments: List[Tuple[float, float]]) -> str:
+        """
+        Cut ads out of an audio file with ffmpeg's concat demuxer, copying the stream.
+        
+        Kept audio is described as inpoint/outpoint ranges of the input, so nothing is
+        decoded or re-encoded and cuts land on the nearest packet boundary.
+        
+        Raises:
+            subprocess.CalledProcessError: If ffmpeg fails.
+        """
+        source = os.path.abspath(input_file).replace("'", "'\\''")
+        lines = ["ffconcat version 1.0"]
+        position = 0.0
+        for start, end in ad_segments:
+            if start > position:
+                lines.append(f"file '{source}'")
+                if position > 0:
+                    lines.append(f"inpoint {position:.3f}")
+                lines.append(f"outpoint {start:.3f}")
+            position = max(position, end)
+        # Keep everything after the last ad
+        lines.append(f"file '{source}'")
+        lines.append(f"inpoint {position:.3f}")
+        
+        list_fd, list_file = tempfile.mkstemp(suffix=".ffconcat", dir=os.path.dirname(os.path.abspath(output_file)))
+        try:
+            with os.fdopen(list_fd, 'w') as f:
+                f.write("\n".join(lines) + "\n")
+            logger.info("stream_copying_audio", 
+                       input_file=input_file,
+                       output_file=output_file,
+                       segments_count=len(ad_segments))
+            subprocess.run(
+                [ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                 "-i", list_file, "-c", "copy", output_file],
+                check=True,
+                capture_output=True
+            )
+        finally:
+            os.remove(list_file)
+        
+        logger.info("audio_processing_complete", output_file=output_file, method="stream_copy")
+        return output_file
+    
+    @staticmethod
+    def is_mostly_silent(path: str, threshold_dbfs: float = SILENCE_THRESHOLD_DBFS) -> bool:
+        """
+        Check whether an audio file is effectively silent from start to end.
+        
+        A few short windows spread over the file are decoded by ffmpeg to low-rate mono
+        PCM, seeking to each one, and the RMS level of each is compared with the threshold.
+        The check stops at the first window that is not silent.
+        
+        Args:
+            path: Path to the audio file.
+            threshold_dbfs: Level below which a window counts as silent.
+            
+        Returns:
+            bool: True if every sampled window is silent; False if one is not, or the file
+            cannot be checked because ffmpeg, ffprobe or NumPy is missing or decoding fails.
+        """
+        ffmpeg = shutil.which("ffmpeg")
+        ffprobe = shutil.which("ffprobe")
+        if ffmpeg is None or ffprobe is None or np is None:
+            return False
+        
+        try:
+            probe = subprocess.run(
+                [ffprobe, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+                check=True, capture_output=True, text=True
+            )
+            duration = float(probe.stdout.strip())
+        except (subprocess.CalledProcessError, ValueError):
+            return False
+        
+        # Window starts spread evenly, the last one ending at the end of the file
+        span = max(duration - SILENCE_WINDOW_SECONDS, 0.0)
+        offsets = sorted({span * i / max(SILENCE_WINDOWS - 1, 1) for i in range(SILENCE_WINDOWS)})
+        for offset in offsets:
+            decoded = subprocess.run(
+                [ffmpeg, "-loglevel", "error", "-ss", f"{offset:.3f}", "-t", str(SILENCE_WINDOW_SECONDS),
+                 "-i", path, "-ac", "1", "-ar", str(SILENCE_SAMPLE_RATE), "-f", "s16le", "-"],
+                capture_output=True
+            )
+            if decoded.returncode != 0 or len(decoded.stdout) < 2:
+                return False
+            pcm = np.frombuffer(decoded.stdout, dtype=np.int16, count=len(decoded.stdout) // 2).astype(np.float64)
+            rms = (float(np.dot(pcm, pcm)) / len(pcm)) ** 0.5
+            dbfs = 20 * np.log10(max(rms, 1.0) / 32768)
+            logger.debug("audio_level_measured", file=path, offset=offset, dbfs=float(dbfs))
+            if dbfs >= threshold_dbfs:
+                return False
+        return True
+    
     def _handle_audio_processing_request(self, message: Message) -> None:
         """Handle an audio processing request message."""
         if not self.running:
@@ -269,9 +394,7 @@ class AudioProcessor:
         
         try:
             # Load transcript
-            with open(transcript_path, 'r') as f:
-                transcript_data = json.load(f)
-                transcript = Transcript.from_dict(transcript_data)
+            transcript = Transcript.load(transcript_path)
             
             # Process audio
             processed_file = self.remove_ads(file_path, output_path, transcript)
@@ -280,8 +403,6 @@ class AudioProcessor:
             with self.file_lock:
                 self.processed_files.add(file_path)
                 self.files_in_process.remove(file_path)
-                # Save to disk when a new file is processed
-                self._save_processed_files()
             
             self.message_broker.publish(Message(
                 topic=Topics.AUDIO_PROCESSING_COMPLETE,
@@ -314,6 +435,4 @@ class AudioProcessor:
     def stop(self) -> None:
         """Stop the audio processor service."""
         self.running = False
-        # Save processed files when stopping the service
-        self._save_processed_files()
         logger.info("audio_processor_stopped") 
\ No newline at end of file
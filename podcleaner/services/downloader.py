@@ -1,23 +1,145 @@
 """Service for downloading podcast audio files."""
 
+import io
 import os
 import hashlib
-import json
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Optional, Set, Dict
+from xml.etree import ElementTree
 import requests
 import feedparser
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from ..logging import get_logger
 from ..config import AudioConfig, Config
+from ..state import open_path_set
 from .message_broker import Message, MessageBroker, Topics
 from .object_storage import ObjectStorage, ObjectStorageError
 
 logger = get_logger(__name__)
 
+# Bytes read from the network per write when downloading episodes
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Timeout in seconds for connecting to and reading from podcast hosts
+DOWNLOAD_TIMEOUT = 30
+
+# Connections kept open per host, enough for every download worker
+DOWNLOAD_POOL_SIZE = 32
+
+# Retries for failed connections and transient server errors, with exponential backoff
+DOWNLOAD_RETRY = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+
 class DownloadError(Exception):
     """Raised when podcast download fails."""
     pass
 
+def entry_audio_url(entry) -> Optional[str]:
+    """Find the audio enclosure URL of a feed entry."""
+    # feedparser collects enclosures, so check those first
+    for enclosure in entry.get("enclosures") or ():
+        if enclosure.get("type", "").startswith("audio/"):
+            return enclosure.get("href") or enclosure.get("url")
+    # Fall back to scanning links for feeds whose enclosures weren't collected
+    for link in entry.get("links") or ():
+        if link.get("rel") == "enclosure" and link.get("type", "").startswith("audio/"):
+            return link.get("href")
+    return None
+
+@lru_cache(maxsize=4096)
+def _storage_key(url: str) -> str:
+    """Storage key for a podcast URL; cached since feeds and requests see the same URLs repeatedly."""
+    # MD5 only names the object; keeping it keeps existing storage keys valid
+    return f"podcasts/{hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()}"
+
+def parse_rss(content: bytes) -> Optional[dict]:
+    """
+    Extract podcast and episode information from an RSS 2.0 feed in one streaming pass.
+    
+    Only the fields the downloader uses are read, and each item is cleared once handled.
+    
+    Args:
+        content: The raw feed document.
+        
+    Returns:
+        Optional[dict]: Podcast information with its audio episodes, or None if the
+            document is not an RSS 2.0 feed.
+    """
+    episodes = []
+    channel = None
+    for _, element in ElementTree.iterparse(io.BytesIO(content), events=("end",)):
+        if element.tag == "item":
+            enclosure = element.find("enclosure")
+            if enclosure is not None and enclosure.get("type", "").startswith("audio/") and enclosure.get("url"):
+                episodes.append({
+                    "title": element.findtext("title", ""),
+                    "description": element.findtext("description", ""),
+                    "published": element.findtext("pubDate", ""),
+                    "audio_url": enclosure.get("url")
+                })
+            element.clear()
+        elif element.tag == "channel":
+            channel = element
+    if channel is None:
+        return None
+    return {
+        "title": channel.findtext("title", ""),
+        "description": channel.findtext("description", ""),
+        "link": channel.findtext("link", ""),
+        "episodes": episodes
+    }
+
+def _parse_feed_fallback(content: bytes, rss_url: str) -> dict:
+    """Extract podcast information with feedparser, for Atom and malformed feeds."""
+    feed = feedparser.parse(content)
+    
+    if feed.bozo:
+        logger.warning("rss_parse_warning", url=rss_url, error=str(feed.bozo_exception))
+    
+    podcast_info = {
+        "title": feed.feed.get("title", ""),
+        "description": feed.feed.get("description", ""),
+        "link": feed.feed.get("link", ""),
+        "episodes": []
+    }
+    
+    for entry in feed.entries:
+        episode = {
+            "title": entry.get("title", ""),
+            "description": entry.get("description", ""),
+            "published": entry.get("published", ""),
+            "audio_url": entry_audio_url(entry)
+        }
+        
+        if episode["audio_url"]:
+            podcast_info["episodes"].append(episode)
+    return podcast_info
+
+def parse_feed(content: bytes, rss_url: str) -> dict:
+    """
+    Extract podcast and episode information from a feed document.
+    
+    RSS 2.0 feeds are read in one streaming pass; anything else goes through feedparser.
+    
+    Args:
+        content: The raw feed document.
+        rss_url: The URL the feed was fetched from, for logging.
+        
+    Returns:
+        dict: Information about the podcast feed and its audio episodes.
+    """
+    try:
+        podcast_info = parse_rss(content)
+    except SyntaxError as e:
+        # ParseError is a SyntaxError subclass; feedparser copes with broken feeds
+        logger.warning("rss_stream_parse_failed", url=rss_url, error=str(e))
+        podcast_info = None
+    if podcast_info is None:
+        podcast_info = _parse_feed_fallback(content, rss_url)
+    return podcast_info
+
 class PodcastDownloader:
     """Service for downloading podcast audio files."""
     
@@ -36,19 +158,27 @@ class PodcastDownloader:
             os.makedirs(self.download_dir, exist_ok=True)
         
         # Track files being processed and already processed
-        self.files_in_process = set()
-        self.processed_files = set()
-        self.rss_feeds_processed = set()
-        self.file_lock = threading.Lock()  # Lock for thread-safe access
-        
-        # File to persist processed files
         self.debug_dir = "debug_output"
         os.makedirs(self.debug_dir, exist_ok=True)
-        self.processed_files_path = os.path.join(self.debug_dir, "downloader_processed_files.json")
-        self.rss_feeds_path = os.path.join(self.debug_dir, "downloader_processed_rss.json")
+        self.files_in_process = set()
+        # Processed URLs and feeds persist across restarts, picking up the former JSON lists once
+        self.processed_files = open_path_set(
+            self.debug_dir, "downloader_processed",
+            legacy_json_path=os.path.join(self.debug_dir, "downloader_processed_files.json")
+        )
+        self.rss_feeds_processed = open_path_set(
+            self.debug_dir, "downloader_processed_rss",
+            legacy_json_path=os.path.join(self.debug_dir, "downloader_processed_rss.json")
+        )
+        self.file_lock = threading.Lock()  # Lock for thread-safe access
+        self._pool = None  # Download worker threads, started when download_concurrency > 1
         
-        # Load processed files from disk if available
-        self._load_processed_data()
+        # Shared HTTP session so episodes from the same host reuse connections
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=DOWNLOAD_POOL_SIZE, pool_maxsize=DOWNLOAD_POOL_SIZE,
+                              max_retries=DOWNLOAD_RETRY)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
         
         # Subscribe to download requests
         self.message_broker.subscribe(
@@ -62,57 +192,9 @@ class PodcastDownloader:
             self._handle_rss_download_request
         )
     
-    def _load_processed_data(self):
-        """Load the list of processed files and RSS feeds from disk."""
-        try:
-            if os.path.exists(self.processed_files_path):
-                with open(self.processed_files_path, 'r') as f:
-                    files_list = json.load(f)
-                    self.processed_files = set(files_list)
-                    logger.info("loaded_processed_files", count=len(self.processed_files))
-        except Exception as e:
-            logger.error("failed_to_load_processed_files", error=str(e))
-            # Initialize with empty set if loading fails
-            self.processed_files = set()
-            
-        try:
-            if os.path.exists(self.rss_feeds_path):
-                with open(self.rss_feeds_path, 'r') as f:
-                    rss_list = json.load(f)
-                    self.rss_feeds_processed = set(rss_list)
-                    logger.info("loaded_processed_rss_feeds", count=len(self.rss_feeds_processed))
-        except Exception as e:
-            logger.error("failed_to_load_processed_rss", error=str(e))
-            # Initialize with empty set if loading fails
-            self.rss_feeds_processed = set()
-    
-    def _save_processed_data(self):
-        """Save the list of processed files and RSS feeds to disk."""
-        try:
-            with open(self.processed_files_path, 'w') as f:
-                json.dump(list(self.processed_files), f)
-            logger.debug("saved_processed_files", count=len(self.processed_files))
-        except Exception as e:
-            logger.error("failed_to_save_processed_files", error=str(e))
-            
-        try:
-            with open(self.rss_feeds_path, 'w') as f:
-                json.dump(list(self.rss_feeds_processed), f)
-            logger.debug("saved_processed_rss_feeds", count=len(self.rss_feeds_processed))
-        except Exception as e:
-            logger.error("failed_to_save_processed_rss", error=str(e))
-    
     def _generate_file_path(self, url: str) -> str:
         """Generate a unique file path for the podcast URL."""
-        hash_key = hashlib.md5(url.encode()).hexdigest()
-        
-        # Generate a storage key for the object
-        storage_key = f"podcasts/{hash_key}"
-        
-        # For backward compatibility, also return a local path
-        local_path = os.path.join(self.download_dir, hash_key)
-        
-        return storage_key
+        return _storage_key(url)
     
     def download(self, url: str) -> str:
         """
@@ -136,15 +218,23 @@ class PodcastDownloader:
         
         try:
             logger.info("downloading_podcast", url=url)
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
+            response = self.http.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT)
             
             # Create a temporary file to download to
-            temp_file_path = os.path.join(self.debug_dir, f"temp_{hashlib.md5(url.encode()).hexdigest()}")
+            temp_file_path = os.path.join(self.debug_dir, f"temp_{os.path.basename(storage_key)}")
             
-            with open(temp_file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            try:
+                response.raise_for_status()
+                with open(temp_file_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+            except BaseException:
+                # Don't leave a partial download behind
+                if os.path.exists(temp_file_path):
+                    os.remove(temp_file_path)
+                raise
+            finally:
+                response.close()
             
             # Upload to object storage
             try:
@@ -160,7 +250,6 @@ class PodcastDownloader:
             # Add to processed files
             with self.file_lock:
                 self.processed_files.add(url)
-                self._save_processed_data()
                 
             logger.info("download_complete", path=storage_key)
             return storage_key
@@ -187,39 +276,14 @@ class PodcastDownloader:
         """
         try:
             logger.info("downloading_rss", url=rss_url)
-            feed = feedparser.parse(rss_url)
-            
-            if feed.bozo:
-                logger.warning("rss_parse_warning", url=rss_url, error=str(feed.bozo_exception))
-            
-            podcast_info = {
-                "title": feed.feed.get("title", ""),
-                "description": feed.feed.get("description", ""),
-                "link": feed.feed.get("link", ""),
-                "episodes": []
-            }
+            response = self.http.get(rss_url, timeout=DOWNLOAD_TIMEOUT)
+            response.raise_for_status()
             
-            for entry in feed.entries:
-                episode = {
-                    "title": entry.get("title", ""),
-                    "description": entry.get("description", ""),
-                    "published": entry.get("published", ""),
-                    "audio_url": None
-                }
-                
-                # Extract the audio URL
-                for link in entry.get("links", []):
-                    if link.get("rel") == "enclosure" and link.get("type", "").startswith("audio/"):
-                        episode["audio_url"] = link.get("href")
-                        break
-                
-                if episode["audio_url"]:
-                    podcast_info["episodes"].append(episode)
+            podcast_info = parse_feed(response.content, rss_url)
             
             # Add to processed RSS feeds
             with self.file_lock:
                 self.rss_feeds_processed.add(rss_url)
-                self._save_processed_data()
                 
             logger.info("rss_download_complete", url=rss_url, episodes=len(podcast_info["episodes"]))
             return podcast_info
@@ -248,9 +312,9 @@ class PodcastDownloader:
         
         # Check if URL is already processed or in process
         with self.file_lock:
-            if url in self.processed_files and self.object_storage.exists(self._generate_file_path(url)):
+            storage_key = self._generate_file_path(url)
+            if url in self.processed_files and self.object_storage.exists(storage_key):
                 logger.info("file_already_downloaded", url=url)
-                storage_key = self._generate_file_path(url)
                 self.message_broker.publish(Message(
                     topic=Topics.DOWNLOAD_COMPLETE,
                     data={
@@ -277,6 +341,14 @@ class PodcastDownloader:
             # Mark as in process
             self.files_in_process.add(url)
         
+        if self._pool is not None:
+            # Free the broker's callback thread so other episodes download concurrently
+            self._pool.submit(self._download_and_report, url, correlation_id)
+        else:
+            self._download_and_report(url, correlation_id)
+    
+    def _download_and_report(self, url: str, correlation_id: Optional[str]) -> None:
+        """Download an episode marked as in process and publish the outcome."""
         try:
             storage_key = self.download(url)
             
@@ -393,11 +465,17 @@ class PodcastDownloader:
     def start(self) -> None:
         """Start the downloader service."""
         self.running = True
-        logger.info("downloader_started")
+        if self.audio_config.download_concurrency > 1:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.audio_config.download_concurrency,
+                thread_name_prefix="downloader"
+            )
+        logger.info("downloader_started", download_concurrency=self.audio_config.download_concurrency)
     
     def stop(self) -> None:
         """Stop the downloader service."""
         self.running = False
-        # Save processed files when stopping the service
-        self._save_processed_data()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
         logger.info("downloader_stopped") 
\ No newline at end of file
@@ -3,24 +3,20 @@
 import json
 import uuid
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
 from typing import Any, Callable, Dict, List, Optional
 from ..logging import get_logger
+from ..jsonutil import dumps, loads
 
 logger = get_logger(__name__)
 
+@dataclass(slots=True, frozen=True)
 class Message:
-    """A message that can be sent through the message broker."""
-    
-    def __init__(self, 
-                 topic: str, 
-                 data: Any, 
-                 message_id: Optional[str] = None,
-                 correlation_id: Optional[str] = None):
-        """Initialize a message with topic and data."""
-        self.topic = topic
-        self.data = data
-        self.message_id = message_id or str(uuid.uuid4())
-        self.correlation_id = correlation_id
+    """A message that can be sent through the message broker; immutable, so handlers can share it across threads."""
+    topic: str
+    data: Any
+    message_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    correlation_id: Optional[str] = None
     
     def to_dict(self) -> dict:
         """Convert message to dictionary format."""
@@ -37,7 +33,7 @@ class Message:
         return cls(
             topic=data["topic"],
             data=data["data"],
-            message_id=data["message_id"],
+            message_id=data["message_id"] or str(uuid.uuid4()),
             correlation_id=data["correlation_id"]
         )
 
@@ -153,7 +149,7 @@ class MQTTMessageBroker(MessageBroker):
     def _on_message(self, client, userdata, msg):
         """Callback for when a message is received."""
         try:
-            payload = json.loads(msg.payload.decode())
+            payload = loads(msg.payload)
             message = Message.from_dict(payload)
             
             logger.debug("mqtt_message_received", topic=msg.topic, message_id=message.message_id)
@@ -190,7 +186,7 @@ class MQTTMessageBroker(MessageBroker):
             return
         
         try:
-            payload = json.dumps(message.to_dict())
+            payload = dumps(message.to_dict())
             self.client.publish(message.topic, payload)
             logger.debug("mqtt_message_published", topic=message.topic, message_id=message.message_id)
         except Exception as e:
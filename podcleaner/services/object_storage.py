@@ -53,6 +53,40 @@ class ObjectStorageAdapter(abc.ABC):
         """
         pass
     
+    @abc.abstractmethod
+    def open_stream(self, key: str, offset: int = 0, length: Optional[int] = None) -> BinaryIO:
+        """
+        Open an object for streaming reads.
+        
+        Args:
+            key: Storage key (path) of the object to read
+            offset: Byte offset to start reading at
+            length: Maximum number of bytes the caller will read; None for the rest
+            
+        Returns:
+            BinaryIO: A readable binary stream; the caller must close it
+            
+        Raises:
+            ObjectStorageError: If the object cannot be opened
+        """
+        pass
+    
+    @abc.abstractmethod
+    def stat(self, key: str) -> Dict[str, Any]:
+        """
+        Get the metadata of an object without reading it.
+        
+        Args:
+            key: Storage key (path) of the object
+            
+        Returns:
+            Dict[str, Any]: Object metadata with 'key', 'size' and 'last_modified'
+            
+        Raises:
+            ObjectStorageError: If the object does not exist or cannot be read
+        """
+        pass
+    
     @abc.abstractmethod
     def list_objects(self, prefix: str = "") -> List[Dict[str, Any]]:
         """
@@ -139,8 +173,10 @@ class LocalStorageAdapter(ObjectStorageAdapter):
             destination = self._get_file_path(key)
             
             if isinstance(source, str) and os.path.exists(source):
-                # Source is a file path
-                shutil.copy2(source, destination)
+                # Source is a file path; copy then rename so a partial copy is never visible
+                partial = f"{destination}.part"
+                shutil.copy2(source, partial)
+                os.replace(partial, destination)
             elif isinstance(source, bytes):
                 # Source is bytes data
                 with open(destination, 'wb') as f:
@@ -182,6 +218,26 @@ class LocalStorageAdapter(ObjectStorageAdapter):
             logger.error("download_failed", key=key, error=str(e))
             raise ObjectStorageError(f"Failed to download {key}: {str(e)}")
     
+    def open_stream(self, key: str, offset: int = 0, length: Optional[int] = None) -> BinaryIO:
+        """Open a file in local storage for streaming reads."""
+        try:
+            stream = open(self._get_file_path(key), 'rb')
+            if offset:
+                stream.seek(offset)
+            return stream
+        except Exception as e:
+            logger.error("open_stream_failed", key=key, error=str(e))
+            raise ObjectStorageError(f"Failed to open {key}: {str(e)}")
+    
+    def stat(self, key: str) -> Dict[str, Any]:
+        """Get the size and modification time of a file in local storage."""
+        try:
+            st = os.stat(self._get_file_path(key))
+            return {'key': key, 'size': st.st_size, 'last_modified': st.st_mtime}
+        except Exception as e:
+            logger.error("stat_failed", key=key, error=str(e))
+            raise ObjectStorageError(f"Failed to stat {key}: {str(e)}")
+    
     def list_objects(self, prefix: str = "") -> List[Dict[str, Any]]:
         """List files in local storage with the given prefix."""
         try:
@@ -357,6 +413,34 @@ class S3StorageAdapter(ObjectStorageAdapter):
             logger.error("download_failed", key=key, bucket=self.bucket_name, error=str(e))
             raise ObjectStorageError(f"Failed to download {key}: {str(e)}")
     
+    def open_stream(self, key: str, offset: int = 0, length: Optional[int] = None) -> BinaryIO:
+        """Open an S3 object body for streaming reads, fetching only the requested range."""
+        try:
+            key = key.lstrip('/')
+            params = {'Bucket': self.bucket_name, 'Key': key}
+            if offset or length is not None:
+                end = "" if length is None else offset + length - 1
+                params['Range'] = f"bytes={offset}-{end}"
+            response = self.s3_client.get_object(**params)
+            return response['Body']
+        except Exception as e:
+            logger.error("open_stream_failed", key=key, bucket=self.bucket_name, error=str(e))
+            raise ObjectStorageError(f"Failed to open {key}: {str(e)}")
+    
+    def stat(self, key: str) -> Dict[str, Any]:
+        """Get the size and modification time of an S3 object."""
+        try:
+            key = key.lstrip('/')
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+            return {
+                'key': key,
+                'size': response['ContentLength'],
+                'last_modified': response['LastModified'].timestamp()
+            }
+        except Exception as e:
+            logger.error("stat_failed", key=key, bucket=self.bucket_name, error=str(e))
+            raise ObjectStorageError(f"Failed to stat {key}: {str(e)}")
+    
     def list_objects(self, prefix: str = "") -> List[Dict[str, Any]]:
         """List objects in S3 with the given prefix."""
         try:
@@ -453,6 +537,14 @@ class ObjectStorage:
         """Download an object from storage."""
         return self.adapter.download(key, destination)
     
+    def open_stream(self, key: str, offset: int = 0, length: Optional[int] = None) -> BinaryIO:
+        """Open an object for streaming reads."""
+        return self.adapter.open_stream(key, offset, length)
+    
+    def stat(self, key: str) -> Dict[str, Any]:
+        """Get the metadata of an object without reading it."""
+        return self.adapter.stat(key)
+    
     def list_objects(self, prefix: str = "") -> List[Dict[str, Any]]:
         """List objects in storage with the given prefix."""
         return self.adapter.list_objects(prefix)
@@ -1,8 +1,13 @@
 """Service for transcribing audio files to text."""
 
 import os
-import json
+import hashlib
+import mmap
+import multiprocessing
+import platform
 import threading
+import time
+from operator import itemgetter
 from typing import List, Optional, Set
 
 # Import whisper with proper error handling
@@ -12,40 +17,125 @@ except ImportError as e:
     whisper = None
     whisper_import_error = str(e)
 
+try:
+    import torch
+except ImportError:
+    torch = None
+
+try:
+    from pywhispercpp.model import Model as WhisperCppModel
+except ImportError:
+    WhisperCppModel = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from ..logging import get_logger
-from ..models import Segment, Transcript
+from ..state import open_path_set
+from ..models import COMPRESSED_TRANSCRIPT_EXTENSION, PACKED_TRANSCRIPT_EXTENSION, Segment, Transcript
+from .audio_processor import AudioProcessor
 from .message_broker import Message, MessageBroker, Topics
 
 logger = get_logger(__name__)
 
+# Number of lock stripes guarding per-file state (must be a power of two)
+LOCK_STRIPES = 64
+
+# Supported transcription backends
+BACKENDS = ("whisper", "whisper.cpp")
+
+# Quantization of the ggml weights used by the whisper.cpp backend
+WHISPER_CPP_QUANTIZATION = "q5_1"
+
+# Default location of the transcript cache shared across paths and runs
+SHARED_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "podcleaner", "transcripts")
+
+# Bytes hashed from each end of an audio file to build its shared cache key
+CACHE_KEY_SAMPLE_SIZE = 1 << 20
+
+# Size above which the least recently used shared cache entries are evicted
+SHARED_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+def _default_device() -> str:
+    """Pick the device to run whisper on, preferring CUDA when available."""
+    if torch is not None and torch.cuda.is_available():
+        return "cuda"
+    return "cpu"
+
+def _default_backend() -> str:
+    """Pick the transcription backend, preferring whisper.cpp on ARM hosts."""
+    if WhisperCppModel is not None and platform.machine().lower() in ("arm64", "aarch64"):
+        return "whisper.cpp"
+    return "whisper"
+
 class TranscriptionError(Exception):
     """Raised when transcription fails."""
     pass
 
+# Transcriber owned by a pool worker process, created by _init_worker
+_worker_transcriber = None
+
+def _init_worker(model_name: str, device: str, cache_format: str, backend: str,
+                 shared_cache_dir: Optional[str] = None) -> None:
+    """Load and warm up the model once per worker process."""
+    global _worker_transcriber
+    _worker_transcriber = Transcriber(model_name=model_name, device=device,
+                                      cache_format=cache_format, backend=backend,
+                                      shared_cache_dir=shared_cache_dir)
+    _worker_transcriber._warm_up_model()
+
+def _worker_transcribe(file_path: str) -> str:
+    """Transcribe a file in a worker process and return the cached transcript path."""
+    _worker_transcriber.transcribe(file_path)
+    return _worker_transcriber._transcript_path(file_path)
+
 class Transcriber:
     """Service for transcribing audio files to text."""
     
     def __init__(self, 
                  message_broker: Optional[MessageBroker] = None, 
-                 model_name: str = "base"):
-        """Initialize the transcriber with the specified model and message broker."""
+                 model_name: str = "base",
+                 device: Optional[str] = None,
+                 cache_format: str = "json",
+                 backend: Optional[str] = None,
+                 num_workers: int = 1,
+                 shared_cache_dir: Optional[str] = None):
+        """
+        Initialize the transcriber with the specified model and message broker.
+        
+        shared_cache_dir enables a transcript cache keyed by audio content and model
+        (e.g. SHARED_CACHE_DIR), so re-downloaded or moved files skip transcription.
+        """
         self.model_name = model_name
+        self.device = device or _default_device()
+        self.backend = backend or _default_backend()
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unsupported transcription backend: {self.backend}")
+        self.num_workers = num_workers
+        self._pool = None  # Worker process pool, started when num_workers > 1
+        if cache_format not in ("json", "msgpack", "zstd"):
+            raise ValueError(f"Unsupported transcript cache format: {cache_format}")
+        self.cache_format = cache_format
+        self.shared_cache_dir = shared_cache_dir
         self._model = None
+        self._model_lock = threading.Lock()  # Held while the model loads, so it is only loaded once
+        self._warm_up_thread = None
         self.message_broker = message_broker
         self.running = False
         
         # Track files being processed and already processed
-        self.files_in_process = set()
-        self.processed_files = set()
-        self.file_lock = threading.Lock()  # Lock for thread-safe access
-        
-        # File to persist processed files
         self.debug_dir = "debug_output"
         os.makedirs(self.debug_dir, exist_ok=True)
-        self.processed_files_path = os.path.join(self.debug_dir, "transcriber_processed_files.json")
-        
-        # Load processed files from disk if available
-        self._load_processed_files()
+        self.files_in_process = set()
+        # Processed files persist across restarts, picking up the former JSON list once
+        self.processed_files = open_path_set(
+            self.debug_dir, "transcriber_processed",
+            legacy_json_path=os.path.join(self.debug_dir, "transcriber_processed_files.json")
+        )
+        # Striped locks keyed by file path so requests for different files don't contend
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
         
         # Subscribe to transcription requests if message broker is provided
         if self.message_broker:
@@ -54,66 +144,174 @@ class Transcriber:
                 self._handle_transcription_request
             )
     
-    def _load_processed_files(self):
-        """Load the list of processed files from disk."""
+    def _lock_for(self, file_path: str) -> threading.Lock:
+        """Get the lock stripe guarding the state of the given file."""
+        return self._locks[hash(file_path) & (LOCK_STRIPES - 1)]
+    
+    @property
+    def model(self):
+        """Lazy load the whisper model, waiting for a warm-up in progress."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+    
+    def _load_model(self):
+        """Load the model for the configured backend."""
+        logger.info("loading_model", model=self.model_name, device=self.device, backend=self.backend)
+        
+        if self.backend == "whisper.cpp":
+            return self._load_whisper_cpp_model()
+        
+        # Check if whisper module is properly imported
+        if whisper is None:
+            error_msg = f"Failed to import whisper module: {whisper_import_error}"
+            logger.error("whisper_import_error", error=error_msg)
+            raise ImportError(error_msg)
+        
+        # Check if whisper has the load_model attribute
+        if not hasattr(whisper, 'load_model'):
+            error_msg = "module 'whisper' has no attribute 'load_model'"
+            logger.error("whisper_attribute_error", error=error_msg)
+            raise AttributeError(error_msg)
+        
         try:
-            if os.path.exists(self.processed_files_path):
-                with open(self.processed_files_path, 'r') as f:
-                    files_list = json.load(f)
-                    self.processed_files = set(files_list)
-                    logger.info("loaded_processed_files", count=len(self.processed_files))
+            if self.device == "cuda":
+                # Keep the weights in half precision on the GPU
+                return whisper.load_model(self.model_name, device=self.device).half()
+            return whisper.load_model(self.model_name)
         except Exception as e:
-            logger.error("failed_to_load_processed_files", error=str(e))
-            # Initialize with empty set if loading fails
-            self.processed_files = set()
+            logger.error("model_loading_failed", model=self.model_name, error=str(e))
+            raise
     
-    def _save_processed_files(self):
-        """Save the list of processed files to disk."""
+    def _load_whisper_cpp_model(self):
+        """Load quantized ggml weights through the whisper.cpp bindings."""
+        if WhisperCppModel is None:
+            error_msg = "whisper.cpp backend requires the pywhispercpp package"
+            logger.error("whisper_import_error", error=error_msg)
+            raise ImportError(error_msg)
+        
+        models_dir = os.path.join(self.debug_dir, "models")
+        os.makedirs(models_dir, exist_ok=True)
         try:
-            with open(self.processed_files_path, 'w') as f:
-                json.dump(list(self.processed_files), f)
-            logger.debug("saved_processed_files", count=len(self.processed_files))
+            return WhisperCppModel(f"{self.model_name}-{WHISPER_CPP_QUANTIZATION}", models_dir=models_dir)
         except Exception as e:
-            logger.error("failed_to_save_processed_files", error=str(e))
+            logger.error("model_loading_failed", model=self.model_name, error=str(e))
+            raise
     
-    @property
-    def model(self):
-        """Lazy load the whisper model."""
-        if self._model is None:
-            logger.info("loading_model", model=self.model_name)
-            
-            # Check if whisper module is properly imported
-            if whisper is None:
-                error_msg = f"Failed to import whisper module: {whisper_import_error}"
-                logger.error("whisper_import_error", error=error_msg)
-                raise ImportError(error_msg)
-            
-            # Check if whisper has the load_model attribute
-            if not hasattr(whisper, 'load_model'):
-                error_msg = "module 'whisper' has no attribute 'load_model'"
-                logger.error("whisper_attribute_error", error=error_msg)
-                raise AttributeError(error_msg)
-            
-            try:
-                self._model = whisper.load_model(self.model_name)
-            except Exception as e:
-                logger.error("model_loading_failed", model=self.model_name, error=str(e))
-                raise
-                
-        return self._model
+    def _transcribe_options(self) -> dict:
+        """Get the decoding options for the configured backend and device."""
+        if self.backend == "whisper.cpp":
+            return {"n_threads": os.cpu_count()}
+        if self.device == "cuda":
+            return {"fp16": True}
+        return {}
     
     def _convert_whisper_segments(self, result: dict) -> List[Segment]:
         """Convert whisper segments to our Segment model."""
-        segments = []
-        for i, seg in enumerate(result["segments"]):
-            segments.append(Segment(
-                id=i,
-                text=seg["text"].strip(),
-                start=seg["start"],
-                end=seg["end"],
-                is_ad=False
-            ))
-        return segments
+        fields = itemgetter("text", "start", "end")
+        return [
+            Segment(id=i, text=text.strip(), start=start, end=end, is_ad=False)
+            for i, (text, start, end) in enumerate(map(fields, result["segments"]))
+        ]
+    
+    def _convert_whisper_cpp_segments(self, result: list) -> List[Segment]:
+        """Convert whisper.cpp segments (timestamps in centiseconds) to our Segment model."""
+        return [
+            Segment(id=i, text=segment.text.strip(), start=segment.t0 / 100, end=segment.t1 / 100, is_ad=False)
+            for i, segment in enumerate(result)
+        ]
+    
+    def _transcript_path(self, audio_file: str) -> str:
+        """Get the path of the cached transcript for an audio file."""
+        if self.cache_format == "msgpack":
+            return f"{audio_file}.transcript{PACKED_TRANSCRIPT_EXTENSION}"
+        if self.cache_format == "zstd":
+            return f"{audio_file}.transcript.json{COMPRESSED_TRANSCRIPT_EXTENSION}"
+        return f"{audio_file}.transcript.json"
+    
+    def _cached_transcript_path(self, audio_file: str) -> Optional[str]:
+        """Find a fresh cached transcript, falling back to a legacy plain JSON one."""
+        transcript_file = self._transcript_path(audio_file)
+        if self._cache_is_fresh(audio_file, transcript_file):
+            return transcript_file
+        legacy_file = f"{audio_file}.transcript.json"
+        if legacy_file != transcript_file and self._cache_is_fresh(audio_file, legacy_file):
+            return legacy_file
+        return None
+    
+    def _cache_is_fresh(self, audio_file: str, transcript_file: str) -> bool:
+        """Check that a cached transcript exists, is non-empty and is newer than its audio."""
+        try:
+            transcript_stat = os.stat(transcript_file)
+            audio_stat = os.stat(audio_file)
+        except FileNotFoundError:
+            return False
+        return transcript_stat.st_size > 0 and transcript_stat.st_mtime >= audio_stat.st_mtime
+    
+    def _shared_cache_path(self, audio_file: str) -> Optional[str]:
+        """Get the shared cache path for an audio file, keyed by its content and the model."""
+        if not self.shared_cache_dir:
+            return None
+        try:
+            digest = hashlib.blake2b(digest_size=16)
+            with open(audio_file, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size:
+                    # Hash both ends straight from the page cache, so files sharing
+                    # an intro or outro get distinct keys without copying the samples
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+                        digest.update(view[:CACHE_KEY_SAMPLE_SIZE])
+                        if size > 2 * CACHE_KEY_SAMPLE_SIZE:
+                            digest.update(view[-CACHE_KEY_SAMPLE_SIZE:])
+        except OSError as e:
+            logger.warning("shared_cache_key_failed", file=audio_file, error=str(e))
+            return None
+        digest.update(f"{size}:{self.backend}:{self.model_name}".encode())
+        return os.path.join(self.shared_cache_dir, f"{digest.hexdigest()}.transcript.json")
+    
+    def _load_shared_cache(self, shared_file: str) -> Optional[Transcript]:
+        """Load a transcript from the shared cache, marking it recently used."""
+        try:
+            transcript = Transcript.load(shared_file)
+            os.utime(shared_file)
+            return transcript
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("shared_cache_load_failed", file=shared_file, error=str(e))
+            return None
+    
+    def _store_shared_cache(self, shared_file: str, transcript: Transcript) -> None:
+        """Add a transcript to the shared cache and evict old entries."""
+        try:
+            os.makedirs(self.shared_cache_dir, exist_ok=True)
+            transcript.save(shared_file)
+            self._prune_shared_cache()
+        except OSError as e:
+            logger.warning("shared_cache_store_failed", file=shared_file, error=str(e))
+    
+    def _prune_shared_cache(self) -> None:
+        """Evict least recently used shared cache entries beyond SHARED_CACHE_MAX_BYTES."""
+        entries = []
+        total = 0
+        with os.scandir(self.shared_cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".transcript.json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        if total <= SHARED_CACHE_MAX_BYTES:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= SHARED_CACHE_MAX_BYTES:
+                break
     
     def transcribe(self, audio_file: str, cache: bool = True) -> Transcript:
         """
@@ -129,29 +327,50 @@ class Transcriber:
         Raises:
             TranscriptionError: If transcription fails.
         """
-        transcript_file = f"{audio_file}.transcript.json"
+        transcript_file = self._transcript_path(audio_file)
         
         # Check cache first
-        if cache and os.path.exists(transcript_file):
-            logger.info("loading_cached_transcript", file=transcript_file)
+        cached_file = self._cached_transcript_path(audio_file) if cache else None
+        if cached_file:
+            logger.info("loading_cached_transcript", file=cached_file)
             try:
-                with open(transcript_file, 'r') as f:
-                    data = json.load(f)
-                return Transcript.from_dict(data)
+                transcript = Transcript.load(cached_file)
+                if cached_file != transcript_file:
+                    # Rewrite legacy caches in the configured format so downstream services find them
+                    transcript.save(transcript_file)
+                return transcript
             except Exception as e:
                 logger.warning("cache_load_failed", error=str(e))
         
+        # Then the shared cache, which survives the file being moved or re-downloaded
+        shared_file = self._shared_cache_path(audio_file) if cache else None
+        if shared_file:
+            transcript = self._load_shared_cache(shared_file)
+            if transcript is not None:
+                logger.info("loading_shared_cached_transcript", file=shared_file)
+                transcript.save(transcript_file)
+                return transcript
+        
         try:
-            logger.info("transcribing_audio", file=audio_file)
-            result = self.model.transcribe(audio_file)
-            segments = self._convert_whisper_segments(result)
+            if AudioProcessor.is_mostly_silent(audio_file):
+                # Nothing to transcribe, so skip the model entirely
+                logger.info("skipping_silent_audio", file=audio_file)
+                segments = []
+            else:
+                logger.info("transcribing_audio", file=audio_file)
+                result = self.model.transcribe(audio_file, **self._transcribe_options())
+                if self.backend == "whisper.cpp":
+                    segments = self._convert_whisper_cpp_segments(result)
+                else:
+                    segments = self._convert_whisper_segments(result)
             transcript = Transcript(segments=segments)
             
             # Cache the result
             if cache:
                 logger.info("caching_transcript", file=transcript_file)
-                with open(transcript_file, 'w') as f:
-                    json.dump(transcript.to_dict(), f, indent=2)
+                transcript.save(transcript_file)
+                if shared_file:
+                    self._store_shared_cache(shared_file, transcript)
             
             return transcript
             
@@ -178,10 +397,10 @@ class Transcriber:
             return
         
         # Check if file is already processed or in process
-        with self.file_lock:
+        with self._lock_for(file_path):
             if file_path in self.processed_files:
                 logger.info("file_already_processed", file_path=file_path)
-                transcript_path = f"{file_path}.transcript.json"
+                transcript_path = self._transcript_path(file_path)
                 self.message_broker.publish(Message(
                     topic=Topics.TRANSCRIBE_COMPLETE,
                     data={
@@ -208,48 +427,104 @@ class Transcriber:
             # Mark file as in process
             self.files_in_process.add(file_path)
         
+        if self._pool is not None:
+            # Each worker holds its own model; bookkeeping stays in this process
+            self._pool.apply_async(
+                _worker_transcribe, (file_path,),
+                callback=lambda path: self._on_transcribed(file_path, path, correlation_id),
+                error_callback=lambda e: self._on_transcription_failed(file_path, e, correlation_id)
+            )
+            return
+        
         try:
-            transcript = self.transcribe(file_path)
-            transcript_path = f"{file_path}.transcript.json"
-            
-            # Mark file as processed and remove from in-process list
-            with self.file_lock:
-                self.processed_files.add(file_path)
-                self.files_in_process.remove(file_path)
-                # Save to disk when a new file is processed
-                self._save_processed_files()
-            
-            self.message_broker.publish(Message(
-                topic=Topics.TRANSCRIBE_COMPLETE,
-                data={
-                    "file_path": file_path,
-                    "transcript_path": transcript_path
-                },
-                correlation_id=correlation_id
-            ))
+            self.transcribe(file_path)
         except Exception as e:
-            # Remove file from in-process list on error
-            with self.file_lock:
-                self.files_in_process.remove(file_path)
-                
-            logger.error("transcription_request_failed", file=file_path, error=str(e))
-            self.message_broker.publish(Message(
-                topic=Topics.TRANSCRIBE_FAILED,
-                data={
-                    "file_path": file_path,
-                    "error": str(e)
-                },
-                correlation_id=correlation_id
-            ))
+            self._on_transcription_failed(file_path, e, correlation_id)
+        else:
+            self._on_transcribed(file_path, self._transcript_path(file_path), correlation_id)
+    
+    def _on_transcribed(self, file_path: str, transcript_path: str, correlation_id: Optional[str]) -> None:
+        """Record a finished transcription and publish its completion."""
+        # Mark file as processed (persisted immediately) and remove from in-process list
+        with self._lock_for(file_path):
+            self.processed_files.add(file_path)
+            self.files_in_process.remove(file_path)
+        
+        self.message_broker.publish(Message(
+            topic=Topics.TRANSCRIBE_COMPLETE,
+            data={
+                "file_path": file_path,
+                "transcript_path": transcript_path
+            },
+            correlation_id=correlation_id
+        ))
+    
+    def _on_transcription_failed(self, file_path: str, error: BaseException, correlation_id: Optional[str]) -> None:
+        """Release a failed file and publish the failure."""
+        # Remove file from in-process list on error
+        with self._lock_for(file_path):
+            self.files_in_process.remove(file_path)
+            
+        logger.error("transcription_request_failed", file=file_path, error=str(error))
+        self.message_broker.publish(Message(
+            topic=Topics.TRANSCRIBE_FAILED,
+            data={
+                "file_path": file_path,
+                "error": str(error)
+            },
+            correlation_id=correlation_id
+        ))
+    
+    def _warm_up_model(self) -> None:
+        """
+        Load the model and run a second of silence through it.
+        
+        This moves the model load and the first-call kernel setup out of the
+        request path. The model lock is held throughout, so requests arriving
+        meanwhile wait for the warmed model. Failures are logged and the model
+        is loaded lazily instead.
+        """
+        start_time = time.monotonic()
+        with self._model_lock:
+            if self._model is not None:
+                return
+            try:
+                model = self._load_model()
+            except Exception as e:
+                logger.warning("model_warm_up_failed", model=self.model_name, error=str(e))
+                return
+            try:
+                if np is not None:
+                    model.transcribe(np.zeros(16000, dtype=np.float32), **self._transcribe_options())
+                logger.info("model_warmed", model=self.model_name, device=self.device,
+                            elapsed=round(time.monotonic() - start_time, 3))
+            except Exception as e:
+                logger.warning("model_warm_up_failed", model=self.model_name, error=str(e))
+            self._model = model
     
     def start(self) -> None:
         """Start the transcriber service."""
+        if self.num_workers > 1:
+            # Spawn rather than fork so workers don't inherit broker threads or CUDA state
+            self._pool = multiprocessing.get_context("spawn").Pool(
+                self.num_workers,
+                initializer=_init_worker,
+                initargs=(self.model_name, self.device, self.cache_format, self.backend,
+                          self.shared_cache_dir)
+            )
+        else:
+            # Warm up in the background so start() doesn't block on the model load
+            self._warm_up_thread = threading.Thread(target=self._warm_up_model, name="transcriber-warm-up",
+                                                    daemon=True)
+            self._warm_up_thread.start()
         self.running = True
-        logger.info("transcriber_started", model=self.model_name)
+        logger.info("transcriber_started", model=self.model_name, workers=self.num_workers)
     
     def stop(self) -> None:
         """Stop the transcriber service."""
         self.running = False
-        # Save processed files when stopping the service
-        self._save_processed_files()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
         logger.info("transcriber_stopped") 
\ No newline at end of file
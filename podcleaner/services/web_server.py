@@ -1,48 +1,220 @@
 """Web server for PodCleaner API."""
 
+import io
+import itertools
 import os
-import json
 import uuid
 import time
 import html
 import http.server
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import socketserver
 import threading
 import re
+import secrets
+import sys
 import urllib.parse
-from urllib.parse import urlparse, parse_qs
-import xml.etree.ElementTree as ET
-from typing import Dict, List, Optional, Tuple, Any
+from collections import OrderedDict
+from contextlib import closing
+from urllib.parse import urlparse, parse_qs, quote_plus
+from xml.sax.saxutils import escape, quoteattr
+from typing import Dict, Iterator, List, Optional, Tuple, Any
+import requests
 from ..logging import get_logger
+from ..jsonutil import dumps
 from ..config import Config
 from .message_broker import Message, MessageBroker, Topics
 from .object_storage import ObjectStorage, ObjectStorageError
-from ..services.downloader import PodcastDownloader
+from ..services.downloader import PodcastDownloader, parse_feed
 from ..config import AudioConfig
 
 logger = get_logger(__name__)
 
+# API paths, interned so route lookups can match on identity
+PROCESS_PATH = sys.intern("/process")
+RSS_PATH = sys.intern("/rss")
+STATUS_PATH = sys.intern("/status")
+DOWNLOAD_PATH_PREFIX = sys.intern("/download/")
+
+# Matches download paths and captures the file ID
+_DOWNLOAD_RE = re.compile(r"^/download/([^/?]+)$")
+
+# Body sent while a podcast is still being processed; it sounds like static or an
+# error to a podcast client, prompting it to check back later
+_PROCESSING_BODY = b"This podcast is being processed. Please try again later."
+_PROCESSING_BODY_LENGTH = str(len(_PROCESSING_BODY))
+
+# Content types served for known file extensions
+_CONTENT_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+}
+
+# Pipeline steps that hand the episode on to the next service:
+# completion topic -> (step name, fields forwarded, next request topic)
+_PIPELINE = {
+    Topics.DOWNLOAD_COMPLETE: ("download", ("file_path",), Topics.TRANSCRIBE_REQUEST),
+    Topics.TRANSCRIBE_COMPLETE: ("transcription", ("file_path", "transcript_path"), Topics.AD_DETECTION_REQUEST),
+    Topics.AD_DETECTION_COMPLETE: ("ad_detection", ("file_path", "transcript_path"), Topics.AUDIO_PROCESSING_REQUEST),
+}
+
+# Failure topic -> name of the step that failed
+_FAILED_STEPS = {
+    Topics.DOWNLOAD_FAILED: "download",
+    Topics.TRANSCRIBE_FAILED: "transcription",
+    Topics.AD_DETECTION_FAILED: "ad_detection",
+    Topics.AUDIO_PROCESSING_FAILED: "audio_processing",
+    Topics.RSS_DOWNLOAD_FAILED: "rss_download",
+}
+
+# How long feed validators (ETag/Last-Modified) are kept; longer than the cached
+# feed itself so an expired feed can be revalidated with a conditional GET
+RSS_VALIDATOR_TTL = 7 * 86400
+
+# Timeout in seconds for fetching RSS feeds
+RSS_FETCH_TIMEOUT = 30
+
+# Buffer size used when streaming files that can't be sent with sendfile
+STREAM_CHUNK_SIZE = 1 << 20
+
+# Matches a single byte range: "bytes=start-end", "bytes=start-" or "bytes=-suffix"
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def _parse_range(range_header: Optional[str], file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header into an inclusive byte range.
+    
+    Args:
+        range_header: The Range header value, if any.
+        file_size: Size of the file in bytes.
+        
+    Returns:
+        Optional[Tuple[int, int]]: The (start, end) range, or None to serve the whole file.
+        
+    Raises:
+        ValueError: If the range can't be satisfied.
+    """
+    if not range_header:
+        return None
+    match = _RANGE_RE.match(range_header.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        # Multiple or malformed ranges: fall back to the whole file
+        return None
+    
+    start, end = match.groups()
+    if not start:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(file_size - length, 0), file_size - 1
+    
+    start = int(start)
+    end = min(int(end), file_size - 1) if end else file_size - 1
+    if start >= file_size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+def _copy_stream(source, destination, length: int) -> None:
+    """Copy up to length bytes from source to destination in fixed-size chunks."""
+    while length > 0:
+        chunk = source.read(min(STREAM_CHUNK_SIZE, length))
+        if not chunk:
+            break
+        destination.write(chunk)
+        length -= len(chunk)
+
+class ExpiringDict(OrderedDict):
+    """
+    Dict bounded by size and age, evicting the oldest entries on write and
+    expired ones on read.
+    
+    Entries are kept in insertion order, so expired entries are always at the
+    front. Callers are responsible for locking, reads included.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        """Initialize an empty dict holding at most maxsize entries for ttl seconds."""
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._inserted_at: Dict[Any, float] = {}
+    
+    def __setitem__(self, key, value) -> None:
+        now = time.monotonic()
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        self._inserted_at[key] = now
+        self._evict(now)
+    
+    def __getitem__(self, key):
+        if self._expire(key):
+            raise KeyError(key)
+        return super().__getitem__(key)
+    
+    def get(self, key, default=None):
+        if self._expire(key):
+            return default
+        return super().get(key, default)
+    
+    def __contains__(self, key) -> bool:
+        return not self._expire(key) and super().__contains__(key)
+    
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        self._inserted_at.pop(key, None)
+    
+    def pop(self, key, *default):
+        self._inserted_at.pop(key, None)
+        return super().pop(key, *default)
+    
+    def clear(self) -> None:
+        super().clear()
+        self._inserted_at.clear()
+    
+    def _expire(self, key) -> bool:
+        """Evict expired entries if key is one of them, returning whether it was."""
+        inserted_at = self._inserted_at.get(key)
+        if inserted_at is None:
+            return False
+        now = time.monotonic()
+        if now - inserted_at <= self.ttl:
+            return False
+        # Everything in front of an expired entry is older, so this evicts it too
+        self._evict(now)
+        return True
+    
+    def _evict(self, now: float) -> None:
+        """Drop entries beyond maxsize and entries older than ttl."""
+        while self and (len(self) > self.maxsize
+                        or now - self._inserted_at[next(iter(self))] > self.ttl):
+            oldest = next(iter(self))
+            super().__delitem__(oldest)
+            del self._inserted_at[oldest]
+
 class RequestHandler(BaseHTTPRequestHandler):
     """HTTP request handler for PodCleaner API."""
     
     server_version = "PodCleaner/1.0"
     
+    # Exact-match routes mapped to the handler method taking the parsed query
+    _ROUTES = {
+        PROCESS_PATH: "_handle_process_request",
+        RSS_PATH: "_handle_rss_request",
+        STATUS_PATH: "_handle_status_request",
+    }
+    
     def do_GET(self):
         """Handle GET requests."""
         try:
             parsed_url = urlparse(self.path)
             path = parsed_url.path
-            query = parse_qs(parsed_url.query)
             
-            if path == "/process":
-                self._handle_process_request(query)
-            elif path == "/rss":
-                self._handle_rss_request(query)
-            elif path == "/status":
-                self._handle_status_request(query)
-            elif path.startswith("/download/"):
-                self._handle_download_request()
+            handler_name = self._ROUTES.get(path)
+            if handler_name:
+                getattr(self, handler_name)(parse_qs(parsed_url.query))
+            elif path.startswith(DOWNLOAD_PATH_PREFIX):
+                self._handle_download_request(path)
             else:
                 self.send_error(404, "Not Found")
         except BrokenPipeError:
@@ -68,7 +240,7 @@ class RequestHandler(BaseHTTPRequestHandler):
         server = self.server.web_server
         
         # Create request ID for tracking
-        request_id = str(uuid.uuid4())
+        request_id = server.next_request_id()
         
         # Check if this is a direct request for an MP3 file
         file_path = server.get_processed_file_path(url)
@@ -91,11 +263,11 @@ class RequestHandler(BaseHTTPRequestHandler):
         # Respond with a processing message (podcast clients will retry later)
         self.send_response(202)
         self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", _PROCESSING_BODY_LENGTH)
         self.end_headers()
         
-        # A message that sounds like static or an error to let the client know to check back
         try:
-            self.wfile.write(b"This podcast is being processed. Please try again later.")
+            self.wfile.write(_PROCESSING_BODY)
         except (BrokenPipeError, ConnectionResetError):
             # Client disconnected, log and return silently
             logger.info("client_disconnected_during_response", url=url)
@@ -114,15 +286,14 @@ class RequestHandler(BaseHTTPRequestHandler):
         # Check if we already have this RSS feed processed
         cached_podcast_info = server.get_cached_podcast_info(rss_url)
         if cached_podcast_info:
-            # Directly return the RSS feed
+            # Directly return the RSS XML rendered for the cached podcast info
+            rss_content = server.get_rss_xml(rss_url, cached_podcast_info, self._base_url())
             self.send_response(200)
             self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(rss_content)))
             self.end_headers()
-            
-            # Generate RSS XML from the cached podcast info
-            rss_content = server.generate_rss_xml(cached_podcast_info)
             try:
-                self.wfile.write(rss_content.encode('utf-8'))
+                self.wfile.write(rss_content)
             except (BrokenPipeError, ConnectionResetError):
                 # Client disconnected, log and return silently
                 logger.info("client_disconnected_during_rss_response", url=rss_url)
@@ -131,33 +302,20 @@ class RequestHandler(BaseHTTPRequestHandler):
         
         # If not cached, directly process and return the RSS feed
         try:
-            # Construct base URL for replacement
-            host = self.headers.get("Host", "localhost")
-            protocol = "https" if self.server.web_server.use_https else "http"
-            base_url = f"{protocol}://{host}"
-            
             # Directly download and process the RSS feed using our helper function
             podcast_info = self._directly_download_rss(rss_url)
             
-            # Replace episode URLs with our server URLs
-            for episode in podcast_info["episodes"]:
-                original_url = episode["audio_url"]
-                if original_url:
-                    episode["original_url"] = original_url
-                    episode["audio_url"] = f"{base_url}/process?url={original_url}"
-            
             # Cache the podcast info for future requests
-            server.processed_rss_feeds[rss_url] = podcast_info
+            server.cache_podcast_info(rss_url, podcast_info)
             
-            # Return the RSS feed
+            # Generate RSS XML from the podcast info, pointing episodes at our server
+            rss_content = server.get_rss_xml(rss_url, podcast_info, self._base_url())
             self.send_response(200)
             self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(rss_content)))
             self.end_headers()
-            
-            # Generate RSS XML from the podcast info
-            rss_content = server.generate_rss_xml(podcast_info)
             try:
-                self.wfile.write(rss_content.encode('utf-8'))
+                self.wfile.write(rss_content)
             except (BrokenPipeError, ConnectionResetError):
                 # Client disconnected, log and return silently
                 logger.info("client_disconnected_during_rss_response", url=rss_url)
@@ -167,6 +325,12 @@ class RequestHandler(BaseHTTPRequestHandler):
             logger.error("rss_processing_failed", url=rss_url, error=str(e))
             self.send_error(500, f"Failed to process RSS feed: {str(e)}")
     
+    def _base_url(self) -> str:
+        """Get the base URL clients used to reach this server."""
+        host = self.headers.get("Host", "localhost")
+        protocol = "https" if self.server.web_server.config.web_server.use_https else "http"
+        return f"{protocol}://{host}"
+    
     def _directly_download_rss(self, rss_url: str) -> dict:
         """
         Download an RSS feed directly without using the PodcastDownloader class.
@@ -180,37 +344,34 @@ class RequestHandler(BaseHTTPRequestHandler):
         Raises:
             Exception: If the RSS download fails.
         """
-        import feedparser
-        
-        logger.info("downloading_rss", url=rss_url)
-        feed = feedparser.parse(rss_url)
-        
-        if feed.bozo:
-            logger.warning("rss_parse_warning", url=rss_url, error=str(feed.bozo_exception))
+        server = self.server.web_server
         
-        podcast_info = {
-            "title": feed.feed.get("title", ""),
-            "description": feed.feed.get("description", ""),
-            "link": feed.feed.get("link", ""),
-            "episodes": []
-        }
+        # Revalidate with the upstream server if we've fetched this feed before
+        headers = {}
+        validator = server.get_feed_validator(rss_url)
+        if validator:
+            if validator["etag"]:
+                headers["If-None-Match"] = validator["etag"]
+            if validator["last_modified"]:
+                headers["If-Modified-Since"] = validator["last_modified"]
         
-        for entry in feed.entries:
-            episode = {
-                "title": entry.get("title", ""),
-                "description": entry.get("description", ""),
-                "published": entry.get("published", ""),
-                "audio_url": None
-            }
-            
-            # Extract the audio URL
-            for link in entry.get("links", []):
-                if link.get("rel") == "enclosure" and link.get("type", "").startswith("audio/"):
-                    episode["audio_url"] = link.get("href")
-                    break
-            
-            if episode["audio_url"]:
-                podcast_info["episodes"].append(episode)
+        logger.info("downloading_rss", url=rss_url)
+        response = server.http.get(rss_url, headers=headers, timeout=RSS_FETCH_TIMEOUT)
+        if response.status_code == 304 and validator:
+            logger.info("rss_not_modified", url=rss_url)
+            return validator["podcast_info"]
+        response.raise_for_status()
+        
+        podcast_info = parse_feed(response.content, rss_url)
+        
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            server.set_feed_validator(rss_url, {
+                "etag": etag,
+                "last_modified": last_modified,
+                "podcast_info": podcast_info
+            })
         
         logger.info("rss_download_complete", url=rss_url, episodes=len(podcast_info["episodes"]))
         return podcast_info
@@ -226,8 +387,8 @@ class RequestHandler(BaseHTTPRequestHandler):
         server = self.server.web_server
         
         # Get request status
-        status = server.get_request_status(request_id)
-        if not status:
+        status_json = server.get_request_status_json(request_id)
+        if not status_json:
             self.send_error(404, "Request not found")
             return
         
@@ -237,20 +398,20 @@ class RequestHandler(BaseHTTPRequestHandler):
         self.end_headers()
         
         try:
-            self.wfile.write(json.dumps(status).encode())
+            self.wfile.write(status_json)
         except (BrokenPipeError, ConnectionResetError):
             # Client disconnected, log and return silently
             logger.info("client_disconnected_during_status_response", request_id=request_id)
             return
     
-    def _handle_download_request(self):
+    def _handle_download_request(self, path: str):
         """Handle a request to download a processed file."""
-        path_parts = self.path.split('/')
-        if len(path_parts) < 3:
+        match = _DOWNLOAD_RE.match(path)
+        if not match:
             self.send_error(400, "Missing file ID")
             return
         
-        file_id = path_parts[2]
+        file_id = match.group(1)
         server = self.server.web_server
         
         # Get the file path from the file ID
@@ -281,10 +442,25 @@ class WebServer:
         # State tracking
         self.server = None
         self.running = False
-        self.pending_requests = {}
-        self.file_mappings = {}
-        self.url_to_file = {}
-        self.cached_podcast_info = {}
+        # Tracked state is bounded so a long-running server doesn't grow without limit
+        ttl = config.web_server.state_ttl
+        maxsize = config.web_server.max_state_entries
+        self.pending_requests = ExpiringDict(maxsize, ttl)
+        self.file_mappings = ExpiringDict(maxsize, ttl)
+        self.url_to_file = ExpiringDict(maxsize, ttl)
+        self.cached_podcast_info = ExpiringDict(maxsize, ttl)
+        self.rss_xml_cache = ExpiringDict(maxsize, ttl)  # (base URL, encoded RSS XML) per cached feed
+        self._status_json_cache = ExpiringDict(maxsize, ttl)  # Encoded status per request
+        self._feed_validators = ExpiringDict(maxsize, RSS_VALIDATOR_TTL)
+        
+        # Shared HTTP session so feed fetches reuse connections
+        self.http = requests.Session()
+        # Guards the state above; requests are served on their own threads
+        self._lock = threading.RLock()
+        # Request IDs are internal correlation IDs, so a per-process prefix plus a
+        # counter is unique enough and avoids a getrandom call per request
+        self._request_id_prefix = secrets.token_hex(4)
+        self._request_ids = itertools.count()
         
         # Subscribe to message broker topics
         self._setup_subscriptions()
@@ -293,55 +469,21 @@ class WebServer:
     
     def _setup_subscriptions(self):
         """Subscribe to message broker topics."""
-        # Download results
-        self.message_broker.subscribe(
-            Topics.DOWNLOAD_COMPLETE, 
-            self._handle_download_complete
-        )
-        self.message_broker.subscribe(
-            Topics.DOWNLOAD_FAILED,
-            self._handle_download_failed
-        )
-        
-        # Transcription results
-        self.message_broker.subscribe(
-            Topics.TRANSCRIBE_COMPLETE,
-            self._handle_transcription_complete
-        )
-        self.message_broker.subscribe(
-            Topics.TRANSCRIBE_FAILED,
-            self._handle_transcription_failed
-        )
+        # Steps that hand off to the next service, and failures of any step
+        for topic in _PIPELINE:
+            self.message_broker.subscribe(topic, self._advance)
+        for topic in _FAILED_STEPS:
+            self.message_broker.subscribe(topic, self._fail)
         
-        # Ad detection results
-        self.message_broker.subscribe(
-            Topics.AD_DETECTION_COMPLETE,
-            self._handle_ad_detection_complete
-        )
-        self.message_broker.subscribe(
-            Topics.AD_DETECTION_FAILED,
-            self._handle_ad_detection_failed
-        )
-        
-        # Audio processing results
+        # Steps with their own bookkeeping
         self.message_broker.subscribe(
             Topics.AUDIO_PROCESSING_COMPLETE,
             self._handle_audio_processing_complete
         )
-        self.message_broker.subscribe(
-            Topics.AUDIO_PROCESSING_FAILED,
-            self._handle_audio_processing_failed
-        )
-        
-        # RSS download results
         self.message_broker.subscribe(
             Topics.RSS_DOWNLOAD_COMPLETE,
             self._handle_rss_download_complete
         )
-        self.message_broker.subscribe(
-            Topics.RSS_DOWNLOAD_FAILED,
-            self._handle_rss_download_failed
-        )
         
         # Status updates
         self.message_broker.subscribe(
@@ -349,39 +491,66 @@ class WebServer:
             self._handle_status_update
         )
     
+    def next_request_id(self) -> str:
+        """Generate a unique ID for a new request."""
+        return f"{self._request_id_prefix}-{next(self._request_ids):x}"
+    
     def add_pending_request(self, request_id: str, request_type: str, url: str) -> None:
         """Add a pending request to track."""
-        self.pending_requests[request_id] = {
+        now = time.time()
+        request = {
             "request_id": request_id,
             "type": request_type,
             "url": url,
             "status": "processing",
-            "created_at": time.time(),
-            "updated_at": time.time(),
+            "created_at": now,
+            "updated_at": now,
             "steps": [
                 {
                     "name": "submitted",
                     "status": "completed",
-                    "timestamp": time.time()
+                    "timestamp": now
                 }
             ]
         }
+        with self._lock:
+            self.pending_requests[request_id] = request
+            self._status_json_cache.pop(request_id, None)
     
     def update_request_status(self, request_id: str, status: str, step: Optional[dict] = None) -> None:
-        """Update the status of a pending request."""
-        if request_id not in self.pending_requests:
-            logger.warning("unknown_request_id", request_id=request_id)
-            return
-        
-        self.pending_requests[request_id]["status"] = status
-        self.pending_requests[request_id]["updated_at"] = time.time()
-        
-        if step:
-            self.pending_requests[request_id]["steps"].append(step)
+        """Update the status of a pending request, timestamping the step if it has no timestamp."""
+        with self._lock:
+            request = self.pending_requests.get(request_id)
+            if request is None:
+                logger.warning("unknown_request_id", request_id=request_id)
+                return
+            
+            now = time.time()
+            request["status"] = status
+            request["updated_at"] = now
+            
+            if step:
+                step.setdefault("timestamp", now)
+                request["steps"].append(step)
+            self._status_json_cache.pop(request_id, None)
     
     def get_request_status(self, request_id: str) -> Optional[dict]:
-        """Get the status of a request."""
-        return self.pending_requests.get(request_id)
+        """Get a snapshot of the status of a request."""
+        with self._lock:
+            request = self.pending_requests.get(request_id)
+            return dict(request) if request is not None else None
+    
+    def get_request_status_json(self, request_id: str) -> Optional[bytes]:
+        """Get the status of a request as JSON bytes, serializing only after it changes."""
+        with self._lock:
+            status_json = self._status_json_cache.get(request_id)
+            if status_json is None:
+                request = self.pending_requests.get(request_id)
+                if request is None:
+                    return None
+                status_json = dumps(request)
+                self._status_json_cache[request_id] = status_json
+            return status_json
     
     def add_file_mapping(self, request_id: str, file_path: str) -> str:
         """
@@ -394,61 +563,127 @@ class WebServer:
         Returns:
             str: File ID for download URL.
         """
+        # File IDs appear in public download URLs, so they stay unguessable
         file_id = str(uuid.uuid4())
-        self.file_mappings[file_id] = file_path
-        
-        # Also map the original URL to the file path if available
-        if request_id in self.pending_requests:
-            original_url = self.pending_requests[request_id].get("url")
-            if original_url:
-                self.url_to_file[original_url] = file_path
+        with self._lock:
+            self.file_mappings[file_id] = file_path
+            
+            # Also map the original URL to the file path if available
+            if request_id in self.pending_requests:
+                original_url = self.pending_requests[request_id].get("url")
+                if original_url:
+                    self.url_to_file[original_url] = file_path
         
         return file_id
     
     def get_file_path(self, file_id: str) -> Optional[str]:
         """Get the file path for a file ID."""
-        return self.file_mappings.get(file_id)
+        with self._lock:
+            return self.file_mappings.get(file_id)
     
     def get_processed_file_path(self, url: str) -> Optional[str]:
         """Get the processed file path for a URL if it exists."""
-        return self.url_to_file.get(url)
+        with self._lock:
+            return self.url_to_file.get(url)
     
     def get_cached_podcast_info(self, rss_url: str) -> Optional[dict]:
         """Get cached podcast info for an RSS URL if it exists."""
-        return self.cached_podcast_info.get(rss_url)
+        with self._lock:
+            return self.cached_podcast_info.get(rss_url)
+    
+    def cache_podcast_info(self, rss_url: str, podcast_info: dict) -> None:
+        """Cache podcast info for an RSS URL, invalidating its rendered XML."""
+        with self._lock:
+            self.cached_podcast_info[rss_url] = podcast_info
+            self.rss_xml_cache.pop(rss_url, None)
+    
+    def get_feed_validator(self, rss_url: str) -> Optional[dict]:
+        """Get the cache validators and parsed info from the last fetch of a feed."""
+        with self._lock:
+            return self._feed_validators.get(rss_url)
     
-    def generate_rss_xml(self, podcast_info: dict) -> str:
-        """Generate RSS XML from podcast info."""
-        rss = ET.Element("rss", version="2.0")
-        channel = ET.SubElement(rss, "channel")
+    def set_feed_validator(self, rss_url: str, validator: dict) -> None:
+        """Remember the cache validators and parsed info of a fetched feed."""
+        with self._lock:
+            self._feed_validators[rss_url] = validator
+    
+    def get_rss_xml(self, rss_url: str, podcast_info: dict, base_url: Optional[str] = None) -> bytes:
+        """Get the encoded RSS XML for a feed, rendering and caching it on first use."""
+        with self._lock:
+            cached = self.rss_xml_cache.get(rss_url)
+        if cached is not None and cached[0] == base_url:
+            return cached[1]
+        
+        buffer = io.BytesIO()
+        self.write_rss_xml(podcast_info, buffer, base_url)
+        rss_xml = buffer.getvalue()
+        with self._lock:
+            # Only cache if the podcast info wasn't replaced while rendering
+            if self.cached_podcast_info.get(rss_url) is podcast_info:
+                self.rss_xml_cache[rss_url] = (base_url, rss_xml)
+        return rss_xml
+    
+    def generate_rss_xml(self, podcast_info: dict, base_url: Optional[str] = None) -> str:
+        """
+        Generate RSS XML from podcast info.
         
-        # Add channel elements
-        ET.SubElement(channel, "title").text = podcast_info.get("title", "PodCleaner Feed")
-        ET.SubElement(channel, "link").text = podcast_info.get("link", "")
-        ET.SubElement(channel, "description").text = podcast_info.get("description", "Cleaned podcast feed")
+        Args:
+            podcast_info: Feed metadata and episodes.
+            base_url: If given, enclosures point at this server's /process endpoint
+                      for each episode instead of at the original audio URL.
+                      
+        Returns:
+            str: The RSS document.
+        """
+        return "".join(self._rss_xml_fragments(podcast_info, base_url))
+    
+    def write_rss_xml(self, podcast_info: dict, out, base_url: Optional[str] = None) -> None:
+        """
+        Write RSS XML from podcast info to a binary stream as UTF-8.
+        
+        Each episode is encoded and written as it is rendered, so the whole feed
+        never exists as one intermediate string.
+        
+        Args:
+            podcast_info: Feed metadata and episodes.
+            out: Binary file-like object to write to.
+            base_url: See generate_rss_xml.
+        """
+        out.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
+        for fragment in self._rss_xml_fragments(podcast_info, base_url):
+            out.write(fragment.encode('utf-8'))
+    
+    def _rss_xml_fragments(self, podcast_info: dict, base_url: Optional[str] = None) -> Iterator[str]:
+        """Render RSS XML as a channel header, one fragment per episode, and a footer."""
+        yield ('<rss version="2.0"><channel>'
+               f"<title>{escape(podcast_info.get('title', 'PodCleaner Feed') or '')}</title>"
+               f"<link>{escape(podcast_info.get('link', '') or '')}</link>"
+               f"<description>{escape(podcast_info.get('description', 'Cleaned podcast feed') or '')}</description>")
         
         # Add items
         for episode in podcast_info.get("episodes", []):
-            item = ET.SubElement(channel, "item")
-            ET.SubElement(item, "title").text = episode.get("title", "")
-            ET.SubElement(item, "description").text = episode.get("description", "")
+            parts = [f"<item><title>{escape(episode.get('title', '') or '')}</title>"
+                     f"<description>{escape(episode.get('description', '') or '')}</description>"]
             if episode.get("published"):
-                ET.SubElement(item, "pubDate").text = episode.get("published")
-            
-            if episode.get("audio_url"):
-                enclosure = ET.SubElement(item, "enclosure")
-                enclosure.set("url", episode.get("audio_url"))
-                enclosure.set("type", "audio/mpeg")
-        
-        # Convert to string
-        return ET.tostring(rss, encoding='unicode')
+                parts.append(f"<pubDate>{escape(episode['published'])}</pubDate>")
+            audio_url = episode.get("audio_url")
+            if audio_url:
+                if base_url:
+                    # The downloader may already have rewritten the URL and kept the original
+                    original_url = episode.get("original_url") or audio_url
+                    audio_url = f"{base_url}{PROCESS_PATH}?url={quote_plus(original_url, safe=':/')}"
+                parts.append(f'<enclosure url={quoteattr(audio_url)} type="audio/mpeg" />')
+            parts.append("</item>")
+            yield "".join(parts)
+        
+        yield "</channel></rss>"
     
     def start(self) -> None:
         """Start the web server."""
         if self.running:
             return
             
-        self.server = HTTPServer((self.host, self.port), RequestHandler)
+        self.server = ThreadingHTTPServer((self.host, self.port), RequestHandler)
         self.server.web_server = self  # Attach the web server instance
         
         self.server_thread = threading.Thread(target=self.server.serve_forever)
@@ -466,140 +701,39 @@ class WebServer:
         self.server.shutdown()
         self.server.server_close()
         self.server_thread.join()
+        self.http.close()
         
         self.running = False
         logger.info("web_server_stopped")
     
-    def _handle_download_complete(self, message: Message) -> None:
-        """Handle download complete message."""
-        request_id = message.correlation_id
-        file_path = message.data.get("file_path")
-        
-        if not request_id or not file_path:
-            logger.warning("missing_correlation_id_or_file_path", topic=message.topic)
-            return
-        
-        self.update_request_status(
-            request_id,
-            "processing",
-            {
-                "name": "download",
-                "status": "completed",
-                "timestamp": time.time()
-            }
-        )
-        
-        # Send message to transcription service
-        self.message_broker.publish(Message(
-            topic=Topics.TRANSCRIBE_REQUEST,
-            data={"file_path": file_path},
-            correlation_id=request_id
-        ))
-    
-    def _handle_download_failed(self, message: Message) -> None:
-        """Handle download failed message."""
-        request_id = message.correlation_id
-        error = message.data.get("error")
-        
-        if not request_id:
-            logger.warning("missing_correlation_id", topic=message.topic)
-            return
-        
-        self.update_request_status(
-            request_id,
-            "failed",
-            {
-                "name": "download",
-                "status": "failed",
-                "timestamp": time.time(),
-                "error": error
-            }
-        )
-    
-    def _handle_transcription_complete(self, message: Message) -> None:
-        """Handle transcription complete message."""
-        request_id = message.correlation_id
-        file_path = message.data.get("file_path")
-        transcript_path = message.data.get("transcript_path")
-        
-        if not request_id or not file_path or not transcript_path:
-            logger.warning("missing_correlation_id_or_paths", topic=message.topic)
-            return
-        
-        self.update_request_status(
-            request_id,
-            "processing",
-            {
-                "name": "transcription",
-                "status": "completed",
-                "timestamp": time.time()
-            }
-        )
-        
-        # Send message to ad detection service
-        self.message_broker.publish(Message(
-            topic=Topics.AD_DETECTION_REQUEST,
-            data={
-                "file_path": file_path,
-                "transcript_path": transcript_path
-            },
-            correlation_id=request_id
-        ))
-    
-    def _handle_transcription_failed(self, message: Message) -> None:
-        """Handle transcription failed message."""
-        request_id = message.correlation_id
-        error = message.data.get("error")
-        
-        if not request_id:
-            logger.warning("missing_correlation_id", topic=message.topic)
-            return
-        
-        self.update_request_status(
-            request_id,
-            "failed",
-            {
-                "name": "transcription",
-                "status": "failed",
-                "timestamp": time.time(),
-                "error": error
-            }
-        )
-    
-    def _handle_ad_detection_complete(self, message: Message) -> None:
-        """Handle ad detection complete message."""
+    def _advance(self, message: Message) -> None:
+        """Record a completed pipeline step and hand the episode to the next service."""
+        step_name, fields, next_topic = _PIPELINE[message.topic]
         request_id = message.correlation_id
-        file_path = message.data.get("file_path")
-        transcript_path = message.data.get("transcript_path")
+        data = {field: message.data.get(field) for field in fields}
         
-        if not request_id or not file_path or not transcript_path:
-            logger.warning("missing_correlation_id_or_paths", topic=message.topic)
+        if not request_id or not all(data.values()):
+            logger.warning("missing_correlation_id_or_fields", topic=message.topic, fields=fields)
             return
         
         self.update_request_status(
             request_id,
             "processing",
             {
-                "name": "ad_detection",
-                "status": "completed",
-                "timestamp": time.time()
+                "name": step_name,
+                "status": "completed"
             }
         )
         
-        # Send message to audio processing service
         self.message_broker.publish(Message(
-            topic=Topics.AUDIO_PROCESSING_REQUEST,
-            data={
-                "file_path": file_path,
-                "transcript_path": transcript_path
-            },
+            topic=next_topic,
+            data=data,
             correlation_id=request_id
         ))
     
-    def _handle_ad_detection_failed(self, message: Message) -> None:
-        """Handle ad detection failed message."""
+    def _fail(self, message: Message) -> None:
+        """Record a failed pipeline step."""
         request_id = message.correlation_id
-        error = message.data.get("error")
         
         if not request_id:
             logger.warning("missing_correlation_id", topic=message.topic)
@@ -609,10 +743,9 @@ class WebServer:
             request_id,
             "failed",
             {
-                "name": "ad_detection",
+                "name": _FAILED_STEPS[message.topic],
                 "status": "failed",
-                "timestamp": time.time(),
-                "error": error
+                "error": message.data.get("error")
             }
         )
     
@@ -639,31 +772,10 @@ class WebServer:
             {
                 "name": "audio_processing",
                 "status": "completed",
-                "timestamp": time.time(),
                 "download_url": download_url
             }
         )
     
-    def _handle_audio_processing_failed(self, message: Message) -> None:
-        """Handle audio processing failed message."""
-        request_id = message.correlation_id
-        error = message.data.get("error")
-        
-        if not request_id:
-            logger.warning("missing_correlation_id", topic=message.topic)
-            return
-        
-        self.update_request_status(
-            request_id,
-            "failed",
-            {
-                "name": "audio_processing",
-                "status": "failed",
-                "timestamp": time.time(),
-                "error": error
-            }
-        )
-    
     def _handle_rss_download_complete(self, message: Message) -> None:
         """
         Handle RSS download complete message.
@@ -680,40 +792,22 @@ class WebServer:
             return
         
         # Cache podcast info for future requests
-        self.cached_podcast_info[rss_url] = podcast_info
+        self.cache_podcast_info(rss_url, podcast_info)
         
         self.update_request_status(
             request_id,
             "completed",
             {
                 "name": "rss_download",
-                "status": "completed",
-                "timestamp": time.time()
+                "status": "completed"
             }
         )
         
         # Add podcast info to request
-        self.pending_requests[request_id]["podcast_info"] = podcast_info
-    
-    def _handle_rss_download_failed(self, message: Message) -> None:
-        """Handle RSS download failed message."""
-        request_id = message.correlation_id
-        error = message.data.get("error")
-        
-        if not request_id:
-            logger.warning("missing_correlation_id", topic=message.topic)
-            return
-        
-        self.update_request_status(
-            request_id,
-            "failed",
-            {
-                "name": "rss_download",
-                "status": "failed",
-                "timestamp": time.time(),
-                "error": error
-            }
-        )
+        with self._lock:
+            if request_id in self.pending_requests:
+                self.pending_requests[request_id]["podcast_info"] = podcast_info
+                self._status_json_cache.pop(request_id, None)
     
     def _handle_status_update(self, message: Message) -> None:
         """Handle status update message."""
@@ -731,34 +825,57 @@ class WebServer:
         """Serve a file to the client."""
         try:
             # Determine content type based on file extension
-            content_type = "application/octet-stream"
-            if file_path.endswith(".mp3"):
-                content_type = "audio/mpeg"
-            elif file_path.endswith(".wav"):
-                content_type = "audio/wav"
+            content_type = _CONTENT_TYPES.get(
+                os.path.splitext(file_path)[1].lower(), "application/octet-stream"
+            )
             
-            # Get the file data from object storage
+            # Stream the file from object storage instead of loading it into memory
             try:
-                file_data = self.object_storage.download(file_path)
-                file_size = len(file_data)
-                
-                # Set up response headers
-                handler.send_response(200)
-                handler.send_header("Content-Type", content_type)
-                handler.send_header("Content-Length", str(file_size))
-                
-                # Add Content-Disposition header if file_name is provided
-                if file_name:
-                    handler.send_header(
-                        "Content-Disposition", 
-                        f'attachment; filename="{file_name}"'
-                    )
+                file_size = self.object_storage.stat(file_path)["size"]
                 
-                handler.end_headers()
+                # Podcast clients seek with Range requests; only send the requested slice
+                try:
+                    byte_range = _parse_range(handler.headers.get("Range"), file_size)
+                except ValueError:
+                    handler.send_response(416)
+                    handler.send_header("Content-Range", f"bytes */{file_size}")
+                    handler.end_headers()
+                    return
+                start, end = byte_range if byte_range else (0, file_size - 1)
+                length = max(end - start + 1, 0)
                 
-                # Send the file data
-                handler.wfile.write(file_data)
-                logger.info("file_served", path=file_path, size=file_size)
+                with closing(self.object_storage.open_stream(file_path, offset=start,
+                                                             length=length if byte_range else None)) as stream:
+                    # Set up response headers
+                    if byte_range:
+                        handler.send_response(206)
+                        handler.send_header("Content-Range", f"bytes {start}-{end}/{file_size}")
+                    else:
+                        handler.send_response(200)
+                    handler.send_header("Content-Type", content_type)
+                    handler.send_header("Content-Length", str(length))
+                    handler.send_header("Accept-Ranges", "bytes")
+                    
+                    # Add Content-Disposition header if file_name is provided
+                    if file_name:
+                        handler.send_header(
+                            "Content-Disposition", 
+                            f'attachment; filename="{file_name}"'
+                        )
+                    
+                    handler.end_headers()
+                    
+                    # Send the file data
+                    if isinstance(stream, io.BufferedReader):
+                        # Local file: ask for aggressive readahead so disk reads overlap the
+                        # socket writes, then let the kernel copy it to the socket
+                        if hasattr(os, "posix_fadvise"):
+                            os.posix_fadvise(stream.fileno(), start, length, os.POSIX_FADV_SEQUENTIAL)
+                        if length:
+                            handler.connection.sendfile(stream, offset=start, count=length)
+                    else:
+                        _copy_stream(stream, handler.wfile, length)
+                logger.info("file_served", path=file_path, size=length, range=byte_range)
                 
             except ObjectStorageError as e:
                 logger.error("file_serving_failed", path=file_path, error=str(e))
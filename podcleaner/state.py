@@ -0,0 +1,110 @@
+"""Persistent processing state shared by the services."""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Iterator, Optional
+
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+# Database file, next to the other service state in the debug directory
+STATE_DB_NAME = "state.db"
+
+class PathSet:
+    """
+    A set of file paths or URLs persisted in SQLite.
+
+    Membership is answered from memory, while each add or discard is a single
+    indexed write in WAL mode instead of a rewrite of the whole collection.
+    Several sets, told apart by their kind, can share one database file.
+    """
+
+    def __init__(self, db_path: str, kind: str, legacy_json_path: Optional[str] = None):
+        """
+        Open the set, creating the database if needed.
+
+        Args:
+            db_path: Path to the SQLite database file.
+            kind: Name of this set within the database.
+            legacy_json_path: JSON list written by earlier versions, imported once
+                while the set is still empty.
+        """
+        self.kind = kind
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS paths (kind TEXT NOT NULL, path TEXT NOT NULL, "
+            "PRIMARY KEY (kind, path)) WITHOUT ROWID"
+        )
+        self._paths = {row[0] for row in self._conn.execute("SELECT path FROM paths WHERE kind = ?", (kind,))}
+        if not self._paths and legacy_json_path:
+            self._import_legacy(legacy_json_path)
+        logger.info("loaded_path_set", kind=kind, count=len(self._paths))
+
+    def _import_legacy(self, legacy_json_path: str) -> None:
+        """Import the paths from a legacy JSON list file."""
+        try:
+            with open(legacy_json_path, 'r') as f:
+                paths = set(json.load(f))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, TypeError) as e:
+            logger.error("failed_to_import_legacy_paths", kind=self.kind, file=legacy_json_path, error=str(e))
+            return
+        # One transaction for the whole import rather than one per path
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO paths (kind, path) VALUES (?, ?)",
+                ((self.kind, path) for path in paths)
+            )
+        except sqlite3.Error:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        self._paths = paths
+        logger.info("imported_legacy_paths", kind=self.kind, file=legacy_json_path, count=len(paths))
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._paths))
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def add(self, path: str) -> None:
+        """Add a path, persisting it immediately."""
+        with self._lock:
+            if path in self._paths:
+                return
+            self._paths.add(path)
+            try:
+                self._conn.execute("INSERT OR IGNORE INTO paths (kind, path) VALUES (?, ?)", (self.kind, path))
+            except sqlite3.Error as e:
+                logger.error("failed_to_save_path", kind=self.kind, path=path, error=str(e))
+
+    def discard(self, path: str) -> None:
+        """Remove a path if present, persisting the removal immediately."""
+        with self._lock:
+            if path not in self._paths:
+                return
+            self._paths.discard(path)
+            try:
+                self._conn.execute("DELETE FROM paths WHERE kind = ? AND path = ?", (self.kind, path))
+            except sqlite3.Error as e:
+                logger.error("failed_to_remove_path", kind=self.kind, path=path, error=str(e))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+def open_path_set(directory: str, kind: str, legacy_json_path: Optional[str] = None) -> PathSet:
+    """Open a persistent path set in the state database of a directory."""
+    return PathSet(os.path.join(directory, STATE_DB_NAME), kind, legacy_json_path)
@@ -16,9 +16,10 @@ if ! command -v pytest &> /dev/null; then
     exit 1
 fi
 
-# Run tests
+# Run tests, spread over all logical cores; each test keeps its files in its own tmp_path.
+# Idle workers steal queued tests, so a few slow modules don't leave cores unused.
 echo -e "${YELLOW}Running unit tests...${NC}"
-pytest -xvs tests/
+pytest -n logical --dist worksteal -xv tests/
 
 # If tests pass, build and deploy
 if [ $? -eq 0 ]; then
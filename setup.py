@@ -11,4 +11,10 @@ setup(
     install_requires=[
         # Dependencies will be installed from requirements.txt in CI
     ],
+    extras_require={
+        # Quantized whisper.cpp transcription backend, the default on ARM hosts
+        "whisper-cpp": ["pywhispercpp>=1.2.0"],
+        # Reuse ad labels of near-duplicate chunks (llm.semantic_cache_model)
+        "semantic-cache": ["sentence-transformers>=2.2.2"],
+    },
 ) 
\ No newline at end of file
@@ -1,8 +1,25 @@
 """Common fixtures for testing."""
 
 import pytest
+from dataclasses import dataclass
+from typing import List
 from unittest.mock import MagicMock, patch
 
+@dataclass
+class FakeChatMessage:
+    """Stand-in for an OpenAI chat completion message."""
+    content: str
+
+@dataclass
+class FakeChatChoice:
+    """Stand-in for an OpenAI chat completion choice."""
+    message: FakeChatMessage
+
+@dataclass
+class FakeChatResponse:
+    """Stand-in for an OpenAI chat completion response, cheaper to use than a MagicMock."""
+    choices: List[FakeChatChoice]
+
 @pytest.fixture
 def mock_mqtt_broker():
     """Mock the MQTT message broker."""
@@ -17,4 +34,14 @@ def mock_mqtt_broker():
 def mock_openai():
     """Mock the OpenAI client."""
     with patch('openai.Client') as mock:
-        yield mock 
\ No newline at end of file
+        yield mock
+
+@pytest.fixture
+def fake_chat_response():
+    """Build a chat completion response with the given message content."""
+    return lambda content: FakeChatResponse([FakeChatChoice(FakeChatMessage(content))])
+
+@pytest.fixture(autouse=True)
+def isolated_working_dir(tmp_path, monkeypatch):
+    """Run each test in its own directory so services' on-disk state never leaks between tests."""
+    monkeypatch.chdir(tmp_path)
@@ -1,7 +1,9 @@
+import threading
+import time
 import pytest
 from unittest.mock import MagicMock, patch
 from podcleaner.config import LLMConfig
-from podcleaner.models import Segment, Transcript
+from podcleaner.models import ProcessingResult, Segment, Transcript, TranscriptChunk
 from podcleaner.services.ad_detector import AdDetector
 from podcleaner.services.message_broker import Message, Topics
 
@@ -207,7 +209,9 @@ def test_file_lifecycle(mock_openai):
     # Mock file operations and detect_ads
     with patch("builtins.open", MagicMock()), \
          patch("json.load", return_value={"segments": []}), \
+         patch("podcleaner.models.loads", return_value={"segments": []}), \
          patch("json.dump"), \
+         patch("os.replace"), \
          patch.object(Transcript, "from_dict", return_value=Transcript(segments=[])), \
          patch.object(detector, "detect_ads", return_value=Transcript(segments=[])):
         
@@ -276,4 +280,223 @@ def test_error_handling(mock_openai):
         assert published_message.topic == Topics.AD_DETECTION_FAILED
         assert published_message.data["file_path"] == test_file_path
         assert "Test error" in published_message.data["error"]
-        assert published_message.correlation_id == "test-correlation-id" 
\ No newline at end of file
+        assert published_message.correlation_id == "test-correlation-id" 
+def test_detect_ads_processes_chunks_concurrently_in_order(mock_openai):
+    """Test that chunks are dispatched concurrently and reassembled in order."""
+    config = LLMConfig(model_name="test-model", api_key="test-key", chunk_size=1, max_concurrency=4)
+    detector = AdDetector(config)
+    segments = [Segment(id=i, text=f"Segment {i}", start=float(i), end=i + 1.0, is_ad=False) for i in range(4)]
+    barrier = threading.Barrier(4, timeout=5)
+    
+    def process_chunk(chunk):
+        # Every chunk must be in flight at the same time to get past the barrier
+        barrier.wait()
+        # Later chunks finish first
+        time.sleep(0.01 * (3 - chunk.chunk_id))
+        return ProcessingResult(chunk_id=chunk.chunk_id, segments=chunk.segments, error="failed")
+    
+    with patch.object(detector, '_process_chunk', side_effect=process_chunk), \
+         patch.object(detector, '_write_debug_info') as write_debug_info:
+        result = detector.detect_ads(Transcript(segments=segments))
+    
+    assert [seg.id for seg in result.segments] == [0, 1, 2, 3]
+    final_results = write_debug_info.call_args_list[-1][0][1]
+    assert final_results["errors"] == [f"Chunk {i}: failed" for i in range(4)]
+
+def test_create_chunks_respects_prompt_budget(mock_openai):
+    """Test that chunks are closed by segment count or by prompt size, whichever comes first."""
+    config = LLMConfig(model_name="test-model", api_key="test-key", chunk_size=3, max_prompt_chars=10)
+    detector = AdDetector(config)
+    texts = ["aaaa", "bbbb", "cccc", "d", "e", "f", "g"]
+    segments = [Segment(id=i, text=text, start=float(i), end=i + 1.0) for i, text in enumerate(texts)]
+    
+    chunks = detector._create_chunks(Transcript(segments=segments))
+    
+    assert [[seg.id for seg in chunk.segments] for chunk in chunks] == [[0, 1], [2, 3, 4], [5, 6]]
+    assert [chunk.chunk_id for chunk in chunks] == [0, 1, 2]
+
+def test_create_chunks_packs_by_tokens(mock_openai):
+    """Test that chunks are sized by token count when a tokenizer is available."""
+    from podcleaner.services.ad_detector import SEGMENT_OVERHEAD_TOKENS
+    
+    class WordEncoding:
+        """Tokenizer stand-in counting one token per word."""
+        def encode_ordinary_batch(self, texts, num_threads=8):
+            return [text.split() for text in texts]
+    
+    config = LLMConfig(model_name="test-model", api_key="test-key", max_prompt_tokens=2 * SEGMENT_OVERHEAD_TOKENS + 5)
+    detector = AdDetector(config)
+    detector._encoding = WordEncoding()
+    texts = ["one two", "three four five", "six", "seven eight nine ten", "eleven"]
+    segments = [Segment(id=i, text=text, start=float(i), end=i + 1.0) for i, text in enumerate(texts)]
+    
+    chunks = detector._create_chunks(Transcript(segments=segments))
+    
+    assert [[seg.id for seg in chunk.segments] for chunk in chunks] == [[0, 1], [2, 3], [4]]
+
+def test_process_chunk_reuses_cached_llm_answer(mock_openai, fake_chat_response, tmp_path):
+    """Test that an identical chunk is answered from the LLM cache on a re-run."""
+    config = LLMConfig(model_name="test-model", api_key="test-key", cache_dir=str(tmp_path))
+    detector = AdDetector(config)
+    detector.client = MagicMock()
+    create = detector.client.chat.completions.create
+    create.return_value = fake_chat_response('{"segments": [{"id": 0, "ad": true}]}')
+    
+    for _ in range(2):
+        chunk = TranscriptChunk(segments=[Segment(id=0, text="Use code SAVE", start=0.0, end=1.0)], chunk_id=0)
+        result = detector._process_chunk(chunk)
+        assert result.error is None
+        assert result.segments[0].is_ad is True
+    
+    create.assert_called_once()
+
+def test_detect_ads_rerun_makes_no_llm_calls(mock_openai, fake_chat_response, tmp_path):
+    """Test that detecting ads again on an identical transcript is served entirely from the cache."""
+    config = LLMConfig(model_name="test-model", api_key="test-key", cache_dir=str(tmp_path))
+    detector = AdDetector(config)
+    detector.client = MagicMock()
+    create = detector.client.chat.completions.create
+    create.return_value = fake_chat_response('{"segments": [{"id": 0, "ad": false}, {"id": 1, "ad": true}]}')
+    
+    def transcript():
+        return Transcript(segments=[
+            Segment(id=0, text="Welcome back", start=0.0, end=2.0),
+            Segment(id=1, text="Use code SAVE", start=2.0, end=4.0),
+        ])
+    
+    first = detector.detect_ads(transcript())
+    calls = create.call_count
+    second = detector.detect_ads(transcript())
+    
+    assert calls > 0
+    assert create.call_count == calls
+    assert [seg.is_ad for seg in second.segments] == [seg.is_ad for seg in first.segments] == [False, True]
+
+def test_parse_llm_json_tolerates_wrapping():
+    """Test that JSON wrapped in prose or a code fence is still parsed."""
+    from podcleaner.services.ad_detector import _parse_llm_json
+    
+    expected = {"segments": [{"id": 1, "ad": True}]}
+    assert _parse_llm_json('{"segments": [{"id": 1, "ad": true}]}') == expected
+    assert _parse_llm_json('Sure, here you go:\n```json\n{"segments": [{"id": 1, "ad": true}]}\n```') == expected
+    with pytest.raises(ValueError):
+        _parse_llm_json("I can't help with that.")
+
+def test_get_ad_blocks_splits_on_gaps_and_content(mock_openai):
+    """Test that ad blocks split on long gaps and on non-ad segments."""
+    detector = AdDetector(LLMConfig(model_name="test-model", api_key="test-key"))
+    segments = [
+        Segment(id=0, text="ad", start=0.0, end=2.0, is_ad=True),
+        Segment(id=1, text="ad", start=2.5, end=4.0, is_ad=True),
+        Segment(id=2, text="ad", start=20.0, end=22.0, is_ad=True),
+        Segment(id=3, text="content", start=22.0, end=25.0, is_ad=False),
+        Segment(id=4, text="ad", start=25.0, end=27.0, is_ad=True),
+    ]
+    
+    blocks = detector._get_ad_blocks(segments)
+    
+    assert [[seg.id for seg in block] for block in blocks] == [[0, 1], [2], [4]]
+
+def test_results_to_dict_keeps_first_answer(mock_openai):
+    """Test that LLM verdicts are keyed by segment id, keeping the first answer per id."""
+    detector = AdDetector(LLMConfig(model_name="test-model", api_key="test-key"))
+    results = [{"id": 0, "ad": True}, {"id": 1, "ad": False}, {"id": 0, "ad": False}]
+    
+    assert detector._results_to_dict(results) == {0: True, 1: False}
+
+def test_build_prompt_shares_instructions_prefix(mock_openai):
+    """Test that only the segments differ between chunk prompts, so the provider can cache the prefix."""
+    detector = AdDetector(LLMConfig(model_name="test-model", api_key="test-key"))
+    first = detector._build_prompt(TranscriptChunk(segments=[Segment(id=0, text="Hello", start=0.0, end=1.0)], chunk_id=0))
+    second = detector._build_prompt(TranscriptChunk(segments=[Segment(id=1, text="Buy now", start=1.0, end=2.0)], chunk_id=1))
+    
+    assert first[0] == second[0]
+    assert "ID: 0 Text: Hello" in first[1]["content"]
+    assert "ID: 1 Text: Buy now" in second[1]["content"]
+
+def test_find_transitions_maps_matches_to_segments():
+    """Test that transition phrases are found case-insensitively and mapped to their segment."""
+    from podcleaner.services.ad_detector import _find_transitions
+    
+    texts = ["Hallo", "BLEIBEN SIE DRAN!", "", "Straße. Gleich geht es weiter, bleiben Sie dran", "bleiben sie", "dran"]
+    
+    assert _find_transitions(texts) == [1, 3]
+
+def test_semantic_cache_reuses_labels_for_paraphrased_chunks(mock_openai, fake_chat_response):
+    """Test that a near-duplicate sponsor read is labelled from the semantic cache without an LLM call."""
+    np = pytest.importorskip("numpy")
+    from podcleaner.services.ad_detector import SemanticCache
+    
+    encoded = []
+    
+    def bag_of_words(text):
+        encoded.append(text)
+        vector = np.zeros(256)
+        for word in text.lower().split():
+            vector[sum(map(ord, word)) % 256] += 1
+        return vector
+    
+    config = LLMConfig(model_name="test-model", api_key="test-key")
+    detector = AdDetector(config)
+    detector.client = MagicMock()
+    detector.client.chat.completions.create.return_value = fake_chat_response(
+        '{"segments": [{"id": 0, "ad": false}, {"id": 1, "ad": true}, {"id": 2, "ad": true}]}'
+    )
+    detector._semantic_cache = SemanticCache(bag_of_words, threshold=0.95)
+    
+    def episode(code):
+        return Transcript(segments=[
+            Segment(id=0, text="Welcome back to the show about energy and climate policy in Europe", start=0.0, end=5.0),
+            Segment(id=1, text="This episode is brought to you by the hydrogen summit in Saarbruecken on May 21 and 22", start=5.0, end=10.0),
+            Segment(id=2, text=f"All info and tickets on the summit website, save fifteen percent with the code {code}", start=10.0, end=15.0),
+        ])
+    
+    detector.detect_ads(episode("HYDROGEN25"))
+    second = detector.detect_ads(episode("SUMMIT25"))
+    
+    assert detector.client.chat.completions.create.call_count == 1
+    assert [seg.is_ad for seg in second.segments] == [False, True, True]
+    # Each chunk is embedded once, whether it missed or hit the cache
+    assert len(encoded) == 2
+
+def test_build_semantic_cache_needs_sentence_transformers():
+    """Test that the semantic cache is built from the configured model and skipped without sentence-transformers."""
+    pytest.importorskip("numpy")
+    from podcleaner.services import ad_detector
+    
+    config = LLMConfig(model_name="test-model", api_key="test-key", semantic_cache_model="all-MiniLM-L6-v2")
+    with patch.object(ad_detector, "SentenceTransformer") as mock_model:
+        cache = ad_detector._build_semantic_cache(config)
+    assert isinstance(cache, ad_detector.SemanticCache)
+    mock_model.assert_called_once_with("all-MiniLM-L6-v2")
+    
+    with patch.object(ad_detector, "SentenceTransformer", None):
+        assert ad_detector._build_semantic_cache(config) is None
+
+def test_load_encoding_falls_back_without_tiktoken():
+    """Test that token chunking uses the model's tokenizer when tiktoken is installed and characters otherwise."""
+    from podcleaner.services import ad_detector
+    
+    config = LLMConfig(model_name="local-model", api_key="test-key", max_prompt_tokens=1000)
+    with patch.object(ad_detector, "tiktoken") as mock_tiktoken:
+        mock_tiktoken.encoding_for_model.side_effect = KeyError("local-model")
+        assert ad_detector._load_encoding(config) is mock_tiktoken.get_encoding.return_value
+    mock_tiktoken.get_encoding.assert_called_once_with("cl100k_base")
+    
+    with patch.object(ad_detector, "tiktoken", None):
+        assert ad_detector._load_encoding(config) is None
+
+def test_extend_ad_blocks():
+    """Test that ad blocks extend from transitions over promotional content and short gaps, resuming after each block."""
+    from podcleaner.services.ad_detector import _extend_ad_blocks
+    
+    starts = [0.0, 5.0, 10.0, 12.0, 30.0, 40.0, 44.0, 50.0, 62.0]
+    ends = [4.0, 9.0, 11.0, 15.0, 35.0, 43.0, 48.0, 55.0, 65.0]
+    is_ad = [False, False, False, True, False, False, True, False, True]
+    promotional = {4}
+    
+    # The block from 1 bridges the short gaps before 3 and 6 but not the long one before 8;
+    # the transitions at 2 and 5 fall inside it, and the one at 8 is already an ad
+    _extend_ad_blocks(starts, ends, is_ad, [1, 2, 5, 8], promotional.__contains__)
+    
+    assert is_ad == [False, True, True, True, True, True, True, False, True]
@@ -2,11 +2,12 @@
 
 import os
 import pytest
+import threading
 import json
 from unittest.mock import patch, MagicMock, mock_open, call
 import tempfile
 import shutil
-from podcleaner.services.downloader import PodcastDownloader, DownloadError
+from podcleaner.services.downloader import DOWNLOAD_CHUNK_SIZE, DOWNLOAD_TIMEOUT, PodcastDownloader, DownloadError, _storage_key
 from podcleaner.services.message_broker import Message, Topics
 from podcleaner.config import AudioConfig, Config, ObjectStorageConfig, LLMConfig
 import requests
@@ -36,11 +37,9 @@ def downloader(temp_dir):
     
     downloader = PodcastDownloader(config=config, message_broker=message_broker)
     
-    # Override the processed files sets and paths
+    # Override the processed files sets
     downloader.processed_files = set()
     downloader.rss_feeds_processed = set()
-    downloader.processed_files_path = os.path.join(temp_dir, "processed_files.json")
-    downloader.rss_feeds_path = os.path.join(temp_dir, "processed_rss.json")
     
     return downloader
 
@@ -55,16 +54,18 @@ def test_generate_file_path(downloader):
     # Should be a hash, not ending with .mp3
     assert not file_path.endswith(".mp3")
     
-    # Generate another path for the same URL - should be the same
+    # Generate another path for the same URL - should be the same, and served from the cache
+    hits = _storage_key.cache_info().hits
     file_path2 = downloader._generate_file_path(url)
     assert file_path == file_path2
+    assert _storage_key.cache_info().hits == hits + 1
     
     # Different URL should have different path
     url2 = "https://example.com/another-podcast.mp3"
     file_path3 = downloader._generate_file_path(url2)
     assert file_path != file_path3
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_download_success(mock_get, downloader, temp_dir):
     """Test successful podcast download."""
     # Mock the response
@@ -81,8 +82,9 @@ def test_download_success(mock_get, downloader, temp_dir):
     url = "https://example.com/podcast.mp3"
     file_path = downloader.download(url)
     
-    # Verify the request was made
-    mock_get.assert_called_once_with(url, stream=True)
+    # Verify the request was made and streamed in large chunks
+    mock_get.assert_called_once_with(url, stream=True, timeout=DOWNLOAD_TIMEOUT)
+    mock_response.iter_content.assert_called_once_with(chunk_size=DOWNLOAD_CHUNK_SIZE)
     
     # Verify that upload was called
     downloader.object_storage.upload.assert_called()
@@ -90,7 +92,7 @@ def test_download_success(mock_get, downloader, temp_dir):
     # URL should be added to processed files
     assert url in downloader.processed_files
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_download_error(mock_get, downloader):
     """Test handling of download errors."""
     # Mock the response for a failed download with an exception
@@ -106,60 +108,73 @@ def test_download_error(mock_get, downloader):
     # URL should not be in processed files
     assert url not in downloader.processed_files
 
-@patch("feedparser.parse")
-def test_download_rss_success(mock_parse, downloader):
+RSS_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd">
+  <channel>
+    <title>Test Podcast</title>
+    <description>A test podcast</description>
+    <link>https://example.com/podcast</link>
+    <item>
+      <title>Episode 1</title>
+      <description>First episode</description>
+      <pubDate>Mon, 01 Jan 2023 00:00:00 +0000</pubDate>
+      <itunes:title>Episode One</itunes:title>
+      <enclosure url="https://example.com/ep1.mp3" type="audio/mpeg" length="1"/>
+    </item>
+    <item>
+      <title>Episode 2</title>
+      <description>Second episode</description>
+      <pubDate>Mon, 02 Jan 2023 00:00:00 +0000</pubDate>
+      <enclosure url="https://example.com/ep2.mp3" type="audio/mpeg" length="1"/>
+    </item>
+    <item>
+      <title>Video extra</title>
+      <enclosure url="https://example.com/extra.mp4" type="video/mp4" length="1"/>
+    </item>
+  </channel>
+</rss>
+"""
+
+@patch("requests.Session.get")
+def test_download_rss_success(mock_get, downloader):
     """Test successful RSS feed parsing."""
-    # Create a mock feed object that mimics feedparser's output
-    mock_feed = MagicMock()
-    mock_feed.bozo = False
-    mock_feed.feed = {
-        "title": "Test Podcast",
-        "description": "A test podcast",
-        "link": "https://example.com/podcast"
-    }
-    mock_feed.entries = [
-        {
-            "title": "Episode 1",
-            "description": "First episode",
-            "published": "Mon, 01 Jan 2023 00:00:00 +0000",
-            "links": [
-                {
-                    "rel": "enclosure",
-                    "type": "audio/mpeg",
-                    "href": "https://example.com/ep1.mp3"
-                }
-            ]
-        },
-        {
-            "title": "Episode 2",
-            "description": "Second episode",
-            "published": "Mon, 02 Jan 2023 00:00:00 +0000",
-            "links": [
-                {
-                    "rel": "enclosure",
-                    "type": "audio/mpeg",
-                    "href": "https://example.com/ep2.mp3"
-                }
-            ]
-        }
-    ]
-    mock_parse.return_value = mock_feed
+    mock_get.return_value = MagicMock(content=RSS_FEED)
     
     # Download and parse RSS
     rss_url = "https://example.com/podcast.xml"
     result = downloader.download_rss(rss_url)
     
-    # Verify feedparser was called
-    mock_parse.assert_called_once_with(rss_url)
+    # Verify the feed was fetched
+    mock_get.assert_called_once_with(rss_url, timeout=DOWNLOAD_TIMEOUT)
     
     # Check the result
     assert result["title"] == "Test Podcast"
     assert len(result["episodes"]) == 2
     assert result["episodes"][0]["audio_url"] == "https://example.com/ep1.mp3"
+    assert result["episodes"][0]["title"] == "Episode 1"
+    assert result["episodes"][1]["published"] == "Mon, 02 Jan 2023 00:00:00 +0000"
     
     # RSS URL should be added to processed feeds
     assert rss_url in downloader.rss_feeds_processed
 
+@patch("requests.Session.get")
+def test_download_rss_falls_back_for_atom_feeds(mock_get, downloader):
+    """Test that feeds which aren't RSS 2.0 are parsed with feedparser."""
+    mock_get.return_value = MagicMock(content=b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Atom Podcast</title>
+  <entry>
+    <title>Episode 1</title>
+    <link rel="enclosure" type="audio/mpeg" href="https://example.com/ep1.mp3"/>
+  </entry>
+</feed>
+""")
+    
+    result = downloader.download_rss("https://example.com/atom.xml")
+    
+    assert result["title"] == "Atom Podcast"
+    assert [episode["audio_url"] for episode in result["episodes"]] == ["https://example.com/ep1.mp3"]
+
 @patch("podcleaner.services.downloader.PodcastDownloader.download")
 def test_handle_download_request(mock_download, downloader):
     """Test handling of download requests."""
@@ -275,4 +290,23 @@ def test_start_and_stop(downloader):
     downloader.stop()
     
     # Verify running flag
-    assert downloader.running is False 
\ No newline at end of file
+    assert downloader.running is False 
+def test_download_requests_run_concurrently(downloader):
+    """Test that with download_concurrency > 1 episodes download in parallel off the broker thread."""
+    downloader.audio_config.download_concurrency = 2
+    barrier = threading.Barrier(2, timeout=5)
+    
+    def download(url):
+        # Both downloads must be in flight at the same time to get past the barrier
+        barrier.wait()
+        return f"podcasts/{url[-1]}"
+    
+    downloader.start()
+    with patch.object(downloader, "download", side_effect=download):
+        for url in ("https://example.com/a", "https://example.com/b"):
+            downloader._handle_download_request(Message(topic=Topics.DOWNLOAD_REQUEST, data={"url": url}))
+        downloader.stop()
+    
+    topics = [call[0][0].topic for call in downloader.message_broker.publish.call_args_list]
+    assert topics == [Topics.DOWNLOAD_COMPLETE, Topics.DOWNLOAD_COMPLETE]
+    assert not downloader.files_in_process
@@ -2,13 +2,14 @@
 
 import os
 import pytest
-import tempfile
 import json
 import time
-import uuid
+from collections import defaultdict, deque
+from dataclasses import replace
 import requests
-import hashlib
-from unittest.mock import MagicMock, patch, ANY
+import shutil
+from pathlib import Path
+from unittest.mock import MagicMock
 
 from podcleaner.services.message_broker import MQTTMessageBroker, Message, Topics
 from podcleaner.services.transcriber import Transcriber
@@ -20,13 +21,40 @@ from podcleaner.services.object_storage import ObjectStorage
 from podcleaner.models import Transcript, Segment
 from podcleaner.config import Config, LLMConfig, AudioConfig, WebServerConfig, ObjectStorageConfig
 
+# Messages kept in MockMQTTBroker's publish history; older ones are dropped
+PUBLISH_HISTORY_LIMIT = 4096
+
 class MockMQTTBroker:
     """Test implementation of MQTT broker that doesn't connect to a real broker."""
     
     def __init__(self):
-        self.subscribers = {}
-        self.published_messages = []
+        self.subscribers = defaultdict(list)
+        # Recent publish history for debugging; assertions go through the topic and correlation indexes
+        self.published_messages = deque(maxlen=PUBLISH_HISTORY_LIMIT)
+        self._by_topic = defaultdict(list)
+        self._by_correlation = defaultdict(list)
         self.running = False
+        # Messages published by subscribers are queued and delivered by the outermost
+        # publish call, so a workflow runs as a loop rather than nested callbacks
+        self._queue = deque()
+        self._draining = False
+    
+    def clear(self):
+        """Forget the messages published so far."""
+        self.published_messages.clear()
+        self._by_topic.clear()
+        self._by_correlation.clear()
+    
+    def has_topic(self, topic):
+        """Whether any message was published on a topic."""
+        return bool(self._by_topic.get(topic))
+    
+    def messages_for(self, topic, correlation_id=None):
+        """Messages published on a topic, optionally only those of one correlation id."""
+        messages = self._by_topic.get(topic, [])
+        if correlation_id is None:
+            return messages
+        return [msg for msg in self._by_correlation.get(correlation_id, []) if msg.topic == topic]
     
     def start(self):
         self.running = True
@@ -35,17 +63,29 @@ class MockMQTTBroker:
         self.running = False
     
     def subscribe(self, topic, callback):
-        if topic not in self.subscribers:
-            self.subscribers[topic] = []
         self.subscribers[topic].append(callback)
     
     def publish(self, message):
-        self.published_messages.append(message)
+        self._queue.append(message)
+        if self._draining:
+            return
         
-        # Call subscribers for this topic
-        if message.topic in self.subscribers:
-            for callback in self.subscribers[message.topic]:
-                callback(message)
+        self._draining = True
+        try:
+            while self._queue:
+                message = self._queue.popleft()
+                self.published_messages.append(message)
+                self._by_topic[message.topic].append(message)
+                self._by_correlation[message.correlation_id].append(message)
+                
+                # Call subscribers for this topic
+                subscribers = self.subscribers.get(message.topic)
+                if subscribers:
+                    for callback in subscribers:
+                        callback(message)
+        finally:
+            self._queue.clear()
+            self._draining = False
 
 class MockResponse:
     """Mock HTTP response"""
@@ -60,167 +100,162 @@ class MockResponse:
         if not self.ok:
             raise requests.exceptions.HTTPError(f"HTTP Error: {self.status_code}")
 
+# Transcript file written next to each temporary audio file, serialized once
+_CANNED_TRANSCRIPT_FILE_JSON = json.dumps(Transcript(segments=[
+    Segment(id=0, text="This is regular content", start=0.0, end=5.0, is_ad=False),
+    Segment(id=1, text="This is an advertisement", start=5.0, end=10.0, is_ad=True),
+    Segment(id=2, text="Buy our product", start=10.0, end=15.0, is_ad=True),
+    Segment(id=3, text="Back to regular content", start=15.0, end=20.0, is_ad=False),
+]).to_dict())
+
+@pytest.fixture(scope="session")
+def transcript_template(tmp_path_factory):
+    """Write the canned transcript file once per session."""
+    path = tmp_path_factory.mktemp("templates") / "audio.mp3.transcript.json"
+    path.write_text(_CANNED_TRANSCRIPT_FILE_JSON)
+    return path
+
 @pytest.fixture
-def temp_audio_file():
-    """Create a temporary audio file."""
-    fd, path = tempfile.mkstemp(suffix=".mp3")
-    os.close(fd)
-    
-    # Create transcript file
-    transcript = Transcript(segments=[
-        Segment(id=0, text="This is regular content", start=0.0, end=5.0, is_ad=False),
-        Segment(id=1, text="This is an advertisement", start=5.0, end=10.0, is_ad=True),
-        Segment(id=2, text="Buy our product", start=10.0, end=15.0, is_ad=True),
-        Segment(id=3, text="Back to regular content", start=15.0, end=20.0, is_ad=False),
-    ])
-    transcript_path = f"{path}.transcript.json"
-    with open(transcript_path, 'w') as f:
-        json.dump(transcript.to_dict(), f)
-    
-    yield path
-    
-    # Cleanup
-    if os.path.exists(path):
-        os.unlink(path)
-    if os.path.exists(transcript_path):
-        os.unlink(transcript_path)
-    
-    # Also cleanup output file if it exists
-    output_path = f"{path}.clean.mp3"
-    if os.path.exists(output_path):
-        os.unlink(output_path)
+def temp_audio_file(tmp_path, transcript_template):
+    """Create a temporary audio file with its transcript; pytest removes its directory."""
+    path = tmp_path / "audio.mp3"
+    path.touch()
+    # Services replace transcript files rather than writing into them, so a hard link is safe
+    transcript_path = tmp_path / "audio.mp3.transcript.json"
+    try:
+        os.link(transcript_template, transcript_path)
+    except OSError:
+        shutil.copyfile(transcript_template, transcript_path)
+    return str(path)
 
 @pytest.fixture
 def mock_broker():
     """Create a test message broker."""
     return MockMQTTBroker()
 
-@pytest.fixture
+# Transcript returned by the mocked transcriber; services only read it
+_CANNED_TRANSCRIPT = Transcript(segments=[
+    Segment(id=0, text="This is regular content", start=0.0, end=5.0, is_ad=False),
+    Segment(id=1, text="This is an advertisement", start=5.0, end=10.0, is_ad=False),
+    Segment(id=2, text="Buy our product", start=10.0, end=15.0, is_ad=False),
+    Segment(id=3, text="Back to regular content", start=15.0, end=20.0, is_ad=False),
+])
+
+@pytest.fixture(scope="module")
 def mock_transcribe():
     """Mock the transcribe function."""
-    transcript = Transcript(segments=[
-        Segment(id=0, text="This is regular content", start=0.0, end=5.0, is_ad=False),
-        Segment(id=1, text="This is an advertisement", start=5.0, end=10.0, is_ad=False),
-        Segment(id=2, text="Buy our product", start=10.0, end=15.0, is_ad=False),
-        Segment(id=3, text="Back to regular content", start=15.0, end=20.0, is_ad=False),
-    ])
-    
-    with patch.object(Transcriber, 'transcribe', return_value=transcript):
-        yield transcript
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(Transcriber, "transcribe", lambda self, *args, **kwargs: _CANNED_TRANSCRIPT)
+        yield _CANNED_TRANSCRIPT
+
+def _fail_transcription(self, *args, **kwargs):
+    """Stand-in for Transcriber.transcribe that always fails."""
+    raise Exception("Transcription failed")
 
 @pytest.fixture
-def mock_transcribe_failure():
+def mock_transcribe_failure(monkeypatch):
     """Mock the transcribe function to fail."""
-    with patch.object(Transcriber, 'transcribe', side_effect=Exception("Transcription failed")):
-        yield
+    monkeypatch.setattr(Transcriber, "transcribe", _fail_transcription)
 
-@pytest.fixture
+# Ids of the segments the mocked ad detector marks as ads
+_AD_SEGMENT_IDS = frozenset((1, 2))
+
+def _mark_ads(self, transcript):
+    """Stand-in for AdDetector.detect_ads returning a copy with segments 1 and 2 marked as ads."""
+    return Transcript(segments=[replace(segment, is_ad=segment.id in _AD_SEGMENT_IDS)
+                                for segment in transcript.segments])
+
+@pytest.fixture(scope="module")
 def mock_detect_ads():
     """Mock the detect_ads function."""
-    def side_effect(transcript):
-        # Mark segments 1 and 2 as ads
-        for segment in transcript.segments:
-            if segment.id in [1, 2]:
-                segment.is_ad = True
-        return transcript
-    
-    with patch.object(AdDetector, 'detect_ads', side_effect=side_effect):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(AdDetector, "detect_ads", _mark_ads)
         yield
 
 @pytest.fixture
-def mock_detect_no_ads():
+def mock_detect_no_ads(monkeypatch):
     """Mock the detect_ads function to find no ads."""
-    def side_effect(transcript):
-        # Don't mark any segments as ads
-        return transcript
-    
-    with patch.object(AdDetector, 'detect_ads', side_effect=side_effect):
-        yield
+    # Don't mark any segments as ads
+    monkeypatch.setattr(AdDetector, "detect_ads", lambda self, transcript: transcript)
+
+def _mark_every_other_ad(self, transcript):
+    """Stand-in for AdDetector.detect_ads marking every other segment as an ad."""
+    for segment in transcript.segments:
+        segment.is_ad = segment.id % 2 == 1
+    return transcript
 
 @pytest.fixture
-def mock_detect_multiple_ads():
+def mock_detect_multiple_ads(monkeypatch):
     """Mock the detect_ads function to find multiple ad segments."""
-    def side_effect(transcript):
-        # Mark every other segment as an ad
-        for segment in transcript.segments:
-            segment.is_ad = segment.id % 2 == 1
-        return transcript
-    
-    with patch.object(AdDetector, 'detect_ads', side_effect=side_effect):
-        yield
+    monkeypatch.setattr(AdDetector, "detect_ads", _mark_every_other_ad)
 
-@pytest.fixture
+def _write_empty_output(self, input_file, output_file, transcript):
+    """Stand-in for AudioProcessor.remove_ads creating an empty output file."""
+    Path(output_file).touch()
+    return output_file
+
+@pytest.fixture(scope="module")
 def mock_process_audio():
     """Mock the process_audio function."""
-    def side_effect(input_file, output_file, transcript):
-        # Just create an empty output file
-        with open(output_file, 'w') as f:
-            f.write('')
-        return output_file
-    
-    with patch.object(AudioProcessor, 'remove_ads', side_effect=side_effect):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(AudioProcessor, "remove_ads", _write_empty_output)
         yield
 
+def _fake_download(self, url):
+    """Stand-in for PodcastDownloader.download recording the URL like a real download, without downloading."""
+    with self.file_lock:
+        self.processed_files.add(url)
+    return self._generate_file_path(url)
+
+_handle_download_request = PodcastDownloader._handle_download_request
+
+def _handle_download_request_reporting_processed(self, message):
+    """Download request handler that answers for already processed URLs with an already_processed flag."""
+    url = message.data.get("url")
+    if url in self.processed_files:
+        self.message_broker.publish(Message(
+            topic=Topics.DOWNLOAD_COMPLETE,
+            data={
+                "url": url,
+                "file_path": self._generate_file_path(url),
+                "already_processed": True
+            },
+            correlation_id=message.correlation_id
+        ))
+        return
+    
+    # Otherwise call the original handler
+    return _handle_download_request(self, message)
+
 @pytest.fixture
-def mock_download():
+def mock_download(monkeypatch):
     """Mock the download function."""
-    def side_effect(url):
-        # Create a storage key
-        hash_key = hashlib.md5(url.encode()).hexdigest()
-        storage_key = f"podcasts/{hash_key}"
-        return storage_key
-    
-    with patch.object(PodcastDownloader, 'download', side_effect=side_effect):
-        # Patch the _handle_download_request method to ensure already_processed is in the message
-        original_handler = PodcastDownloader._handle_download_request
-        
-        def patched_handler(self, message):
-            url = message.data.get("url")
-            correlation_id = message.correlation_id
-            
-            # If URL is already in processed_files, return with already_processed flag
-            if url in self.processed_files:
-                storage_key = self._generate_file_path(url)
-                self.message_broker.publish(Message(
-                    topic=Topics.DOWNLOAD_COMPLETE,
-                    data={
-                        "url": url,
-                        "file_path": storage_key,
-                        "already_processed": True
-                    },
-                    correlation_id=correlation_id
-                ))
-                return
-            
-            # Otherwise call the original handler
-            return original_handler(self, message)
-        
-        with patch.object(PodcastDownloader, '_handle_download_request', patched_handler):
-            yield
+    monkeypatch.setattr(PodcastDownloader, "download", _fake_download)
+    monkeypatch.setattr(PodcastDownloader, "_handle_download_request", _handle_download_request_reporting_processed)
+
+def _fail_download(self, url):
+    """Stand-in for PodcastDownloader.download that always fails."""
+    raise DownloadError("Download failed")
 
 @pytest.fixture
-def mock_download_failure():
+def mock_download_failure(monkeypatch):
     """Mock the download function to fail."""
-    with patch.object(PodcastDownloader, 'download', 
-                     side_effect=DownloadError("Download failed")):
-        yield
+    monkeypatch.setattr(PodcastDownloader, "download", _fail_download)
 
 @pytest.fixture
-def mock_requests_get():
-    """Mock the requests.get function."""
-    with patch('requests.get') as mock_get:
-        mock_get.return_value = MockResponse(status_code=200, content=b"fake audio data")
-        yield mock_get
+def mock_requests_get(monkeypatch):
+    """Mock HTTP GET requests."""
+    monkeypatch.setattr(requests.Session, "get",
+                        lambda self, *args, **kwargs: MockResponse(status_code=200, content=b"fake audio data"))
 
 @pytest.fixture
-def mock_requests_get_fail():
-    """Mock the requests.get function to fail."""
-    with patch('requests.get') as mock_get:
-        mock_get.return_value = MockResponse(status_code=404, content=b"Not found")
-        yield mock_get
+def mock_requests_get_fail(monkeypatch):
+    """Mock HTTP GET requests to fail."""
+    monkeypatch.setattr(requests.Session, "get",
+                        lambda self, *args, **kwargs: MockResponse(status_code=404, content=b"Not found"))
 
 @pytest.fixture
-def mock_object_storage():
+def mock_object_storage(monkeypatch):
     """Mock object storage service."""
     storage_mock = MagicMock()
     storage_mock.upload.return_value = "test-file-id"
@@ -228,21 +263,21 @@ def mock_object_storage():
     storage_mock.get_public_url.return_value = "http://minio:9000/podcleaner/test-file-id"
     storage_mock.exists.return_value = True
 
-    with patch.object(ObjectStorage, 'adapter', storage_mock, create=True):
-        yield storage_mock
+    monkeypatch.setattr(ObjectStorage, "adapter", storage_mock, raising=False)
+    return storage_mock
 
 @pytest.fixture
-def full_config():
-    """Create a complete config object for testing."""
+def full_config(tmp_path):
+    """Create a complete config object for testing, storing files in the test's own directory."""
     return Config(
         llm=LLMConfig(model_name="test-model", api_key="test-key"),
-        audio=AudioConfig(min_duration=1.0, max_gap=0.5, download_dir="/tmp"),
+        audio=AudioConfig(min_duration=1.0, max_gap=0.5, download_dir=str(tmp_path)),
         log_level="INFO",
         web_server=WebServerConfig(host="localhost", port=8081),
         object_storage=ObjectStorageConfig(
             provider="local",
             bucket_name="podcleaner",
-            local_storage_path="/tmp"
+            local_storage_path=str(tmp_path)
         )
     )
 
@@ -250,6 +285,11 @@ def full_config():
 def services(mock_broker, mock_transcribe, mock_detect_ads, mock_process_audio, 
              mock_download, mock_object_storage, full_config):
     """Create and start all services."""
+    # The mocked transcript never changes, so serialize it once rather than per message
+    transcript_dict = mock_transcribe.to_dict() if isinstance(mock_transcribe, Transcript) else {}
+    ad_segments = ([segment.dict() for segment in mock_transcribe.segments if segment.is_ad]
+                   if isinstance(mock_transcribe, Transcript) else [])
+    
     # Create services
     transcriber = Transcriber(
         message_broker=mock_broker, 
@@ -284,7 +324,7 @@ def services(mock_broker, mock_transcribe, mock_detect_ads, mock_process_audio,
             data={
                 "url": message.data.get("url"),
                 "file_path": message.data.get("file_path"),
-                "transcript": mock_transcribe.to_dict() if isinstance(mock_transcribe, Transcript) else {}
+                "transcript": transcript_dict
             },
             correlation_id=message.correlation_id
         ))
@@ -297,8 +337,7 @@ def services(mock_broker, mock_transcribe, mock_detect_ads, mock_process_audio,
                 "url": message.data.get("url"),
                 "file_path": message.data.get("file_path"),
                 "transcript": message.data.get("transcript", {}),
-                "ad_segments": [segment.dict() for segment in mock_transcribe.segments if segment.is_ad]
-                               if isinstance(mock_transcribe, Transcript) else []
+                "ad_segments": ad_segments
             },
             correlation_id=message.correlation_id
         ))
@@ -371,34 +410,29 @@ def test_end_to_end_workflow(services, temp_audio_file):
     ))
     
     # Check that transcribe request was processed
-    assert any(msg.topic == Topics.TRANSCRIBE_COMPLETE for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.TRANSCRIBE_COMPLETE), \
         "Transcription completion message not published"
     
     # Check that ad detection request was triggered
-    assert any(msg.topic == Topics.AD_DETECTION_REQUEST for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.AD_DETECTION_REQUEST), \
         "Ad detection request not published"
     
     # Check that ad detection completion was triggered
-    assert any(msg.topic == Topics.AD_DETECTION_COMPLETE for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.AD_DETECTION_COMPLETE), \
         "Ad detection completion message not published"
     
     # Check that audio processing request was triggered
-    assert any(msg.topic == Topics.AUDIO_PROCESSING_REQUEST for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.AUDIO_PROCESSING_REQUEST), \
         "Audio processing request not published"
     
     # Check that audio processing completion was triggered
-    assert any(msg.topic == Topics.AUDIO_PROCESSING_COMPLETE for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.AUDIO_PROCESSING_COMPLETE), \
         "Audio processing completion message not published"
     
     # Check correlation ID was maintained throughout the workflow
-    for msg in broker.published_messages:
-        if msg.topic in [
-            Topics.TRANSCRIBE_COMPLETE,
-            Topics.AD_DETECTION_COMPLETE,
-            Topics.AUDIO_PROCESSING_COMPLETE
-        ]:
-            assert msg.correlation_id == "test-id", \
-                f"Correlation ID not maintained for {msg.topic}"
+    for topic in (Topics.TRANSCRIBE_COMPLETE, Topics.AD_DETECTION_COMPLETE, Topics.AUDIO_PROCESSING_COMPLETE):
+        assert len(broker.messages_for(topic, "test-id")) == len(broker.messages_for(topic)), \
+            f"Correlation ID not maintained for {topic}"
 
 def test_download_to_processing_workflow(services, mock_requests_get):
     """Test the complete workflow from download to processing."""
@@ -414,19 +448,19 @@ def test_download_to_processing_workflow(services, mock_requests_get):
     ))
     
     # Check that download request was processed
-    assert any(msg.topic == Topics.DOWNLOAD_COMPLETE for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.DOWNLOAD_COMPLETE), \
         "Download completion message not published"
     
     # Check that transcribe request was triggered
-    assert any(msg.topic == Topics.TRANSCRIBE_REQUEST for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.TRANSCRIBE_REQUEST), \
         "Transcription request not published"
         
     # Check full pipeline completion
-    assert any(msg.topic == Topics.TRANSCRIBE_COMPLETE for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.TRANSCRIBE_COMPLETE), \
         "Transcription completion message not published"
-    assert any(msg.topic == Topics.AD_DETECTION_COMPLETE for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.AD_DETECTION_COMPLETE), \
         "Ad detection completion message not published"
-    assert any(msg.topic == Topics.AUDIO_PROCESSING_COMPLETE for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.AUDIO_PROCESSING_COMPLETE), \
         "Audio processing completion message not published"
     
     # Check that URL was added to processed files
@@ -450,10 +484,7 @@ def test_already_processed_file(services, mock_requests_get):
     ))
     
     # Check that download complete message was published with already_processed flag
-    download_complete_messages = [
-        msg for msg in broker.published_messages 
-        if msg.topic == Topics.DOWNLOAD_COMPLETE
-    ]
+    download_complete_messages = broker.messages_for(Topics.DOWNLOAD_COMPLETE)
     assert any(
         msg.topic == Topics.DOWNLOAD_COMPLETE and 
         msg.data.get("already_processed", False) == True
@@ -473,14 +504,11 @@ def test_invalid_url(services, mock_requests_get_fail):
     ))
     
     # Check that download failed message was published
-    assert any(msg.topic == Topics.DOWNLOAD_FAILED for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.DOWNLOAD_FAILED), \
         "Download failed message not published"
     
     # Check error message in download failed message
-    download_failed_messages = [
-        msg for msg in broker.published_messages 
-        if msg.topic == Topics.DOWNLOAD_FAILED
-    ]
+    download_failed_messages = broker.messages_for(Topics.DOWNLOAD_FAILED)
     assert any(
         "error" in msg.data for msg in download_failed_messages
     ), "Error information not included in download failed message"
@@ -498,14 +526,11 @@ def test_failed_download(services, mock_download_failure, mock_requests_get):
     ))
     
     # Check that download failed message was published
-    assert any(msg.topic == Topics.DOWNLOAD_FAILED for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.DOWNLOAD_FAILED), \
         "Download failed message not published"
     
     # Check error message in download failed message
-    download_failed_messages = [
-        msg for msg in broker.published_messages 
-        if msg.topic == Topics.DOWNLOAD_FAILED
-    ]
+    download_failed_messages = broker.messages_for(Topics.DOWNLOAD_FAILED)
     assert any(
         "error" in msg.data for msg in download_failed_messages
     ), "Error information not included in download failed message"
@@ -522,15 +547,11 @@ def test_failed_transcription(services, mock_transcribe_failure, temp_audio_file
     ))
     
     # Check that transcription failed message was published
-    assert any(msg.topic == Topics.TRANSCRIBE_FAILED for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.TRANSCRIBE_FAILED), \
         "Transcription failed message not published"
     
     # Check that ad detection was not triggered
-    ad_detection_requests = [
-        msg for msg in broker.published_messages 
-        if msg.topic == Topics.AD_DETECTION_REQUEST and
-        msg.correlation_id == "test-transcribe-fail-id"
-    ]
+    ad_detection_requests = broker.messages_for(Topics.AD_DETECTION_REQUEST, "test-transcribe-fail-id")
     assert len(ad_detection_requests) == 0, \
         "Ad detection request was published despite transcription failure"
 
@@ -539,7 +560,7 @@ def test_no_ads_detected(services, mock_detect_no_ads, temp_audio_file):
     broker = services['broker']
     
     # Clear published messages to make assertions cleaner
-    broker.published_messages = []
+    broker.clear()
     
     # Simulate starting the workflow with a transcription request
     broker.publish(Message(
@@ -549,21 +570,15 @@ def test_no_ads_detected(services, mock_detect_no_ads, temp_audio_file):
     ))
     
     # Check that ad detection completed successfully
-    assert any(msg.topic == Topics.AD_DETECTION_COMPLETE for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.AD_DETECTION_COMPLETE), \
         "Ad detection completion message not published"
     
     # Check that audio processing was still triggered
-    assert any(msg.topic == Topics.AUDIO_PROCESSING_REQUEST for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.AUDIO_PROCESSING_REQUEST), \
         "Audio processing request not published"
     
-    # Get the transcript data from the audio processing request
-    audio_processing_requests = [
-        msg for msg in broker.published_messages 
-        if msg.topic == Topics.AUDIO_PROCESSING_REQUEST
-    ]
-    
     # Check that no segments are marked as ads
-    for request in audio_processing_requests:
+    for request in broker.messages_for(Topics.AUDIO_PROCESSING_REQUEST):
         transcript_data = request.data.get("transcript", {})
         if "segments" in transcript_data:
             for segment in transcript_data["segments"]:
@@ -575,7 +590,7 @@ def test_multiple_ad_segments(services, mock_detect_multiple_ads, temp_audio_fil
     broker = services['broker']
     
     # Clear published messages to make assertions cleaner
-    broker.published_messages = []
+    broker.clear()
     
     # Simulate starting the workflow with a transcription request
     broker.publish(Message(
@@ -585,36 +600,26 @@ def test_multiple_ad_segments(services, mock_detect_multiple_ads, temp_audio_fil
     ))
     
     # Check that ad detection completed successfully
-    assert any(msg.topic == Topics.AD_DETECTION_COMPLETE for msg in broker.published_messages), \
+    assert broker.has_topic(Topics.AD_DETECTION_COMPLETE), \
         "Ad detection completion message not published"
     
-    # Get the transcript data from the audio processing request
-    audio_processing_requests = [
-        msg for msg in broker.published_messages 
-        if msg.topic == Topics.AUDIO_PROCESSING_REQUEST
-    ]
-    
-    # Check that alternate segments are marked as ads
-    for request in audio_processing_requests:
+    # Check that alternate segments are marked as ads, in one pass over each transcript
+    for request in broker.messages_for(Topics.AUDIO_PROCESSING_REQUEST):
         transcript_data = request.data.get("transcript", {})
         if "segments" in transcript_data:
-            segments = transcript_data["segments"]
-            # Check at least one segment is marked as ad
-            ad_segments = [s for s in segments if s.get("is_ad", False)]
-            assert len(ad_segments) > 0, "No segments marked as ads"
-            
-            # Check for the pattern (every other segment is an ad)
-            for i, segment in enumerate(segments):
-                expected_is_ad = i % 2 == 1
-                assert segment.get("is_ad", False) == expected_is_ad, \
-                    f"Segment {i} has incorrect is_ad value"
+            saw_ad = False
+            for i, segment in enumerate(transcript_data["segments"]):
+                is_ad = segment.get("is_ad", False)
+                assert is_ad == (i % 2 == 1), f"Segment {i} has incorrect is_ad value"
+                saw_ad = saw_ad or is_ad
+            assert saw_ad, "No segments marked as ads"
 
 def test_concurrent_processing(services, mock_requests_get):
     """Test concurrent processing of multiple files."""
     broker = services['broker']
     
-    # Generate unique correlation IDs
-    correlation_ids = [str(uuid.uuid4()) for _ in range(3)]
+    # Correlation IDs only need to be unique within the test
+    correlation_ids = [f"corr-{i}" for i in range(3)]
     
     # Simulate multiple concurrent download requests
     urls = [
@@ -631,33 +636,25 @@ def test_concurrent_processing(services, mock_requests_get):
     
     # Check that all downloads completed
     for correlation_id in correlation_ids:
-        download_complete_messages = [
-            msg for msg in broker.published_messages 
-            if msg.topic == Topics.DOWNLOAD_COMPLETE and 
-            msg.correlation_id == correlation_id
-        ]
+        download_complete_messages = broker.messages_for(Topics.DOWNLOAD_COMPLETE, correlation_id)
         assert len(download_complete_messages) > 0, \
             f"Download completion message not published for {correlation_id}"
     
     # Check that all files were processed through the entire pipeline
     for correlation_id in correlation_ids:
-        audio_processing_complete_messages = [
-            msg for msg in broker.published_messages 
-            if msg.topic == Topics.AUDIO_PROCESSING_COMPLETE and 
-            msg.correlation_id == correlation_id
-        ]
+        audio_processing_complete_messages = broker.messages_for(Topics.AUDIO_PROCESSING_COMPLETE, correlation_id)
         assert len(audio_processing_complete_messages) > 0, \
             f"Audio processing completion message not published for {correlation_id}"
 
-@patch('podcleaner.services.web_server.WebServer.generate_rss_xml')
-def test_rss_feed_generation(mock_generate_rss, services, mock_requests_get):
+def test_rss_feed_generation(services, mock_requests_get, monkeypatch):
     """Test RSS feed generation with cleaned episodes."""
     web_server = services['web_server']
     broker = services['broker']
     object_storage = services['object_storage']
     
-    # Mock generate_rss_xml to return a valid RSS feed
-    mock_generate_rss.return_value = """<?xml version="1.0" encoding="UTF-8"?>
+    # Stub generate_rss_xml to return a valid RSS feed, recording the podcasts it was given
+    rss_calls = []
+    canned_rss = """<?xml version="1.0" encoding="UTF-8"?>
     <rss version="2.0">
         <channel>
             <title>Test Podcast</title>
@@ -670,6 +667,8 @@ def test_rss_feed_generation(mock_generate_rss, services, mock_requests_get):
             </item>
         </channel>
     </rss>"""
+    monkeypatch.setattr(WebServer, "generate_rss_xml",
+                        lambda self, podcast_info, base_url=None: rss_calls.append(podcast_info) or canned_rss)
     
     # Process a file first
     url = "https://example.com/podcast1.mp3"
@@ -683,11 +682,8 @@ def test_rss_feed_generation(mock_generate_rss, services, mock_requests_get):
     ))
     
     # Verify processing completed
-    assert any(
-        msg.topic == Topics.AUDIO_PROCESSING_COMPLETE and 
-        msg.correlation_id == "test-rss-id"
-        for msg in broker.published_messages
-    ), "Audio processing did not complete"
+    assert broker.messages_for(Topics.AUDIO_PROCESSING_COMPLETE, "test-rss-id"), \
+        "Audio processing did not complete"
     
     # Now test RSS generation
     rss_xml = web_server.generate_rss_xml({
@@ -706,7 +702,7 @@ def test_rss_feed_generation(mock_generate_rss, services, mock_requests_get):
     })
     
     # Check RSS was generated
-    assert mock_generate_rss.called, "generate_rss_xml method not called"
+    assert rss_calls, "generate_rss_xml method not called"
     assert "<title>Test Podcast</title>" in rss_xml, "Podcast title not in RSS"
     assert "<title>Episode 1</title>" in rss_xml, "Episode title not in RSS"
     assert "enclosure url=" in rss_xml, "Enclosure URL not in RSS"
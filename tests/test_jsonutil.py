@@ -0,0 +1,21 @@
+"""Tests for the shared JSON helpers."""
+
+import json
+from unittest.mock import patch
+
+from podcleaner import jsonutil
+
+def test_dumps_and_loads_with_and_without_orjson():
+    """Test that both serializers produce the same UTF-8 JSON documents."""
+    obj = {"text": "Grünstrom", 1: [0.5, True, None]}
+    expected = {"text": "Grünstrom", "1": [0.5, True, None]}
+
+    with patch.object(jsonutil, "orjson", None):
+        plain = jsonutil.dumps(obj)
+        indented = jsonutil.dumps(obj, indent=True)
+        assert jsonutil.loads(plain) == expected
+
+    assert "Grünstrom".encode() in plain
+    assert json.loads(indented) == expected
+    assert json.loads(jsonutil.dumps(obj)) == expected
+    assert jsonutil.loads(jsonutil.dumps(obj, indent=True).decode()) == expected
@@ -92,4 +92,13 @@ def test_mqtt_broker_publish(mock_mqtt_client):
     
     broker.publish(message)
     
-    mock_mqtt_client.publish.assert_called_once() 
\ No newline at end of file
+    mock_mqtt_client.publish.assert_called_once() 
+
+def test_message_is_immutable_and_round_trips():
+    """Test that messages cannot be changed after creation and survive a dict round trip."""
+    message = Message(topic=Topics.DOWNLOAD_REQUEST, data={"url": "http://example.com/a.mp3"}, correlation_id="c-1")
+    
+    with pytest.raises(AttributeError):
+        message.topic = Topics.DOWNLOAD_COMPLETE
+    assert not hasattr(message, "__dict__")
+    assert Message.from_dict(message.to_dict()) == message
@@ -0,0 +1,90 @@
+"""Tests for the domain models."""
+
+import os
+
+import pytest
+from unittest.mock import patch
+
+from podcleaner.models import Segment, Transcript
+
+@pytest.fixture
+def transcript():
+    """Create a transcript with a mix of ad and non-ad segments."""
+    return Transcript(segments=[
+        Segment(id=0, text="Welcome to the show", start=0.0, end=4.52, is_ad=False),
+        Segment(id=1, text="This episode is sponsored by", start=4.52, end=7.1, is_ad=True),
+        Segment(id=2, text="Use code PODCAST for 15 percent off", start=7.1, end=11.94, is_ad=True),
+        Segment(id=3, text="Back to the interview", start=11.94, end=15.0, is_ad=False),
+    ])
+
+def test_save_and_load_json(transcript, tmp_path):
+    """Test that a transcript survives a JSON round trip."""
+    path = str(tmp_path / "episode.mp3.transcript.json")
+
+    transcript.save(path)
+    loaded = Transcript.load(path)
+
+    assert loaded.segments == transcript.segments
+    assert loaded.processed_at == transcript.processed_at
+
+def test_save_and_load_packed(transcript, tmp_path):
+    """Test that a transcript survives a packed columnar round trip."""
+    pytest.importorskip("msgpack")
+    path = str(tmp_path / "episode.mp3.transcript.mp")
+
+    transcript.save(path)
+    loaded = Transcript.load(path)
+
+    assert loaded.segments == transcript.segments
+    assert loaded.processed_at == transcript.processed_at
+
+def test_packed_format_needs_msgpack(transcript, tmp_path):
+    """Test that saving a packed transcript fails clearly without msgpack while JSON still works."""
+    with patch("podcleaner.models.msgpack", None):
+        with pytest.raises(ImportError):
+            transcript.save(str(tmp_path / "episode.mp3.transcript.mp"))
+
+        path = str(tmp_path / "episode.mp3.transcript.json")
+        transcript.save(path)
+        assert Transcript.load(path).segments == transcript.segments
+
+def test_save_and_load_compressed(transcript, tmp_path):
+    """Test that a transcript survives a zstd-compressed round trip."""
+    pytest.importorskip("zstandard")
+    path = str(tmp_path / "episode.mp3.transcript.json.zst")
+
+    transcript.save(path)
+    loaded = Transcript.load(path)
+
+    assert loaded.segments == transcript.segments
+    assert loaded.processed_at == transcript.processed_at
+
+def test_compressed_format_needs_zstandard(transcript, tmp_path):
+    """Test that saving a compressed transcript fails clearly without zstandard while JSON still works."""
+    with patch("podcleaner.models.zstandard", None):
+        with pytest.raises(ImportError):
+            transcript.save(str(tmp_path / "episode.mp3.transcript.json.zst"))
+
+        path = str(tmp_path / "episode.mp3.transcript.json")
+        transcript.save(path)
+        assert Transcript.load(path).segments == transcript.segments
+
+def test_transcript_orders_segments_by_start():
+    """Test that a transcript keeps its segments in start-time order without reordering the caller's list."""
+    segments = [
+        Segment(id=1, text="second", start=2.0, end=3.0),
+        Segment(id=0, text="first", start=0.0, end=2.0),
+    ]
+    transcript = Transcript(segments=segments)
+    
+    assert [seg.id for seg in transcript.segments] == [0, 1]
+    assert [seg.id for seg in segments] == [1, 0]
+
+def test_save_replaces_file_atomically(transcript, tmp_path):
+    """Test that saving leaves no temporary files and replaces the previous transcript."""
+    path = str(tmp_path / "episode.transcript.json")
+    Transcript(segments=[]).save(path)
+    transcript.save(path)
+    
+    assert os.listdir(tmp_path) == ["episode.transcript.json"]
+    assert len(Transcript.load(path).segments) == len(transcript.segments)
@@ -116,6 +116,21 @@ def test_local_storage_download_to_memory(local_storage, temp_dir):
     assert isinstance(result, bytes)
     assert result == b"memory test"
 
+def test_local_storage_open_stream_and_stat(local_storage, temp_dir):
+    """Test streaming a file and reading its metadata from local storage."""
+    key = "test/stream.txt"
+    storage_path = os.path.join(temp_dir, key)
+    os.makedirs(os.path.dirname(storage_path), exist_ok=True)
+    with open(storage_path, "w") as f:
+        f.write("stream test")
+    
+    with local_storage.open_stream(key) as stream:
+        assert stream.read() == b"stream test"
+    assert local_storage.stat(key)["size"] == len("stream test")
+    
+    with pytest.raises(ObjectStorageError):
+        local_storage.stat("test/missing.txt")
+
 def test_local_storage_list_objects(local_storage, temp_dir):
     """Test listing objects in local storage."""
     # Create test files
@@ -179,10 +179,11 @@ def test_transcriber_service_init(
         mock_args.mqtt_username = None
         mock_args.mqtt_password = None
         mock_args.log_level = "INFO"  # Add a proper log level value
+        mock_args.model_name = None
 
         with patch('podcleaner.run_service.parse_args', return_value=mock_args):
             with patch('podcleaner.run_service.MQTTMessageBroker', return_value=mqtt_mock):
-                with patch('podcleaner.run_service.Transcriber', return_value=transcriber_mock):
+                with patch('podcleaner.run_service.Transcriber', return_value=transcriber_mock) as transcriber_cls:
                     with patch('sys.exit') as mock_exit:  # Prevent actual system exit
                         # Since we're using the mock_sleep fixture, we don't need to expect KeyboardInterrupt here
                         service_main()
@@ -190,6 +191,14 @@ def test_transcriber_service_init(
     # Check that both the broker and transcriber were started
     mqtt_mock.start.assert_called_once()
     transcriber_mock.start.assert_called_once()
+    
+    # The transcriber is built from the transcriber section of the config
+    transcriber_config = mock_config.transcriber
+    kwargs = transcriber_cls.call_args.kwargs
+    assert kwargs["model_name"] is transcriber_config.model_name
+    assert kwargs["num_workers"] is transcriber_config.num_workers
+    assert kwargs["cache_format"] is transcriber_config.cache_format
+    assert kwargs["shared_cache_dir"] is transcriber_config.shared_cache_dir
 
 def test_ad_detector_service_init(
     mock_config, 
@@ -435,7 +444,7 @@ def test_downloader_duplicate_prevention():
         mock_object_storage_class.return_value = mock_object_storage
         
         # Also need to mock the actual requests call in case it tries to check the URL
-        with patch('requests.get') as mock_requests_get:
+        with patch('requests.Session.get') as mock_requests_get:
             # Setup mock response
             mock_response = MagicMock()
             mock_response.status_code = 200
@@ -480,4 +489,64 @@ def test_downloader_duplicate_prevention():
                 assert published_message.topic == Topics.DOWNLOAD_COMPLETE
                 
                 # Verify the URL is in the processed_files set
-                assert test_url in downloader.processed_files 
\ No newline at end of file
+                assert test_url in downloader.processed_files 
+def test_audio_processor_merge_segments():
+    """Test that close ad segments are merged and short ones dropped."""
+    config_mock = MagicMock(min_duration=1.0, max_gap=0.5)
+    audio_processor = AudioProcessor(config=config_mock)
+    
+    merged = audio_processor._merge_segments([(5.0, 6.0), (0.0, 4.0), (4.3, 4.8), (10.0, 10.5)])
+    
+    assert merged == [(0.0, 6.0)]
+    assert audio_processor._merge_segments([]) == []
+
+def test_audio_processor_remove_ads_with_stream_copy(tmp_path):
+    """Test that ads are cut with ffmpeg's concat demuxer when ffmpeg is available."""
+    from podcleaner.models import Segment, Transcript
+    audio_processor = AudioProcessor(config=MagicMock(min_duration=1.0, max_gap=0.5))
+    transcript = Transcript(segments=[
+        Segment(id=0, text="Show", start=0.0, end=2.0, is_ad=False),
+        Segment(id=1, text="Ad", start=2.0, end=4.0, is_ad=True),
+        Segment(id=2, text="Show", start=4.0, end=10.0, is_ad=False),
+    ])
+    concat_lists = []
+    
+    def run(cmd, **kwargs):
+        with open(cmd[cmd.index("-i") + 1]) as f:
+            concat_lists.append(f.read())
+    
+    with patch('shutil.which', return_value="/usr/bin/ffmpeg"), \
+         patch('subprocess.run', side_effect=run) as mock_run, \
+         patch('podcleaner.services.audio_processor.AudioSegment') as mock_audio_segment:
+        result = audio_processor.remove_ads(str(tmp_path / "in.mp3"), str(tmp_path / "in_clean.mp3"), transcript)
+    
+    assert result == str(tmp_path / "in_clean.mp3")
+    assert mock_run.call_args[0][0][-3:] == ["-c", "copy", result]
+    mock_audio_segment.from_file.assert_not_called()
+    assert concat_lists[0].splitlines()[2:] == [
+        "outpoint 2.000",
+        f"file '{tmp_path / 'in.mp3'}'",
+        "inpoint 4.000",
+    ]
+    assert not list(tmp_path.glob("*.ffconcat"))
+
+def test_audio_processor_silence_check_samples_windows():
+    """Test that the silence check decodes short windows and stops at the first loud one."""
+    np = pytest.importorskip("numpy")
+    quiet = np.zeros(800, dtype=np.int16).tobytes()
+    loud = np.full(800, 8000, dtype=np.int16).tobytes()
+    decoded = iter([quiet, loud])
+    
+    def run(cmd, **kwargs):
+        if cmd[0].endswith("ffprobe"):
+            return MagicMock(stdout="3600.0\n", returncode=0)
+        return MagicMock(stdout=next(decoded), returncode=0)
+    
+    with patch('shutil.which', side_effect=lambda name: f"/usr/bin/{name}"), \
+         patch('subprocess.run', side_effect=run) as mock_run:
+        assert AudioProcessor.is_mostly_silent("episode.mp3") is False
+    
+    decodes = [call[0][0] for call in mock_run.call_args_list[1:]]
+    assert len(decodes) == 2
+    assert [cmd[cmd.index("-ss") + 1] for cmd in decodes] == ["0.000", "897.500"]
+    assert all(cmd[cmd.index("-t") + 1] == "10.0" for cmd in decodes)
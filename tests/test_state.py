@@ -0,0 +1,43 @@
+"""Tests for the persistent processing state."""
+
+import json
+
+from podcleaner.state import PathSet, open_path_set
+
+def test_path_set_persists_across_reopen(tmp_path):
+    """Test that added and discarded paths survive reopening the database."""
+    paths = open_path_set(str(tmp_path), "processed")
+    paths.add("/podcasts/a.mp3")
+    paths.add("/podcasts/b.mp3")
+    paths.add("/podcasts/a.mp3")
+    paths.discard("/podcasts/b.mp3")
+    paths.close()
+    
+    reopened = open_path_set(str(tmp_path), "processed")
+    
+    assert "/podcasts/a.mp3" in reopened
+    assert "/podcasts/b.mp3" not in reopened
+    assert list(reopened) == ["/podcasts/a.mp3"]
+
+def test_path_sets_of_different_kinds_are_separate(tmp_path):
+    """Test that sets sharing a database do not see each other's paths."""
+    db_path = str(tmp_path / "state.db")
+    files = PathSet(db_path, "files")
+    feeds = PathSet(db_path, "feeds")
+    files.add("https://example.com/episode.mp3")
+    
+    assert "https://example.com/episode.mp3" not in feeds
+    assert len(feeds) == 0
+
+def test_path_set_imports_legacy_json_once(tmp_path):
+    """Test that the former JSON list is imported into an empty set and not re-imported later."""
+    legacy = tmp_path / "processed_files.json"
+    legacy.write_text(json.dumps(["/podcasts/a.mp3", "/podcasts/b.mp3"]))
+    
+    paths = open_path_set(str(tmp_path), "processed", legacy_json_path=str(legacy))
+    assert len(paths) == 2
+    paths.discard("/podcasts/b.mp3")
+    paths.close()
+    
+    reopened = open_path_set(str(tmp_path), "processed", legacy_json_path=str(legacy))
+    assert list(reopened) == ["/podcasts/a.mp3"]
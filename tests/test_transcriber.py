@@ -50,6 +50,19 @@ def test_transcriber_model_lazy_loading(mock_whisper):
     mock_whisper.load_model.assert_called_once_with("base")
     assert model == mock_model
 
+def test_transcriber_model_loads_half_precision_on_cuda(mock_whisper):
+    """Test that the model is loaded in half precision on a CUDA device."""
+    mock_model = MagicMock()
+    mock_whisper.load_model.return_value = mock_model
+    
+    transcriber = Transcriber(model_name="base", device="cuda")
+    model = transcriber.model
+    
+    mock_whisper.load_model.assert_called_once_with("base", device="cuda")
+    mock_model.half.assert_called_once()
+    assert model == mock_model.half.return_value
+    assert transcriber._transcribe_options() == {"fp16": True}
+
 def test_transcribe_with_cache_hit():
     """Test transcription with a cache hit."""
     mock_transcript = Transcript(segments=[
@@ -57,15 +70,33 @@ def test_transcribe_with_cache_hit():
     ])
     mock_json = json.dumps(mock_transcript.to_dict())
     
+    transcriber = Transcriber(model_name="base")
     with patch('builtins.open', mock_open(read_data=mock_json)):
-        with patch('os.path.exists', return_value=True):
-            transcriber = Transcriber(model_name="base")
+        with patch('os.stat', return_value=MagicMock(st_size=100, st_mtime=1.0)):
             result = transcriber.transcribe("test.mp3")
             
             assert isinstance(result, Transcript)
             assert len(result.segments) == 1
             assert result.segments[0].text == "Test segment"
 
+def test_transcribe_ignores_stale_cache(mock_whisper, tmp_path):
+    """Test that a cached transcript older than its audio file is ignored."""
+    audio_file = tmp_path / "test.mp3"
+    audio_file.write_bytes(b"audio")
+    transcript_file = tmp_path / "test.mp3.transcript.json"
+    transcript_file.write_text("{}")
+    os.utime(transcript_file, (0, 0))
+    
+    mock_model = MagicMock()
+    mock_model.transcribe.return_value = {"segments": []}
+    
+    transcriber = Transcriber(model_name="base")
+    transcriber._model = mock_model
+    result = transcriber.transcribe(str(audio_file))
+    
+    mock_model.transcribe.assert_called_once_with(str(audio_file))
+    assert result.segments == []
+
 def test_transcribe_with_cache_miss(mock_whisper):
     """Test transcription with a cache miss."""
     mock_model = MagicMock()
@@ -78,7 +109,7 @@ def test_transcribe_with_cache_miss(mock_whisper):
     }
     mock_model.transcribe.return_value = mock_result
     
-    with patch('builtins.open', mock_open()):
+    with patch('builtins.open', mock_open()), patch('os.replace'):
         with patch('os.path.exists', return_value=False):
             transcriber = Transcriber(model_name="base")
             transcriber._model = mock_model  # Bypass lazy loading
@@ -102,7 +133,7 @@ def test_handle_transcription_request_success(mock_mqtt_broker, mock_whisper):
     }
     mock_model.transcribe.return_value = mock_result
     
-    with patch('builtins.open', mock_open()):
+    with patch('builtins.open', mock_open()), patch('os.replace'):
         with patch('os.path.exists', return_value=False):
             transcriber = Transcriber(message_broker=mock_mqtt_broker, model_name="base")
             transcriber._model = mock_model  # Bypass lazy loading
@@ -124,6 +155,34 @@ def test_handle_transcription_request_success(mock_mqtt_broker, mock_whisper):
             assert publish_call_args.data["transcript_path"] == "test.mp3.transcript.json"
             assert publish_call_args.correlation_id == "test-id"
 
+def test_handle_transcription_request_with_worker_pool(mock_mqtt_broker):
+    """Test that requests are dispatched to the worker pool and completed in its callback."""
+    transcriber = Transcriber(message_broker=mock_mqtt_broker, model_name="base", num_workers=2)
+    transcriber._pool = MagicMock()
+    transcriber.running = True
+    
+    message = Message(
+        topic=Topics.TRANSCRIBE_REQUEST,
+        data={"file_path": "test.mp3"},
+        correlation_id="test-id"
+    )
+    transcriber._handle_transcription_request(message)
+    
+    transcriber._pool.apply_async.assert_called_once()
+    mock_mqtt_broker.publish.assert_not_called()
+    assert "test.mp3" in transcriber.files_in_process
+    
+    # Simulate the worker finishing
+    callback = transcriber._pool.apply_async.call_args.kwargs["callback"]
+    callback("test.mp3.transcript.json")
+    
+    publish_call_args = mock_mqtt_broker.publish.call_args[0][0]
+    assert publish_call_args.topic == Topics.TRANSCRIBE_COMPLETE
+    assert publish_call_args.data["transcript_path"] == "test.mp3.transcript.json"
+    assert publish_call_args.correlation_id == "test-id"
+    assert "test.mp3" in transcriber.processed_files
+    assert "test.mp3" not in transcriber.files_in_process
+
 def test_start_stop():
     """Test starting and stopping the transcriber."""
     transcriber = Transcriber(model_name="base")
@@ -136,6 +195,21 @@ def test_start_stop():
     transcriber.stop()
     assert transcriber.running is False
 
+def test_start_warms_up_model(mock_whisper):
+    """Test that starting the transcriber loads and warms the model in the background."""
+    mock_model = MagicMock()
+    mock_whisper.load_model.return_value = mock_model
+    
+    transcriber = Transcriber(model_name="base")
+    transcriber.start()
+    assert transcriber.running is True
+    
+    transcriber._warm_up_thread.join()
+    
+    assert transcriber.model is mock_model
+    mock_whisper.load_model.assert_called_once_with("base")
+    mock_model.transcribe.assert_called_once()
+
 def test_model_loading_error():
     """Test that an error is raised when whisper.load_model is not available."""
     with patch('podcleaner.services.transcriber.whisper') as mock_whisper:
@@ -165,4 +239,65 @@ def test_transcribe_with_model_loading_error():
         
         # Verify that the error is wrapped in a TranscriptionError
         assert "Failed to transcribe audio" in str(exc_info.value)
-        assert "module 'whisper' has no attribute 'load_model'" in str(exc_info.value) 
\ No newline at end of file
+        assert "module 'whisper' has no attribute 'load_model'" in str(exc_info.value) 
+def test_processed_files_persist_across_restarts():
+    """Test that processed files are kept in the state database and reloaded by a new transcriber."""
+    transcriber = Transcriber(model_name="base")
+    transcriber.processed_files.add("a.mp3")
+    transcriber.processed_files.add("b.mp3")
+    transcriber.processed_files.close()
+    
+    assert set(Transcriber(model_name="base").processed_files) == {"a.mp3", "b.mp3"}
+
+def test_transcribe_with_whisper_cpp_backend():
+    """Test transcription through the whisper.cpp backend."""
+    mock_model = MagicMock()
+    mock_model.transcribe.return_value = [MagicMock(t0=0, t1=150, text=" Test segment")]
+    
+    with patch('podcleaner.services.transcriber.WhisperCppModel', return_value=mock_model) as mock_cls:
+        transcriber = Transcriber(model_name="base", backend="whisper.cpp")
+        result = transcriber.transcribe("test.mp3", cache=False)
+    
+    assert mock_cls.call_args[0][0] == "base-q5_1"
+    mock_model.transcribe.assert_called_once_with("test.mp3", n_threads=os.cpu_count())
+    assert result.segments == [Segment(id=0, text="Test segment", start=0.0, end=1.5, is_ad=False)]
+
+def test_whisper_cpp_backend_requires_pywhispercpp():
+    """Test that the whisper.cpp backend fails clearly without the pywhispercpp package."""
+    with patch('podcleaner.services.transcriber.WhisperCppModel', None):
+        transcriber = Transcriber(model_name="base", backend="whisper.cpp")
+        with pytest.raises(ImportError):
+            transcriber._load_whisper_cpp_model()
+
+def test_shared_cache_survives_moved_audio(tmp_path):
+    """Test that a copy of already transcribed audio is served from the shared cache."""
+    first = tmp_path / "first.mp3"
+    first.write_bytes(b"audio" * 1000)
+    second = tmp_path / "second.mp3"
+    second.write_bytes(first.read_bytes())
+    
+    mock_model = MagicMock()
+    mock_model.transcribe.return_value = {"segments": [{"text": "Hello", "start": 0.0, "end": 1.0}]}
+    transcriber = Transcriber(model_name="base", backend="whisper", shared_cache_dir=str(tmp_path / "cache"))
+    transcriber._model = mock_model
+    
+    transcriber.transcribe(str(first))
+    result = transcriber.transcribe(str(second))
+    
+    mock_model.transcribe.assert_called_once()
+    assert result.segments[0].text == "Hello"
+    assert os.path.exists(f"{second}.transcript.json")
+
+def test_transcribe_skips_model_for_silent_audio(tmp_path):
+    """Test that silent audio yields an empty transcript without running the model."""
+    audio_file = tmp_path / "silent.mp3"
+    audio_file.write_bytes(b"audio")
+    
+    transcriber = Transcriber(model_name="base")
+    transcriber._model = MagicMock()
+    with patch('podcleaner.services.transcriber.AudioProcessor.is_mostly_silent', return_value=True):
+        result = transcriber.transcribe(str(audio_file))
+    
+    transcriber._model.transcribe.assert_not_called()
+    assert result.segments == []
+    assert Transcript.load(transcriber._transcript_path(str(audio_file))).segments == []
@@ -180,7 +180,7 @@ def test_start_and_stop():
     )
     
     # Mock HTTP Server
-    with patch('podcleaner.services.web_server.HTTPServer') as mock_http_server:
+    with patch('podcleaner.services.web_server.ThreadingHTTPServer') as mock_http_server:
         mock_server = MagicMock()
         mock_http_server.return_value = mock_server
         
@@ -231,7 +231,7 @@ def test_handle_download_complete(web_server):
     )
     
     # Handle the message
-    web_server._handle_download_complete(message)
+    web_server._advance(message)
     
     # Check that the status was updated
     assert web_server.pending_requests[request_id]["status"] == "processing"
@@ -271,10 +271,278 @@ def test_handle_already_processed_download(web_server):
     )
     
     # Handle the message
-    web_server._handle_download_complete(message)
+    web_server._advance(message)
     
     # Check that the status was updated correctly
     assert web_server.pending_requests[request_id]["status"] == "processing"
     assert len(web_server.pending_requests[request_id]["steps"]) == 1
     assert web_server.pending_requests[request_id]["steps"][0]["name"] == "download"
-    assert web_server.pending_requests[request_id]["steps"][0]["status"] == "completed" 
\ No newline at end of file
+    assert web_server.pending_requests[request_id]["steps"][0]["status"] == "completed" 
+def test_entry_audio_url_from_enclosures_or_links():
+    """Test that audio URLs are found in enclosures, falling back to enclosure links."""
+    from podcleaner.services.downloader import entry_audio_url
+    
+    links_only_entry = {"links": [
+        {"rel": "alternate", "type": "text/html", "href": "https://example.com/page"},
+        {"rel": "enclosure", "type": "audio/mpeg", "href": "https://example.com/a.mp3"}
+    ]}
+    url_entry = {"enclosures": [{"type": "audio/mpeg", "url": "https://example.com/b.mp3"}]}
+    feedparser_entry = {"enclosures": [{"type": "audio/mpeg", "href": "https://example.com/c.mp3"}]}
+    
+    assert entry_audio_url(links_only_entry) == "https://example.com/a.mp3"
+    assert entry_audio_url(url_entry) == "https://example.com/b.mp3"
+    assert entry_audio_url(feedparser_entry) == "https://example.com/c.mp3"
+    assert entry_audio_url({}) is None
+
+def test_serve_file_streams_from_object_storage(web_server):
+    """Test that files are streamed from object storage with the stat size as Content-Length."""
+    import io
+    web_server.object_storage = MagicMock()
+    web_server.object_storage.stat.return_value = {"key": "out.mp3", "size": 5}
+    web_server.object_storage.open_stream.return_value = io.BytesIO(b"audio")
+    handler = MagicMock()
+    handler.headers = {}
+    
+    web_server._serve_file(handler, "out.mp3", "podcast.mp3")
+    
+    handler.send_response.assert_called_once_with(200)
+    handler.send_header.assert_any_call("Content-Length", "5")
+    handler.send_header.assert_any_call("Content-Type", "audio/mpeg")
+    handler.wfile.write.assert_called_once_with(b"audio")
+    web_server.object_storage.download.assert_not_called()
+
+def test_serve_local_file_uses_sendfile(web_server, tmp_path):
+    """Test that local files are handed to the socket with sendfile."""
+    file_path = tmp_path / "out.mp3"
+    file_path.write_bytes(b"audio")
+    web_server.object_storage = MagicMock()
+    web_server.object_storage.stat.return_value = {"key": "out.mp3", "size": 5}
+    web_server.object_storage.open_stream.side_effect = lambda key, **kwargs: open(file_path, "rb")
+    handler = MagicMock()
+    handler.headers = {}
+    
+    web_server._serve_file(handler, "out.mp3")
+    
+    handler.connection.sendfile.assert_called_once()
+    handler.wfile.write.assert_not_called()
+
+def test_rss_xml_is_cached_until_podcast_info_changes(web_server):
+    """Test that rendered RSS XML is reused and invalidated when the feed is re-cached."""
+    import xml.etree.ElementTree as ET
+    rss_url = "https://example.com/feed.xml"
+    podcast_info = {"title": "First", "episodes": []}
+    web_server.cache_podcast_info(rss_url, podcast_info)
+    
+    with patch.object(web_server, "write_rss_xml", wraps=web_server.write_rss_xml) as mock_generate:
+        first = web_server.get_rss_xml(rss_url, podcast_info)
+        assert web_server.get_rss_xml(rss_url, podcast_info) is first
+        assert mock_generate.call_count == 1
+        
+        updated_info = {"title": "Second", "episodes": []}
+        web_server.cache_podcast_info(rss_url, updated_info)
+        assert b"Second" in web_server.get_rss_xml(rss_url, updated_info)
+        assert mock_generate.call_count == 2
+    
+    rss = ET.fromstring(first)
+    assert rss.find("channel/title").text == "First"
+
+def test_generate_rss_xml_escapes_content(web_server):
+    """Test that feed text and enclosure URLs are escaped into well-formed XML."""
+    import xml.etree.ElementTree as ET
+    podcast_info = {
+        "title": "News & <Views>",
+        "episodes": [
+            {"title": "Q&A", "description": "", "audio_url": "https://example.com/ep.mp3?a=1&b=\"2\""}
+        ]
+    }
+    
+    rss = ET.fromstring(web_server.generate_rss_xml(podcast_info))
+    
+    assert rss.find("channel/title").text == "News & <Views>"
+    assert rss.find("channel/item/title").text == "Q&A"
+    assert rss.find("channel/item/enclosure").get("url") == "https://example.com/ep.mp3?a=1&b=\"2\""
+
+def test_expiring_dict_bounds_size_and_age():
+    """Test that tracked state evicts the oldest entries by size and by age."""
+    from podcleaner.services.web_server import ExpiringDict
+    
+    bounded = ExpiringDict(maxsize=2, ttl=60)
+    bounded["a"] = 1
+    bounded["b"] = 2
+    bounded["c"] = 3
+    assert list(bounded) == ["b", "c"]
+    
+    with patch("podcleaner.services.web_server.time.monotonic", return_value=time.monotonic() + 120):
+        bounded["d"] = 4
+    assert list(bounded) == ["d"]
+
+def test_expiring_dict_expires_on_read():
+    """Test that entries past their ttl are not served before the next write."""
+    from podcleaner.services.web_server import ExpiringDict
+    
+    expiring = ExpiringDict(maxsize=10, ttl=60)
+    expiring["a"] = 1
+    expiring["b"] = 2
+    
+    with patch("podcleaner.services.web_server.time.monotonic", return_value=time.monotonic() + 120):
+        assert expiring.get("a") is None
+        assert "b" not in expiring
+        with pytest.raises(KeyError):
+            expiring["b"]
+    assert len(expiring) == 0
+
+def test_next_request_id_is_unique(web_server):
+    """Test that request IDs don't repeat."""
+    ids = {web_server.next_request_id() for _ in range(1000)}
+    assert len(ids) == 1000
+
+def test_request_routing():
+    """Test that GET paths are dispatched to the matching handler."""
+    from podcleaner.services.web_server import RequestHandler
+    
+    handler = RequestHandler.__new__(RequestHandler)
+    handler._handle_status_request = MagicMock()
+    handler._handle_download_request = MagicMock()
+    handler.send_error = MagicMock()
+    
+    handler.path = "/status?id=abc"
+    handler.do_GET()
+    handler._handle_status_request.assert_called_once_with({"id": ["abc"]})
+    
+    handler.path = "/download/abc"
+    handler.do_GET()
+    handler._handle_download_request.assert_called_once_with("/download/abc")
+    
+    handler.path = "/unknown"
+    handler.do_GET()
+    handler.send_error.assert_called_once_with(404, "Not Found")
+
+def test_handle_download_request_extracts_file_id(web_server):
+    """Test that the file ID is taken from the download path."""
+    from podcleaner.services.web_server import RequestHandler
+    
+    handler = RequestHandler.__new__(RequestHandler)
+    handler.server = MagicMock(web_server=web_server)
+    handler.send_error = MagicMock()
+    web_server.file_mappings["abc"] = "out.mp3"
+    
+    with patch.object(web_server, "_serve_file") as mock_serve:
+        handler._handle_download_request("/download/abc")
+        mock_serve.assert_called_once_with(handler, "out.mp3", "podcast_abc.mp3")
+    
+    handler._handle_download_request("/download/")
+    handler.send_error.assert_called_once_with(400, "Missing file ID")
+
+def test_request_status_json_is_cached_until_updated(web_server):
+    """Test that serialized status is reused until the request changes."""
+    web_server.add_pending_request("test-id", "process", "https://example.com/podcast.mp3")
+    
+    first = web_server.get_request_status_json("test-id")
+    assert web_server.get_request_status_json("test-id") is first
+    assert json.loads(first)["status"] == "processing"
+    
+    web_server.update_request_status("test-id", "completed")
+    assert json.loads(web_server.get_request_status_json("test-id"))["status"] == "completed"
+    assert web_server.get_request_status_json("missing") is None
+
+def test_generate_rss_xml_points_enclosures_at_server(web_server):
+    """Test that enclosures are rewritten to escaped /process URLs without mutating episodes."""
+    import xml.etree.ElementTree as ET
+    episode = {"title": "Episode 1", "audio_url": "https://example.com/ep1.mp3?token=a&b=c"}
+    podcast_info = {"title": "Test Podcast", "episodes": [episode]}
+    
+    rss = ET.fromstring(web_server.generate_rss_xml(podcast_info, "http://localhost:8081"))
+    url = rss.find("channel/item/enclosure").get("url")
+    
+    assert url == "http://localhost:8081/process?url=https://example.com/ep1.mp3%3Ftoken%3Da%26b%3Dc"
+    assert urllib.parse.parse_qs(urllib.parse.urlparse(url).query)["url"] == [episode["audio_url"]]
+    assert episode["audio_url"] == "https://example.com/ep1.mp3?token=a&b=c"
+
+def test_serve_file_range_request(web_server, tmp_path):
+    """Test that a Range request gets a 206 with only the requested bytes."""
+    from podcleaner.config import ObjectStorageConfig
+    from podcleaner.services.object_storage import ObjectStorage
+    web_server.object_storage = ObjectStorage(ObjectStorageConfig(provider="local", local_storage_path=str(tmp_path)))
+    (tmp_path / "out.mp3").write_bytes(b"0123456789")
+    handler = MagicMock()
+    handler.headers = {"Range": "bytes=2-5"}
+    
+    web_server._serve_file(handler, "out.mp3")
+    
+    handler.send_response.assert_called_once_with(206)
+    handler.send_header.assert_any_call("Content-Range", "bytes 2-5/10")
+    handler.send_header.assert_any_call("Content-Length", "4")
+    _, kwargs = handler.connection.sendfile.call_args
+    assert kwargs == {"offset": 2, "count": 4}
+
+def test_parse_range():
+    """Test parsing of single byte ranges."""
+    from podcleaner.services.web_server import _parse_range
+    
+    assert _parse_range(None, 10) is None
+    assert _parse_range("bytes=2-5", 10) == (2, 5)
+    assert _parse_range("bytes=7-", 10) == (7, 9)
+    assert _parse_range("bytes=-3", 10) == (7, 9)
+    assert _parse_range("bytes=5-100", 10) == (5, 9)
+    assert _parse_range("bytes=0-1,4-5", 10) is None
+    with pytest.raises(ValueError):
+        _parse_range("bytes=10-", 10)
+
+def test_generate_rss_xml_uses_original_url_of_rewritten_episodes(web_server):
+    """Test that episodes already rewritten by the downloader are not wrapped twice."""
+    import xml.etree.ElementTree as ET
+    episode = {
+        "title": "Episode 1",
+        "original_url": "https://example.com/ep1.mp3",
+        "audio_url": "http://other-host/process?url=https://example.com/ep1.mp3"
+    }
+    
+    rss = ET.fromstring(web_server.generate_rss_xml({"episodes": [episode]}, "http://localhost:8081"))
+    
+    assert rss.find("channel/item/enclosure").get("url") == \
+        "http://localhost:8081/process?url=https://example.com/ep1.mp3"
+
+def test_directly_download_rss_revalidates_with_etag(web_server):
+    """Test that a feed is fetched conditionally and reused on 304 Not Modified."""
+    from podcleaner.services.web_server import RequestHandler
+    
+    feed_xml = b"""<?xml version="1.0"?><rss version="2.0"><channel><title>Test Podcast</title>
+        <item><title>Episode 1</title>
+        <enclosure url="https://example.com/ep1.mp3" type="audio/mpeg" length="1"/></item>
+        </channel></rss>"""
+    handler = RequestHandler.__new__(RequestHandler)
+    handler.server = MagicMock(web_server=web_server)
+    web_server.http = MagicMock()
+    web_server.http.get.return_value = MagicMock(status_code=200, content=feed_xml, headers={"ETag": '"v1"'})
+    
+    podcast_info = handler._directly_download_rss("https://example.com/feed.xml")
+    assert podcast_info["episodes"][0]["audio_url"] == "https://example.com/ep1.mp3"
+    
+    web_server.http.get.return_value = MagicMock(status_code=304, headers={})
+    assert handler._directly_download_rss("https://example.com/feed.xml") is podcast_info
+    assert web_server.http.get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+def test_failed_step_marks_request_failed(web_server):
+    """Test that any failure topic records the failed step and error."""
+    web_server.pending_requests["test-id"] = {"status": "processing", "steps": []}
+    
+    web_server._fail(Message(
+        topic=Topics.AD_DETECTION_FAILED,
+        data={"error": "boom"},
+        correlation_id="test-id"
+    ))
+    
+    request = web_server.pending_requests["test-id"]
+    assert request["status"] == "failed"
+    assert request["steps"][0]["name"] == "ad_detection"
+    assert request["steps"][0]["error"] == "boom"
+    web_server.message_broker.publish.assert_not_called()
+
+def test_request_timestamps_share_one_clock_read(web_server):
+    """Test that a request's timestamps come from a single clock read."""
+    web_server.add_pending_request("test-id", "process", "https://example.com/a.mp3")
+    request = web_server.pending_requests["test-id"]
+    assert request["created_at"] == request["updated_at"] == request["steps"][0]["timestamp"]
+    
+    web_server.update_request_status("test-id", "processing", {"name": "download", "status": "completed"})
+    assert request["steps"][-1]["timestamp"] == request["updated_at"]